@@ -17,12 +17,16 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'PoseGraph_Slam-Simulation'))
 
 try:
+    # 只导入SLAM后端 (new.py 仅依赖numpy), 不加载仿真模块及其绘图栈, 以缩短C#端启动桥接的时间
     from new import PoseGraphSLAM
-    from maze_slam_simulation import Robot, Environment, SLAMSimulation
+    from trajectory_buffer import TrajectoryBuffer
 except ImportError as e:
     print(f"ERROR: 无法导入PoseGraph_Slam-Simulation模块: {e}")
     sys.exit(1)
 
+# 桥接端保留的最大轨迹点数
+TRAJECTORY_MAX_POINTS = 20000
+
 class PythonSLAMBridge:
     """Python SLAM桥接类"""
     
@@ -34,7 +38,8 @@ class PythonSLAMBridge:
         
         # 初始化SLAM相关数据
         self.current_pose = [0.0, 0.0, 0.0]  # [x, y, theta]
-        self.trajectory = []
+        # 轨迹 [x, y, theta]; 里程计边需要相邻位姿, 不做抽稀, 只限制长度
+        self.trajectory = TrajectoryBuffer(dims=3, max_points=TRAJECTORY_MAX_POINTS)
         self.map_points = []
         self.laser_data_history = []
         
@@ -98,7 +103,7 @@ class PythonSLAMBridge:
             ]
             
             # 添加到轨迹
-            self.trajectory.append(self.current_pose.copy())
+            self.trajectory.append(self.current_pose)
             
             # 处理激光数据
             if 'laser_data' in sensor_data and sensor_data['laser_data']:
@@ -175,7 +180,7 @@ class PythonSLAMBridge:
         try:
             result = {
                 'map_points': self.map_points,
-                'trajectory': self.trajectory,
+                'trajectory': self.trajectory.tolist(),
                 'optimized_poses': self.slam.nodes,
                 'statistics': self.stats,
                 'timestamp': datetime.now().isoformat()
@@ -193,7 +198,7 @@ class PythonSLAMBridge:
         with self.lock:
             return {
                 'map_points': self.map_points,
-                'trajectory': self.trajectory,
+                'trajectory': self.trajectory.tolist(),
                 'optimized_poses': self.slam.nodes,
                 'statistics': self.stats,
                 'timestamp': datetime.now().isoformat()
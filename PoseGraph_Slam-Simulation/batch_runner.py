@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+迷宫SLAM仿真批量运行器 - 无头模式下在多个CPU核心上并行运行多组 (地图, 随机种子) 仿真,
+并将每次运行的统计信息汇总为 CSV/JSON 报告. 仿真本身是确定性的, 种子决定起始位姿的扰动
+(见 maze_slam_simulation.jittered_start_pose), 同一地图的不同种子才是不同的运行.
+
+用法示例:
+    python batch_runner.py --maps 1.json 2.json 3.json 4.json --seeds 0 1 2 --generated 4 --workers 4
+"""
+
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+REPORT_FIELDS = [
+    'map', 'seed', 'start_x', 'start_y', 'start_theta', 'total_steps', 'sim_time', 'wall_time', 'steps_per_s', 'coverage',
+    'keyframes', 'loop_closures', 'optimization_time', 'mission_phase', 'exit_found', 'error',
+]
+
+
+def generate_maze_map(rows, cols, cell_size=2.0, seed=None):
+    """
+    使用递归回溯法生成一个完美迷宫, 返回与 1.json-4.json 相同格式的地图字典.
+    入口位于左下角单元格的下边界, 出口位于右上角单元格的上边界.
+    """
+    rng = random.Random(seed)
+    # open_walls[r][c] = {'N', 'S', 'E', 'W'} 中已打通的方向 (r=0 为最下面一行)
+    open_walls = [[set() for _ in range(cols)] for _ in range(rows)]
+    visited = [[False] * cols for _ in range(rows)]
+    moves = {'N': (1, 0, 'S'), 'S': (-1, 0, 'N'), 'E': (0, 1, 'W'), 'W': (0, -1, 'E')}
+
+    stack = [(0, 0)]
+    visited[0][0] = True
+    while stack:
+        r, c = stack[-1]
+        candidates = [(d, r + dr, c + dc, back) for d, (dr, dc, back) in moves.items()
+                      if 0 <= r + dr < rows and 0 <= c + dc < cols and not visited[r + dr][c + dc]]
+        if not candidates:
+            stack.pop()
+            continue
+        d, nr, nc, back = rng.choice(candidates)
+        open_walls[r][c].add(d)
+        open_walls[nr][nc].add(back)
+        visited[nr][nc] = True
+        stack.append((nr, nc))
+
+    # 入口和出口
+    open_walls[0][0].add('S')
+    open_walls[rows - 1][cols - 1].add('N')
+
+    segments = []
+
+    def add_segment(x1, y1, x2, y2):
+        segments.append({"start": [x1, y1], "end": [x2, y2]})
+
+    for r in range(rows):
+        for c in range(cols):
+            x0, y0 = c * cell_size, r * cell_size
+            x1, y1 = x0 + cell_size, y0 + cell_size
+            if 'N' not in open_walls[r][c]:
+                add_segment(x0, y1, x1, y1)
+            if 'E' not in open_walls[r][c]:
+                add_segment(x1, y0, x1, y1)
+            if r == 0 and 'S' not in open_walls[r][c]:
+                add_segment(x0, y0, x1, y0)
+            if c == 0 and 'W' not in open_walls[r][c]:
+                add_segment(x0, y0, x0, y1)
+
+    return {"segments": segments, "start_point": [cell_size / 2.0, 0.5]}
+
+
+def write_generated_maps(count, rows, cols, cell_size, base_seed, out_dir):
+    """生成 count 个随机迷宫并写入 out_dir, 返回文件路径列表"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(count):
+        seed = base_seed + i
+        map_data = generate_maze_map(rows, cols, cell_size, seed)
+        path = os.path.join(out_dir, f"generated_{rows}x{cols}_s{seed}.json")
+        with open(path, 'w') as f:
+            json.dump(map_data, f, indent=1)
+        paths.append(path)
+    return paths
+
+
+def _run_job(job):
+    """在子进程中执行一次无头仿真 (仿真过程中的日志输出被丢弃)"""
+    map_file, seed, max_steps, dt = job
+
+    from maze_slam_simulation import run_headless
+
+    record = {'map': os.path.basename(map_file), 'seed': seed, 'error': ''}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            record.update(run_headless(map_file, dt=dt, max_steps=max_steps, seed=seed))
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['seed'] = seed
+    return record
+
+
+def run_batch(map_files, seeds, max_steps=25000, dt=0.02, workers=None):
+    """将所有 (地图, 种子) 组合分发到进程池运行, 返回按 (地图, 种子) 排序的结果列表"""
+    jobs = [(m, s, max_steps, dt) for m in map_files for s in seeds]
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            record = future.result()
+            results.append(record)
+            status = record['error'] or (
+                f"steps={record['total_steps']}, {record['steps_per_s']:.0f} steps/s, "
+                f"coverage={record['coverage']:.1%}")
+            print(f"[{len(results)}/{len(jobs)}] {record['map']} (seed={record['seed']}): {status}")
+    total_wall = time.perf_counter() - start
+    results.sort(key=lambda r: (r['map'], r['seed']))
+    print(f"批量运行完成: {len(jobs)} 次仿真, 总耗时 {total_wall:.1f}s")
+    return results, total_wall
+
+
+def summarize(results):
+    """按地图汇总平均指标"""
+    summary = {}
+    for record in results:
+        if record['error']:
+            continue
+        entry = summary.setdefault(record['map'], {'runs': 0, 'total_steps': 0.0, 'steps_per_s': 0.0,
+                                                   'coverage': 0.0, 'keyframes': 0.0,
+                                                   'loop_closures': 0.0, 'optimization_time': 0.0})
+        entry['runs'] += 1
+        for key in ('total_steps', 'steps_per_s', 'coverage', 'keyframes', 'loop_closures', 'optimization_time'):
+            entry[key] += record[key]
+    for entry in summary.values():
+        for key in entry:
+            if key != 'runs':
+                entry[key] /= entry['runs']
+    return summary
+
+
+def write_report(results, total_wall, out_prefix):
+    """写出 CSV (逐次运行) 和 JSON (逐次运行 + 按地图汇总) 报告"""
+    os.makedirs(os.path.dirname(out_prefix) or '.', exist_ok=True)
+    csv_path = out_prefix + '.csv'
+    json_path = out_prefix + '.json'
+
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for record in results:
+            writer.writerow(record)
+
+    with open(json_path, 'w') as f:
+        json.dump({'total_wall_time': total_wall, 'runs': results, 'summary': summarize(results)},
+                  f, indent=2, ensure_ascii=False)
+
+    print(f"报告已保存: {csv_path}, {json_path}")
+    return csv_path, json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="迷宫SLAM仿真批量运行器 (无头, 多进程)")
+    parser.add_argument("--maps", nargs='*', default=None, help="地图文件列表, 默认使用脚本目录下的 [0-9]*.json")
+    parser.add_argument("--seeds", nargs='+', type=int, default=[0],
+                        help="随机种子列表, 每个种子对应一种起始位姿扰动 (也作为生成迷宫的起始种子)")
+    parser.add_argument("--generated", type=int, default=0, help="额外生成的随机迷宫数量")
+    parser.add_argument("--gen-size", type=int, nargs=2, default=[6, 6], metavar=('ROWS', 'COLS'),
+                        help="生成迷宫的行数和列数")
+    parser.add_argument("--gen-cell", type=float, default=2.0, help="生成迷宫的单元格尺寸 (米)")
+    parser.add_argument("--max-steps", type=int, default=25000, help="每次仿真的最大步数")
+    parser.add_argument("--dt", type=float, default=0.02, help="仿真控制周期 (秒)")
+    parser.add_argument("--workers", type=int, default=None, help="进程数, 默认等于CPU核心数")
+    parser.add_argument("--output", type=str, default=None, help="报告文件前缀 (不含扩展名)")
+    args = parser.parse_args()
+
+    map_files = args.maps
+    if map_files is None:
+        map_files = sorted(glob.glob(os.path.join(SCRIPT_DIR, '[0-9]*.json')))
+    map_files = [os.path.abspath(m) for m in map_files]
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_dir = os.path.join(SCRIPT_DIR, "results")
+    if args.generated > 0:
+        rows, cols = args.gen_size
+        map_files += write_generated_maps(args.generated, rows, cols, args.gen_cell, min(args.seeds),
+                                          os.path.join(results_dir, "generated_maps"))
+
+    out_prefix = args.output or os.path.join(results_dir, f"batch_{timestamp}")
+    results, total_wall = run_batch(map_files, args.seeds, args.max_steps, args.dt, args.workers)
+    write_report(results, total_wall, out_prefix)
+
+
+if __name__ == "__main__":
+    main()
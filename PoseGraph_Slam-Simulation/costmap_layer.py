@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+增量代价地图层 - 为A*规划维护一张持久的代价地图
+
+代价 = (安全距离 - 到最近障碍物的距离)^2, 距离裁剪到安全距离以内; 未知区域为固定成本,
+障碍物为无穷大. 因为距离被裁剪到安全距离 d, 一个栅格的代价只取决于其周围 d 格内的障碍物,
+所以占据栅格的变化只会影响变化区域外扩 d 格的范围, 计算这些栅格的距离也只需要再外扩 d 格的窗口.
+本模块据此只在 "脏区域" 内重算距离变换; 出口外侧的惩罚掩码只在出口位姿变化时重建.
+"""
+
+import math
+
+import numpy as np
+
+
+class IncrementalCostmap:
+    """
+    持久代价地图.
+
+    用法:
+        layer.mark_dirty(cells_x, cells_y)   # 占据栅格更新后标记分类发生变化的栅格
+        costmap = layer.get(log_odds_map, exit_pose)   # 规划前获取代价地图 (只读)
+    """
+
+    def __init__(self, map_dim, resolution, occ_threshold, unknown_band=0.1,
+                 safe_dist_m=0.5, unknown_cost=50.0, exit_penalty=10000.0, exit_buffer_m=0.5):
+        self.map_dim = map_dim
+        self.resolution = resolution
+        self.occ_threshold = occ_threshold
+        self.unknown_band = unknown_band
+        self.safe_dist_cells = safe_dist_m / resolution
+        self.unknown_cost = unknown_cost
+        self.exit_penalty = exit_penalty
+        self.exit_buffer_m = exit_buffer_m
+        # 距离裁剪到 safe_dist_cells, 所以变化的影响半径为 pad 格
+        self.pad = int(math.ceil(self.safe_dist_cells))
+
+        self.base_costmap = None     # 不含出口惩罚的代价地图, 首次获取时整图计算
+        self._dirty = None           # 脏区域包围盒 [row0, row1, col0, col1] (闭区间)
+
+        self._penalty_key = None     # 当前出口惩罚对应的出口位姿
+        self._penalty_mask = None    # 出口外侧的栅格掩码
+        self._penalized = None       # 含出口惩罚的代价地图
+
+        # 统计: 整图/局部重算次数
+        self.full_rebuilds = 0
+        self.partial_updates = 0
+        # 版本号: 每次有栅格被标记为脏时递增, 调用方可据此判断代价地图是否可能已变化
+        self.version = 0
+
+    def mark_dirty(self, cells_x, cells_y):
+        """把一组栅格 (列坐标, 行坐标) 并入脏区域包围盒"""
+        if len(cells_x) == 0:
+            return
+        self.version += 1
+        box = [int(np.min(cells_y)), int(np.max(cells_y)), int(np.min(cells_x)), int(np.max(cells_x))]
+        if self._dirty is None:
+            self._dirty = box
+        else:
+            self._dirty = [min(self._dirty[0], box[0]), max(self._dirty[1], box[1]),
+                           min(self._dirty[2], box[2]), max(self._dirty[3], box[3])]
+
+    def _compute_region(self, log_odds_map, r0, r1, c0, c1):
+        """计算行 [r0, r1) 列 [c0, c1) 范围内的代价, 距离变换只在外扩 pad 格的窗口内进行"""
+        from scipy.ndimage import distance_transform_edt
+
+        wr0, wr1 = max(r0 - self.pad, 0), min(r1 + self.pad, self.map_dim)
+        wc0, wc1 = max(c0 - self.pad, 0), min(c1 + self.pad, self.map_dim)
+        occ_window = log_odds_map[wr0:wr1, wc0:wc1] > self.occ_threshold
+
+        if occ_window.any():
+            dist = distance_transform_edt(np.logical_not(occ_window))
+            dist = dist[r0 - wr0:r1 - wr0, c0 - wc0:c1 - wc0]
+            np.clip(dist, 0, self.safe_dist_cells, out=dist)
+        else:
+            # 窗口内没有障碍物: 区域内所有栅格都超出安全距离
+            dist = np.full((r1 - r0, c1 - c0), self.safe_dist_cells)
+
+        cost = (self.safe_dist_cells - dist) ** 2
+        region = log_odds_map[r0:r1, c0:c1]
+        cost[np.abs(region) < self.unknown_band] = self.unknown_cost
+        cost[region > self.occ_threshold] = float('inf')
+        return cost
+
+    def _refresh_base(self, log_odds_map):
+        """整图首次计算, 之后只重算脏区域外扩 pad 格的范围; 返回被更新的区域 (或 None)"""
+        if self.base_costmap is None:
+            self.base_costmap = self._compute_region(log_odds_map, 0, self.map_dim, 0, self.map_dim)
+            self._dirty = None
+            self.full_rebuilds += 1
+            return (0, self.map_dim, 0, self.map_dim)
+        if self._dirty is None:
+            return None
+
+        row0, row1, col0, col1 = self._dirty
+        r0, r1 = max(row0 - self.pad, 0), min(row1 + 1 + self.pad, self.map_dim)
+        c0, c1 = max(col0 - self.pad, 0), min(col1 + 1 + self.pad, self.map_dim)
+        self.base_costmap[r0:r1, c0:c1] = self._compute_region(log_odds_map, r0, r1, c0, c1)
+        self._dirty = None
+        self.partial_updates += 1
+        return (r0, r1, c0, c1)
+
+    def _build_penalty_mask(self, exit_pose):
+        """出口外侧 (沿出口方向的投影 > -缓冲距离) 的栅格掩码, 用广播代替 meshgrid"""
+        exit_x, exit_y, exit_theta = exit_pose
+        coords = (np.arange(self.map_dim) + 0.5) * self.resolution
+        nx, ny = math.cos(exit_theta), math.sin(exit_theta)
+        projection = (coords[None, :] - exit_x) * nx + (coords[:, None] - exit_y) * ny
+        return projection > -self.exit_buffer_m
+
+    def _apply_penalty(self, r0, r1, c0, c1):
+        """在给定区域内把出口惩罚叠加到基础代价上, 不覆盖障碍物"""
+        base = self.base_costmap[r0:r1, c0:c1]
+        penalty = self._penalty_mask[r0:r1, c0:c1] & np.isfinite(base)
+        self._penalized[r0:r1, c0:c1] = base + penalty * self.exit_penalty
+
+    def get(self, log_odds_map, exit_pose=None):
+        """
+        返回最新的代价地图. exit_pose 不为 None 时对出口外侧区域施加高成本.
+        返回的数组由本层持有并在后续更新中原地修改, 调用方不应修改它.
+        """
+        updated = self._refresh_base(log_odds_map)
+
+        if exit_pose is None:
+            self._penalty_key = None
+            self._penalized = None
+            return self.base_costmap
+
+        key = tuple(exit_pose)
+        if key != self._penalty_key or self._penalized is None:
+            self._penalty_key = key
+            self._penalty_mask = self._build_penalty_mask(exit_pose)
+            self._penalized = np.empty_like(self.base_costmap)
+            self._apply_penalty(0, self.map_dim, 0, self.map_dim)
+        elif updated is not None:
+            self._apply_penalty(*updated)
+        return self._penalized
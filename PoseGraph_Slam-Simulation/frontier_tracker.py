@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+增量前沿跟踪器 - 只在最近发生变化的区域内重新计算前沿点和前沿簇
+
+前沿点定义为8邻域内存在未知栅格的空闲栅格 (free AND dilate(unknown)).
+一个栅格的前沿状态只取决于它自身和8邻域, 所以当一批栅格的空闲/未知分类发生变化时,
+只需在变化包围盒外扩1格的范围 B 内重新判断前沿状态.
+
+簇标签同样局部维护: 只有与 B 外扩1格范围相接触的旧簇可能被合并或拆分,
+把这些旧簇和 B 内的前沿点一起在它们的联合包围盒内重新做连通域标记即可, 其余簇保持不变.
+"""
+
+import numpy as np
+
+
+class FrontierTracker:
+    """
+    持久的前沿点集合与簇标签.
+
+    用法:
+        tracker.mark_dirty(cells_x, cells_y)        # 栅格分类变化后标记
+        clusters = tracker.get_clusters(log_odds_map, min_cluster_size)
+    """
+
+    def __init__(self, map_dim, free_threshold=-0.5, unknown_band=0.1):
+        self.map_dim = map_dim
+        self.free_threshold = free_threshold
+        self.unknown_band = unknown_band
+        self.structure = np.ones((3, 3), dtype=bool)  # 8连通
+
+        self.frontier_mask = np.zeros((map_dim, map_dim), dtype=bool)
+        self.labels = np.zeros((map_dim, map_dim), dtype=np.int32)
+        # 标签 -> {'bbox': (r0, r1, c0, c1) 半开区间, 'centroid': (x, y), 'points': [(x, y), ...]}
+        self.clusters_by_label = {}
+        self._next_label = 1
+        self._dirty = None        # 脏区域包围盒 [row0, row1, col0, col1] (闭区间)
+        self._initialized = False
+
+        # 统计: 局部重标记次数
+        self.relabel_count = 0
+
+    def mark_dirty(self, cells_x, cells_y):
+        """把一组栅格 (列坐标, 行坐标) 并入脏区域包围盒"""
+        if len(cells_x) == 0:
+            return
+        box = [int(np.min(cells_y)), int(np.max(cells_y)), int(np.min(cells_x)), int(np.max(cells_x))]
+        if self._dirty is None:
+            self._dirty = box
+        else:
+            self._dirty = [min(self._dirty[0], box[0]), max(self._dirty[1], box[1]),
+                           min(self._dirty[2], box[2]), max(self._dirty[3], box[3])]
+
+    def _pad(self, r0, r1, c0, c1, pad):
+        """半开区间包围盒外扩 pad 格并裁剪到地图内"""
+        return (max(r0 - pad, 0), min(r1 + pad, self.map_dim),
+                max(c0 - pad, 0), min(c1 + pad, self.map_dim))
+
+    def refresh(self, log_odds_map):
+        """处理自上次查询以来的脏区域: 更新前沿点掩码并局部重标记簇"""
+        from scipy import ndimage
+
+        if not self._initialized:
+            box = (0, self.map_dim, 0, self.map_dim)
+            self._initialized = True
+        elif self._dirty is not None:
+            row0, row1, col0, col1 = self._dirty
+            box = self._pad(row0, row1 + 1, col0, col1 + 1, 1)
+        else:
+            return
+        self._dirty = None
+
+        # 在 B 内重新判断前沿状态, 膨胀需要再外扩1格的未知栅格信息
+        r0, r1, c0, c1 = box
+        wr0, wr1, wc0, wc1 = self._pad(r0, r1, c0, c1, 1)
+        unknown = np.abs(log_odds_map[wr0:wr1, wc0:wc1]) < self.unknown_band
+        near_unknown = ndimage.binary_dilation(unknown, structure=self.structure)
+        near_unknown = near_unknown[r0 - wr0:r1 - wr0, c0 - wc0:c1 - wc0]
+        new_mask = (log_odds_map[r0:r1, c0:c1] < self.free_threshold) & near_unknown
+
+        if np.array_equal(new_mask, self.frontier_mask[r0:r1, c0:c1]):
+            return
+        self.frontier_mask[r0:r1, c0:c1] = new_mask
+        self._relabel(box)
+
+    def _relabel(self, box):
+        """合并/拆分与 B 相接触的簇: 在它们的联合包围盒内重新标记连通域"""
+        from scipy import ndimage
+
+        # 与 B 外扩1格范围相接触的旧簇
+        g0, g1, h0, h1 = self._pad(*box, 1)
+        affected = np.unique(self.labels[g0:g1, h0:h1])
+        affected = affected[affected > 0]
+
+        e0, e1, f0, f1 = g0, g1, h0, h1
+        for label in affected:
+            r0, r1, c0, c1 = self.clusters_by_label.pop(int(label))['bbox']
+            e0, e1, f0, f1 = min(e0, r0), max(e1, r1), min(f0, c0), max(f1, c1)
+
+        # 区域内参与重标记的点: B 内的所有前沿点 + 受影响旧簇的点
+        sub_labels = self.labels[e0:e1, f0:f1]
+        in_box = np.zeros(sub_labels.shape, dtype=bool)
+        in_box[box[0] - e0:box[1] - e0, box[2] - f0:box[3] - f0] = True
+        old_affected = np.isin(sub_labels, affected)
+        region_mask = self.frontier_mask[e0:e1, f0:f1] & (in_box | old_affected)
+
+        new_labels, num_new = ndimage.label(region_mask, structure=self.structure)
+        sub_labels[old_affected | in_box] = 0
+        self.relabel_count += 1
+        if num_new == 0:
+            return
+
+        rows, cols = np.nonzero(new_labels)
+        point_labels = new_labels[rows, cols]
+        order = np.argsort(point_labels, kind='stable')
+        rows, cols, point_labels = rows[order] + e0, cols[order] + f0, point_labels[order]
+        bounds = np.searchsorted(point_labels, np.arange(1, num_new + 2), side='left')
+
+        for k in range(num_new):
+            cluster_rows = rows[bounds[k]:bounds[k + 1]]
+            cluster_cols = cols[bounds[k]:bounds[k + 1]]
+            label = self._next_label
+            self._next_label += 1
+            self.labels[cluster_rows, cluster_cols] = label
+            self.clusters_by_label[label] = {
+                'bbox': (int(cluster_rows.min()), int(cluster_rows.max()) + 1,
+                         int(cluster_cols.min()), int(cluster_cols.max()) + 1),
+                'centroid': tuple(np.int32((cluster_cols.mean(), cluster_rows.mean()))),
+                'points': list(zip(cluster_cols.tolist(), cluster_rows.tolist())),
+            }
+
+    def get_clusters(self, log_odds_map, min_cluster_size=5):
+        """返回大小不少于 min_cluster_size 的前沿簇, 格式为 {'centroid': (x, y), 'points': [(x, y), ...]}"""
+        self.refresh(log_odds_map)
+        return [{'centroid': cluster['centroid'], 'points': cluster['points']}
+                for cluster in self.clusters_by_label.values()
+                if len(cluster['points']) >= min_cluster_size]
@@ -0,0 +1,668 @@
+# -*- coding: utf-8 -*-
+"""
+栅格搜索模块 - 基于 heapq 和扁平 numpy 数组的8邻域栅格图搜索
+
+与 RobotController 的代价地图约定一致:
+  - costmap 按 [行(y), 列(x)] 索引, 栅格坐标以 (x, y) 元组表示
+  - 移动到邻居的代价 = 移动距离 (直线1, 对角线sqrt(2)) + 目标栅格的代价, 代价为 inf 的栅格不可通行
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+SQRT2 = math.sqrt(2)
+
+# 8邻域偏移 (dx, dy, 移动距离)
+NEIGHBORS_8 = ((0, 1, 1.0), (0, -1, 1.0), (1, 0, 1.0), (-1, 0, 1.0),
+               (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2))
+
+
+def octile_distance(x0, y0, x1, y1):
+    """8邻域下的八分距离, 作为A*的可采纳启发函数"""
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    return max(dx, dy) + (SQRT2 - 1.0) * min(dx, dy)
+
+
+def reconstruct_path(parent, width, goal_idx):
+    """根据扁平父节点数组从目标回溯到起点, 返回 [(x, y), ...]"""
+    path = []
+    idx = goal_idx
+    while idx >= 0:
+        path.append((idx % width, idx // width))
+        idx = int(parent[idx])
+    path.reverse()
+    return path
+
+
+def grid_astar(costmap, start, goal, max_expansions=None):
+    """
+    8邻域A*搜索.
+
+    参数:
+        costmap: 二维代价数组 [y, x]
+        start, goal: (x, y) 栅格坐标
+        max_expansions: 最大扩展节点数, None 表示不限制
+    返回:
+        (path, cost, expanded): 找不到路径时 path 为 None, cost 为 inf
+    """
+    height, width = costmap.shape
+    sx, sy = start
+    gx, gy = goal
+    if not (0 <= sx < width and 0 <= sy < height and 0 <= gx < width and 0 <= gy < height):
+        return None, float('inf'), 0
+    if costmap[gy, gx] == float('inf') and (sx, sy) != (gx, gy):
+        return None, float('inf'), 0  # 目标栅格不可通行, 搜索必然失败
+
+    cells = costmap.ravel().tolist()  # Python 列表的标量读取比 numpy 快得多
+    size = width * height
+    g_score = np.full(size, np.inf)
+    parent = np.full(size, -1, dtype=np.int64)
+    closed = np.zeros(size, dtype=bool)
+
+    start_idx = sy * width + sx
+    goal_idx = gy * width + gx
+    g_score[start_idx] = 0.0
+    open_heap = [(octile_distance(sx, sy, gx, gy), start_idx)]
+    diag_extra = SQRT2 - 1.0
+    inf = float('inf')
+    heappush, heappop = heapq.heappush, heapq.heappop
+    expanded = 0
+
+    while open_heap:
+        _, idx = heappop(open_heap)
+        if closed[idx]:
+            continue  # 过期的堆条目
+        closed[idx] = True
+        expanded += 1
+        if idx == goal_idx:
+            return reconstruct_path(parent, width, goal_idx), float(g_score[goal_idx]), expanded
+        if max_expansions is not None and expanded >= max_expansions:
+            break
+
+        cx, cy = idx % width, idx // width
+        g_current = g_score[idx]
+        for dx, dy, move_cost in NEIGHBORS_8:
+            nx, ny = cx + dx, cy + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            n_idx = ny * width + nx
+            if closed[n_idx]:
+                continue
+            cell_cost = cells[n_idx]
+            if cell_cost == inf:
+                continue
+            new_g = g_current + move_cost + cell_cost
+            if new_g < g_score[n_idx]:
+                g_score[n_idx] = new_g
+                parent[n_idx] = idx
+                hx, hy = abs(gx - nx), abs(gy - ny)
+                h = (hx + diag_extra * hy) if hx > hy else (hy + diag_extra * hx)
+                heappush(open_heap, (new_g + h, n_idx))
+
+    return None, inf, expanded
+
+
+def grid_dijkstra(costmap, start, goals=None):
+    """
+    单源8邻域Dijkstra搜索, 一次搜索得到起点到多个目标的最小代价和父节点.
+
+    参数:
+        costmap: 二维代价数组 [y, x]
+        start: (x, y) 起点栅格
+        goals: 可选的目标栅格列表; 给出时所有可达目标都出队后即提前结束, 否则遍历整个连通区域
+    返回:
+        (g_score, parent, expanded): 扁平的代价数组和父节点数组 (索引 = y * width + x),
+        可用 reconstruct_path(parent, width, goal_idx) 取得到任意已确定目标的路径
+    """
+    height, width = costmap.shape
+    size = width * height
+    g_score = np.full(size, np.inf)
+    parent = np.full(size, -1, dtype=np.int64)
+    sx, sy = start
+    if not (0 <= sx < width and 0 <= sy < height):
+        return g_score, parent, 0
+
+    cells = costmap.ravel().tolist()
+    closed = np.zeros(size, dtype=bool)
+    inf = float('inf')
+
+    # 只等待可能到达的目标 (界内且可通行)
+    remaining = None
+    if goals is not None:
+        remaining = {int(gy) * width + int(gx) for gx, gy in goals
+                     if 0 <= gx < width and 0 <= gy < height and cells[int(gy) * width + int(gx)] != inf}
+
+    start_idx = sy * width + sx
+    g_score[start_idx] = 0.0
+    open_heap = [(0.0, start_idx)]
+    heappush, heappop = heapq.heappush, heapq.heappop
+    expanded = 0
+
+    while open_heap:
+        g_current, idx = heappop(open_heap)
+        if closed[idx]:
+            continue
+        closed[idx] = True
+        expanded += 1
+        if remaining is not None:
+            remaining.discard(idx)
+            if not remaining:
+                break
+
+        cx, cy = idx % width, idx // width
+        for dx, dy, move_cost in NEIGHBORS_8:
+            nx, ny = cx + dx, cy + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            n_idx = ny * width + nx
+            if closed[n_idx]:
+                continue
+            cell_cost = cells[n_idx]
+            if cell_cost == inf:
+                continue
+            new_g = g_current + move_cost + cell_cost
+            if new_g < g_score[n_idx]:
+                g_score[n_idx] = new_g
+                parent[n_idx] = idx
+                heappush(open_heap, (new_g, n_idx))
+
+    return g_score, parent, expanded
+
+
+class DStarLite:
+    """
+    D* Lite 增量路径规划器 (Koenig & Likhachev, 2002).
+
+    从目标向起点反向搜索并保留搜索状态 (g / rhs / 开放列表). 机器人移动后只需调用 move_start,
+    代价地图变化后调用 update_costmap, 再次 plan 时只修复受变化栅格影响的部分,
+    而不是从头搜索. 代价约定与 grid_astar 相同.
+    """
+
+    def __init__(self, costmap, start, goal):
+        self.height, self.width = costmap.shape
+        size = self.width * self.height
+        self.cells = costmap.ravel().copy()
+        # 搜索状态逐元素频繁读写, 使用 Python 列表 (标量访问比 numpy 快得多)
+        self._cells = self.cells.tolist()
+        self.g = [math.inf] * size
+        self.rhs = [math.inf] * size
+        self.start = self._index(start)
+        self.goal = self._index(goal)
+        self.goal_cell = (int(goal[0]), int(goal[1]))
+        self.last_start = self.start
+        self.km = 0.0
+        self.expanded = 0
+
+        self._open_keys = {}  # 开放列表中节点的当前键值, 堆中键值不一致的条目视为已删除
+        self._heap = []
+        self._initial_search()
+
+    def _initial_search(self):
+        """
+        首次规划: 从目标向起点做一次普通的反向A*, 直接构造出满足 D* Lite 不变式的搜索状态
+        (已出队节点 g = rhs = 真实代价, 开放列表节点的 rhs 为暂定代价), 比逐节点维护 rhs 快得多.
+        """
+        cells, g, rhs = self._cells, self.g, self.rhs
+        width, height = self.width, self.height
+        start, goal = self.start, self.goal
+        sx, sy = start % width, start // width
+        diag_extra = SQRT2 - 1.0
+        closed = bytearray(width * height)
+
+        rhs[goal] = 0.0
+        heap = [(self._heuristic(start, goal), goal)]
+        while heap:
+            _, idx = heapq.heappop(heap)
+            if closed[idx]:
+                continue
+            closed[idx] = 1
+            g[idx] = rhs[idx]
+            self.expanded += 1
+            if idx == start:
+                break
+            # 反向扩展: 邻居 n 经过 idx 到达目标的代价 = 移动距离 + idx 的栅格代价 + g(idx)
+            enter_cost = cells[idx]
+            if enter_cost == math.inf:
+                continue
+            cx, cy = idx % width, idx // width
+            for dx, dy, move_cost in NEIGHBORS_8:
+                nx, ny = cx + dx, cy + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                n_idx = ny * width + nx
+                if closed[n_idx]:
+                    continue
+                new_rhs = g[idx] + move_cost + enter_cost
+                if new_rhs < rhs[n_idx]:
+                    rhs[n_idx] = new_rhs
+                    hx, hy = abs(sx - nx), abs(sy - ny)
+                    h = (hx + diag_extra * hy) if hx > hy else (hy + diag_extra * hx)
+                    heapq.heappush(heap, (new_rhs + h, n_idx))
+
+        # 尚未出队的节点 (g != rhs) 构成 D* Lite 的开放列表
+        for _, idx in heap:
+            if not closed[idx] and idx not in self._open_keys:
+                self._push(idx)
+
+    def _index(self, cell):
+        return int(cell[1]) * self.width + int(cell[0])
+
+    def _cell(self, idx):
+        return (idx % self.width, idx // self.width)
+
+    def _heuristic(self, a, b):
+        width = self.width
+        dx = abs(a % width - b % width)
+        dy = abs(a // width - b // width)
+        return (dx + (SQRT2 - 1.0) * dy) if dx > dy else (dy + (SQRT2 - 1.0) * dx)
+
+    def _calc_key(self, idx):
+        g, rhs = self.g[idx], self.rhs[idx]
+        best = g if g < rhs else rhs
+        return (best + self._heuristic(self.start, idx) + self.km, best)
+
+    def _push(self, idx):
+        key = self._calc_key(idx)
+        self._open_keys[idx] = key
+        heapq.heappush(self._heap, (key[0], key[1], idx))
+
+    def _neighbors(self, idx):
+        """返回 (邻居索引, 移动距离) 列表"""
+        width, height = self.width, self.height
+        cx, cy = idx % width, idx // width
+        return [((cy + dy) * width + cx + dx, move_cost) for dx, dy, move_cost in NEIGHBORS_8
+                if 0 <= cx + dx < width and 0 <= cy + dy < height]
+
+    def _best_successor(self, idx):
+        """返回 (经过最优后继到达目标的代价, 最优后继索引)"""
+        best_cost, best_idx = math.inf, -1
+        cells, g = self._cells, self.g
+        for n_idx, move_cost in self._neighbors(idx):
+            cost = move_cost + cells[n_idx] + g[n_idx]
+            if cost < best_cost:
+                best_cost, best_idx = cost, n_idx
+        return best_cost, best_idx
+
+    def _update_vertex(self, idx):
+        if idx != self.goal:
+            self.rhs[idx] = self._best_successor(idx)[0]
+        self._open_keys.pop(idx, None)
+        if self.g[idx] != self.rhs[idx]:
+            self._push(idx)
+
+    def _compute_shortest_path(self):
+        heap, open_keys = self._heap, self._open_keys
+        g, rhs = self.g, self.rhs
+        while heap:
+            k1, k2, idx = heap[0]
+            if open_keys.get(idx) != (k1, k2):
+                heapq.heappop(heap)  # 已删除或已过期的条目
+                continue
+            start = self.start
+            if (k1, k2) >= self._calc_key(start) and rhs[start] == g[start]:
+                break
+
+            heapq.heappop(heap)
+            del open_keys[idx]
+            self.expanded += 1
+            new_key = self._calc_key(idx)
+            if (k1, k2) < new_key:
+                self._push(idx)
+            elif g[idx] > rhs[idx]:
+                g[idx] = rhs[idx]
+                for n_idx, _ in self._neighbors(idx):
+                    self._update_vertex(n_idx)
+            else:
+                g[idx] = math.inf
+                self._update_vertex(idx)
+                for n_idx, _ in self._neighbors(idx):
+                    self._update_vertex(n_idx)
+
+    def move_start(self, start):
+        """机器人移动到新的起点栅格"""
+        new_start = self._index(start)
+        if new_start != self.start:
+            self.km += self._heuristic(self.last_start, new_start)
+            self.last_start = new_start
+            self.start = new_start
+
+    def update_costmap(self, costmap):
+        """
+        与上次的代价地图比较, 只对发生变化的栅格更新受影响的边 (进入该栅格的所有边).
+        返回变化的栅格数量.
+        """
+        new_cells = costmap.ravel()
+        changed = np.flatnonzero(new_cells != self.cells)
+        if changed.size == 0:
+            return 0
+        self.cells[changed] = new_cells[changed]
+        affected = set()
+        for idx, value in zip(changed.tolist(), new_cells[changed].tolist()):
+            self._cells[idx] = value
+            affected.update(n_idx for n_idx, _ in self._neighbors(idx))
+        for idx in affected:
+            self._update_vertex(idx)
+        return int(changed.size)
+
+    def plan(self):
+        """
+        修复/计算当前起点到目标的最短路径.
+        返回 (path, cost): path 为 [(x, y), ...], 不可达时返回 (None, inf)
+        """
+        self._compute_shortest_path()
+        cost = self.rhs[self.start]
+        if cost == math.inf:
+            return None, math.inf
+
+        path = [self._cell(self.start)]
+        idx = self.start
+        for _ in range(self.width * self.height):
+            if idx == self.goal:
+                return path, cost
+            step_cost, idx = self._best_successor(idx)
+            if idx < 0 or step_cost == math.inf:
+                break
+            path.append(self._cell(idx))
+        return None, math.inf
+
+
+def window_graph(costmap):
+    """
+    把一块代价地图转换为有向8邻域稀疏图 (CSR), 边权 = 移动距离 + 目标栅格代价,
+    不可通行栅格没有入边. 节点编号为窗口内的扁平索引.
+    """
+    from scipy.sparse import csr_matrix
+
+    height, width = costmap.shape
+    flat_cost = costmap.ravel()
+    index = np.arange(height * width).reshape(height, width)
+    sources, targets, weights = [], [], []
+    for dx, dy, move_cost in NEIGHBORS_8:
+        y0, y1 = max(0, -dy), height - max(0, dy)
+        x0, x1 = max(0, -dx), width - max(0, dx)
+        src = index[y0:y1, x0:x1].ravel()
+        dst = index[y0 + dy:y1 + dy, x0 + dx:x1 + dx].ravel()
+        weight = move_cost + flat_cost[dst]
+        passable = np.isfinite(weight)
+        sources.append(src[passable])
+        targets.append(dst[passable])
+        weights.append(weight[passable])
+    return csr_matrix((np.concatenate(weights), (np.concatenate(sources), np.concatenate(targets))),
+                      shape=(height * width, height * width))
+
+
+class HierarchicalPlanner:
+    """
+    分层路径规划器 (HPA*, Botea et al., 2004).
+
+    把栅格地图划分为 cluster_size x cluster_size 的簇, 在相邻簇的公共边界上按可通行区段设置入口,
+    并预先计算每个簇内各入口之间的最短路径代价, 构成抽象图. 查询时先在抽象图上搜索,
+    再只对选中的抽象路径逐段做全分辨率A*细化. 代价地图变化时只重建被触及的簇
+    (以及与之共享边界的邻居簇的簇内边). 代价约定与 grid_astar 相同.
+    """
+
+    def __init__(self, costmap, cluster_size=20, max_entrance_width=6):
+        self.height, self.width = costmap.shape
+        self.cluster_size = cluster_size
+        self.max_entrance_width = max_entrance_width
+        self.cluster_cols = -(-self.width // cluster_size)
+        self.cluster_rows = -(-self.height // cluster_size)
+        self.costmap = costmap.copy()
+
+        self.borders = {}   # (簇a, 簇b) -> [(a侧栅格索引, b侧栅格索引), ...], a 在 b 的左侧或下方
+        self.intra = {}     # 簇 -> {入口: [(入口2, 代价), ...]}
+        self._inter = None  # 入口 -> [(相邻簇中的入口, 代价), ...], 边界变化后惰性重建
+
+        # 统计
+        self.rebuilt_clusters = 0
+        self.last_abstract_expanded = 0
+
+        num_clusters = self.cluster_cols * self.cluster_rows
+        for cid in range(num_clusters):
+            for neighbor in self._forward_neighbors(cid):
+                self._build_border(cid, neighbor)
+        for cid in range(num_clusters):
+            self._build_intra(cid)
+
+    # --- 簇几何 ---
+    def _cluster_of(self, x, y):
+        return (y // self.cluster_size) * self.cluster_cols + x // self.cluster_size
+
+    def _cluster_bounds(self, cid):
+        """返回簇的栅格范围 (x0, x1, y0, y1), 半开区间"""
+        cx, cy = cid % self.cluster_cols, cid // self.cluster_cols
+        x0, y0 = cx * self.cluster_size, cy * self.cluster_size
+        return x0, min(x0 + self.cluster_size, self.width), y0, min(y0 + self.cluster_size, self.height)
+
+    def _forward_neighbors(self, cid):
+        """右侧和上方的相邻簇 (每条边界只由其左/下侧的簇构建一次)"""
+        cx, cy = cid % self.cluster_cols, cid // self.cluster_cols
+        result = []
+        if cx + 1 < self.cluster_cols:
+            result.append(cid + 1)
+        if cy + 1 < self.cluster_rows:
+            result.append(cid + self.cluster_cols)
+        return result
+
+    def _all_neighbors(self, cid):
+        cx, cy = cid % self.cluster_cols, cid // self.cluster_cols
+        result = self._forward_neighbors(cid)
+        if cx > 0:
+            result.append(cid - 1)
+        if cy > 0:
+            result.append(cid - self.cluster_cols)
+        return result
+
+    # --- 抽象图构建 ---
+    def _build_border(self, a, b):
+        """在簇 a 与其右侧/上方簇 b 的公共边界上, 为每段两侧都可通行的区段设置入口"""
+        x0, x1, y0, y1 = self._cluster_bounds(a)
+        if b == a + 1:
+            along = np.arange(y0, y1)
+            side_a = along * self.width + (x1 - 1)
+            side_b = along * self.width + x1
+        else:
+            along = np.arange(x0, x1)
+            side_a = (y1 - 1) * self.width + along
+            side_b = y1 * self.width + along
+        flat_cost = self.costmap.ravel()
+        crossing_cost = flat_cost[side_a] + flat_cost[side_b]
+        passable = np.isfinite(crossing_cost)
+
+        transitions = []
+        run_start = None
+        for i in range(len(along) + 1):
+            if i < len(along) and passable[i]:
+                if run_start is None:
+                    run_start = i
+                continue
+            if run_start is not None:
+                # 区段按 max_entrance_width 分块, 每块在穿越代价最低处设一个入口 (靠墙的栅格代价高)
+                for chunk in range(run_start, i, self.max_entrance_width):
+                    chunk_end = min(chunk + self.max_entrance_width, i)
+                    k = chunk + int(np.argmin(crossing_cost[chunk:chunk_end]))
+                    transitions.append((int(side_a[k]), int(side_b[k])))
+                run_start = None
+        self.borders[(a, b)] = transitions
+        self._inter = None
+
+    def _entrances_of(self, cid):
+        nodes = set()
+        for neighbor in self._all_neighbors(cid):
+            key = (cid, neighbor) if neighbor > cid else (neighbor, cid)
+            side = 0 if neighbor > cid else 1
+            nodes.update(t[side] for t in self.borders.get(key, ()))
+        return sorted(nodes)
+
+    def _local_index(self, idx, bounds):
+        x0, x1, y0, _ = bounds
+        return (idx // self.width - y0) * (x1 - x0) + (idx % self.width - x0)
+
+    def _build_intra(self, cid):
+        """用簇内稀疏图的多源Dijkstra计算各入口之间的最短代价"""
+        from scipy.sparse.csgraph import dijkstra
+
+        nodes = self._entrances_of(cid)
+        self.rebuilt_clusters += 1
+        if len(nodes) < 2:
+            self.intra[cid] = {node: [] for node in nodes}
+            return
+        bounds = self._cluster_bounds(cid)
+        x0, x1, y0, y1 = bounds
+        graph = window_graph(self.costmap[y0:y1, x0:x1])
+        local = [self._local_index(n, bounds) for n in nodes]
+        dist = dijkstra(graph, directed=True, indices=local)
+
+        edges = {}
+        for i, node in enumerate(nodes):
+            edges[node] = [(other, float(dist[i, local[j]])) for j, other in enumerate(nodes)
+                           if j != i and np.isfinite(dist[i, local[j]])]
+        self.intra[cid] = edges
+
+    def _inter_edges(self):
+        if self._inter is None:
+            flat_cost = self.costmap.ravel()
+            inter = {}
+            for transitions in self.borders.values():
+                for a_idx, b_idx in transitions:
+                    inter.setdefault(a_idx, []).append((b_idx, 1.0 + float(flat_cost[b_idx])))
+                    inter.setdefault(b_idx, []).append((a_idx, 1.0 + float(flat_cost[a_idx])))
+            self._inter = inter
+        return self._inter
+
+    def update_costmap(self, costmap):
+        """只重建代价发生变化的簇的边界入口, 以及这些簇和其邻居的簇内边; 返回被触及的簇数"""
+        new_flat = costmap.ravel()
+        changed = np.flatnonzero(new_flat != self.costmap.ravel())
+        if changed.size == 0:
+            return 0
+        self.costmap.ravel()[changed] = new_flat[changed]
+
+        touched = set(np.unique(self._cluster_of(changed % self.width, changed // self.width)).tolist())
+        rebuild = set(touched)
+        for cid in touched:
+            for neighbor in self._all_neighbors(cid):
+                a, b = (cid, neighbor) if neighbor > cid else (neighbor, cid)
+                self._build_border(a, b)
+                rebuild.add(neighbor)
+        for cid in rebuild:
+            self._build_intra(cid)
+        return len(touched)
+
+    # --- 查询 ---
+    def _refine(self, start, goal, bounds):
+        """在给定簇窗口内用A*求 start -> goal 的全分辨率路径 (全局坐标)"""
+        x0, x1, y0, y1 = bounds
+        path, cost, _ = grid_astar(self.costmap[y0:y1, x0:x1], (start[0] - x0, start[1] - y0),
+                                   (goal[0] - x0, goal[1] - y0))
+        if path is None:
+            return None, math.inf
+        return [(x + x0, y + y0) for x, y in path], cost
+
+    def find_path(self, start, goal):
+        """返回 (path, cost); 抽象图上不可达时返回 (None, inf)"""
+        sx, sy = int(start[0]), int(start[1])
+        gx, gy = int(goal[0]), int(goal[1])
+        if not (0 <= gx < self.width and 0 <= gy < self.height) or self.costmap[gy, gx] == math.inf:
+            return None, math.inf
+        start_idx, goal_idx = sy * self.width + sx, gy * self.width + gx
+        start_cluster, goal_cluster = self._cluster_of(sx, sy), self._cluster_of(gx, gy)
+
+        # 同一簇内优先直接细化
+        if start_cluster == goal_cluster:
+            path, cost = self._refine((sx, sy), (gx, gy), self._cluster_bounds(start_cluster))
+            if path is not None:
+                return path, cost
+
+        # 把起点/终点临时接入抽象图
+        start_edges = self._connect(start_idx, start_cluster, outgoing=True)
+        goal_edges = self._connect(goal_idx, goal_cluster, outgoing=False)
+        abstract = self._abstract_search(start_idx, goal_idx, start_edges, goal_edges)
+        if abstract is None:
+            return None, math.inf
+
+        # 逐段细化: 同簇的相邻抽象节点用簇内A*连接, 跨簇的节点本身就是相邻栅格
+        path = [(sx, sy)]
+        total_cost = 0.0
+        flat_cost = self.costmap.ravel()
+        for u, v in zip(abstract, abstract[1:]):
+            ux, uy = u % self.width, u // self.width
+            vx, vy = v % self.width, v // self.width
+            cu, cv = self._cluster_of(ux, uy), self._cluster_of(vx, vy)
+            if cu != cv:
+                path.append((vx, vy))
+                total_cost += 1.0 + float(flat_cost[v])
+                continue
+            segment, cost = self._refine((ux, uy), (vx, vy), self._cluster_bounds(cu))
+            if segment is None:
+                return None, math.inf
+            path.extend(segment[1:])
+            total_cost += cost
+        return path, total_cost
+
+    def _connect(self, idx, cid, outgoing):
+        """起点到簇内各入口 (outgoing=True) 或各入口到终点 (outgoing=False) 的簇内最短代价"""
+        from scipy.sparse.csgraph import dijkstra
+
+        nodes = self._entrances_of(cid)
+        if not nodes:
+            return []
+        bounds = self._cluster_bounds(cid)
+        x0, x1, y0, y1 = bounds
+        graph = window_graph(self.costmap[y0:y1, x0:x1])
+        if not outgoing:
+            graph = graph.T.tocsr()  # 反向图上从终点出发 = 各入口到终点的代价
+        dist = dijkstra(graph, directed=True, indices=self._local_index(idx, bounds))
+        return [(node, float(dist[self._local_index(node, bounds)])) for node in nodes
+                if node != idx and np.isfinite(dist[self._local_index(node, bounds)])]
+
+    def _abstract_search(self, start_idx, goal_idx, start_edges, goal_edges):
+        """抽象图上的A* (八分距离启发), 返回抽象节点索引序列"""
+        inter = self._inter_edges()
+        to_goal = {node: cost for node, cost in goal_edges}
+        gx, gy = goal_idx % self.width, goal_idx // self.width
+
+        def heuristic(idx):
+            return octile_distance(idx % self.width, idx // self.width, gx, gy)
+
+        g_score = {start_idx: 0.0}
+        parent = {start_idx: None}
+        open_heap = [(heuristic(start_idx), start_idx)]
+        closed = set()
+        expanded = 0
+        while open_heap:
+            _, node = heapq.heappop(open_heap)
+            if node in closed:
+                continue
+            closed.add(node)
+            expanded += 1
+            if node == goal_idx:
+                break
+
+            cid = self._cluster_of(node % self.width, node // self.width)
+            edges = self.intra.get(cid, {}).get(node, []) + inter.get(node, [])
+            if node == start_idx:
+                edges = edges + start_edges
+            if node in to_goal:
+                edges = edges + [(goal_idx, to_goal[node])]
+
+            for other, cost in edges:
+                new_g = g_score[node] + cost
+                if other not in closed and new_g < g_score.get(other, math.inf):
+                    g_score[other] = new_g
+                    parent[other] = node
+                    heapq.heappush(open_heap, (new_g + heuristic(other), other))
+        self.last_abstract_expanded = expanded
+
+        if goal_idx not in closed:
+            return None
+        sequence = []
+        node = goal_idx
+        while node is not None:
+            sequence.append(node)
+            node = parent[node]
+        sequence.reverse()
+        return sequence
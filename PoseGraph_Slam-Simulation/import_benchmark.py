@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷启动/导入耗时基准测试
+
+每个测试项都在一个全新的Python子进程中运行 (冷启动), 重复多次后取中位数:
+  - 解释器空载启动 (基线)
+  - from new import PoseGraphSLAM
+  - import maze_slam_simulation (不绘图)
+  - import maze_slam_visual_new2 (不绘图)
+  - 启动 BluetoothApp/python_slam_bridge.py 直到其输出就绪信息
+并报告每个导入是否加载了 matplotlib / scipy.
+
+用法:
+    python import_benchmark.py --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPT_DIR)
+EXAMPLES_BEST_DIR = os.path.join(REPO_DIR, "examples", "best")
+BRIDGE_SCRIPT = os.path.join(REPO_DIR, "BluetoothApp", "python_slam_bridge.py")
+
+IMPORT_CASES = [
+    ("interpreter (baseline)", SCRIPT_DIR, "pass"),
+    ("from new import PoseGraphSLAM", SCRIPT_DIR, "from new import PoseGraphSLAM"),
+    ("import maze_slam_simulation", SCRIPT_DIR, "import maze_slam_simulation"),
+    ("import maze_slam_visual_new2", EXAMPLES_BEST_DIR, "import maze_slam_visual_new2"),
+]
+
+HEAVY_MODULES = ("matplotlib", "scipy")
+
+
+def _time_import(cwd, statement):
+    """在新的子进程中执行导入语句, 返回 (耗时秒, 已加载的重量级模块列表)"""
+    probe = (f"{statement}\n"
+             f"import sys\n"
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", probe], cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    loaded = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+    return elapsed, loaded
+
+
+def _time_bridge_launch():
+    """启动桥接脚本, 测量到其打印就绪信息的时间, 然后发送 STOP"""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-u", BRIDGE_SCRIPT], cwd=os.path.dirname(BRIDGE_SCRIPT),
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, encoding="utf-8")
+    ready_time = None
+    try:
+        for line in proc.stdout:
+            if "桥接已启动" in line:
+                ready_time = time.perf_counter() - start
+                break
+            if line.startswith("ERROR"):
+                raise RuntimeError(line.strip())
+        proc.stdin.write("STOP\n")
+        proc.stdin.flush()
+        proc.wait(timeout=10)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+    if ready_time is None:
+        raise RuntimeError("桥接脚本未输出就绪信息")
+    return ready_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模块冷启动耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数 (取中位数)")
+    args = parser.parse_args()
+
+    print(f"Python: {sys.executable}")
+    print(f"{'case':<36}{'median (ms)':>12}{'min (ms)':>10}  heavy modules loaded")
+    print("-" * 80)
+
+    for name, cwd, statement in IMPORT_CASES:
+        try:
+            samples = [_time_import(cwd, statement) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<36}{'failed':>12}  {e}")
+            continue
+        times = [t for t, _ in samples]
+        loaded = samples[-1][1] or "-"
+        print(f"{name:<36}{statistics.median(times) * 1000:>12.1f}{min(times) * 1000:>10.1f}  {loaded}")
+
+    try:
+        times = [_time_bridge_launch() for _ in range(args.repeat)]
+        print(f"{'python_slam_bridge.py launch':<36}{statistics.median(times) * 1000:>12.1f}"
+              f"{min(times) * 1000:>10.1f}")
+    except (RuntimeError, OSError) as e:
+        print(f"{'python_slam_bridge.py launch':<36}{'failed':>12}  {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,16 @@
 模拟小车在迷宫中缓慢移动并实时重建地图
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
 import math
-import time
 import json
-import matplotlib.patches as patches
-import queue
-from scipy.ndimage import distance_transform_edt
 from new import PoseGraphSLAM
+from sim_clock import SimulationClock
+from ray_traversal import free_cells
+from costmap_layer import IncrementalCostmap
+from frontier_tracker import FrontierTracker
+from grid_search import grid_astar, grid_dijkstra, reconstruct_path, DStarLite, HierarchicalPlanner
+from trajectory_buffer import TrajectoryBuffer
 from collections import deque
 from datetime import datetime
 import os
@@ -24,29 +25,50 @@ FAST_PLOT_MAX_MAP_POINTS = 5000      # SLAM点云最大绘制点数
 FAST_PLOT_MAX_TRAJ_POINTS = 2000     # 轨迹最大绘制点数
 FAST_PLOT_LIDAR_STRIDE = 2           # 雷达散点步长
 
-# --- Matplotlib 中文显示设置 ---
-import matplotlib
-import platform
-try:
-    # 新增：根据操作系统选择字体
-    os_system = platform.system()
-    if os_system == 'Darwin':  # macOS
-        font_name = 'Arial Unicode MS'
-    elif os_system == 'Windows':  # Windows
-        font_name = 'SimHei'
-    elif os_system == 'Linux':  # Linux
-        font_name = 'WenQuanYi Zen Hei'  # 一个常用的开源中文字体
-    else:
-        font_name = None
-    
-    if font_name:
-        matplotlib.rcParams['font.sans-serif'] = [font_name]
+# 里程计轨迹: 相邻保留点的最小间距(米)与最多保留的点数
+TRAJECTORY_MIN_STEP = 0.05
+TRAJECTORY_MAX_POINTS = 50000
+
+# 按种子扰动起始位姿时, 起始位置偏离地图起点的最大距离(米)
+START_JITTER_RADIUS = 0.15
 
-    matplotlib.rcParams['font.family']='sans-serif'
-    # 解决负号'-'显示为方块的问题
-    matplotlib.rcParams['axes.unicode_minus'] = False
-except Exception:
-    print("未能动态设置中文字体, 部分标签可能显示为方块。")
+# --- Matplotlib 延迟加载 ---
+# matplotlib 和中文字体只在第一次真正绘图时加载, 无头运行和只需要SLAM后端的调用方不承担GUI栈的导入开销
+plt = None
+
+def _configure_cjk_font(matplotlib):
+    """Matplotlib 中文显示设置"""
+    import platform
+    try:
+        # 新增：根据操作系统选择字体
+        os_system = platform.system()
+        if os_system == 'Darwin':  # macOS
+            font_name = 'Arial Unicode MS'
+        elif os_system == 'Windows':  # Windows
+            font_name = 'SimHei'
+        elif os_system == 'Linux':  # Linux
+            font_name = 'WenQuanYi Zen Hei'  # 一个常用的开源中文字体
+        else:
+            font_name = None
+        
+        if font_name:
+            matplotlib.rcParams['font.sans-serif'] = [font_name]
+
+        matplotlib.rcParams['font.family']='sans-serif'
+        # 解决负号'-'显示为方块的问题
+        matplotlib.rcParams['axes.unicode_minus'] = False
+    except Exception:
+        print("未能动态设置中文字体, 部分标签可能显示为方块。")
+
+def _get_pyplot():
+    """首次调用时导入 matplotlib.pyplot 并配置字体, 之后返回缓存的模块"""
+    global plt
+    if plt is None:
+        import matplotlib
+        import matplotlib.pyplot as pyplot
+        _configure_cjk_font(matplotlib)
+        plt = pyplot
+    return plt
 
 # --- 新增: 全局仿真运行状态标志 ---
 simulation_running = True
@@ -262,20 +284,22 @@ class MazeEnvironment:
 class RobotController:
     """机器人控制器 - 处理运动和导航"""
     
-    def __init__(self, start_x, start_y, start_theta=0.0, env=None):
+    def __init__(self, start_x, start_y, start_theta=0.0, env=None, clock=None):
         self.x = start_x
         self.y = start_y  
         self.theta = start_theta
         self.env = env # 引用环境以进行碰撞检测
+        # 所有计时判断都从仿真时钟读取; 未指定时使用实时时钟, 与墙钟一致
+        self.clock = clock if clock is not None else SimulationClock(realtime=True)
         
         # 运动参数 - 优化后的参数，提高速度但保持安全性
         self.linear_speed = 1.2  # 线速度 (m/s) - 提高速度
         self.angular_speed = 0.75   # 角速度 (rad/s) - 提高转向速度
          
         
-        # 轨迹
-        self.trajectory_x = [start_x]
-        self.trajectory_y = [start_y]
+        # 轨迹 (按距离抽稀、长度有界的数组缓冲区)
+        self.trajectory = TrajectoryBuffer(min_distance=TRAJECTORY_MIN_STEP, max_points=TRAJECTORY_MAX_POINTS)
+        self.trajectory.append((start_x, start_y))
         
         # --- 新增：最近的雷达扫描数据 ---
         self.recent_scans = deque(maxlen=10)
@@ -294,6 +318,26 @@ class RobotController:
         self.log_odds_min = -10 # 最小log-odds值
         self.log_odds_max = 10  # 最大log-odds值
 
+        # --- 增量地图统计 ---
+        # 占用: log_odds > 2.0 (概率 > 0.88); 空闲: log_odds < -2.0 (概率 < 0.12)
+        # 未知: 概率在 0.3-0.7 之间, 即 |log_odds| < log(0.7/0.3)
+        self.stats_occ_threshold = 2.0
+        self.stats_free_threshold = -2.0
+        self.stats_unknown_band = np.log(0.7 / 0.3)
+        # 每次扫描只根据被触及栅格的新旧值修正计数, 查询时为O(1)
+        self.map_stats = {'occupied': 0, 'free': 0, 'unknown': self.map_dim * self.map_dim}
+        # 用于显示的概率地图, 同样只更新被触及的栅格
+        self.prob_map = np.full((self.map_dim, self.map_dim), 0.5)
+
+        # --- 增量代价地图 ---
+        # 障碍物: log_odds > 0.8*log_odds_occ; 未知: |log_odds| < 0.1; 安全距离50cm
+        self.costmap_layer = IncrementalCostmap(self.map_dim, self.map_resolution,
+                                                occ_threshold=self.log_odds_occ * 0.8,
+                                                unknown_band=0.1, safe_dist_m=0.5)
+        # --- 增量前沿跟踪 ---
+        # 前沿点: 空闲 (log_odds < -0.5) 且8邻域内有未知栅格 (|log_odds| < 0.1)
+        self.frontier_tracker = FrontierTracker(self.map_dim, free_threshold=-0.5, unknown_band=0.1)
+
         # --- 高级任务状态机 ---
         self.mission_phase = "EXPLORING_MAZE" # EXPLORING_MAZE, RETURNING_TO_START, GOING_TO_EXIT, MISSION_COMPLETE
 
@@ -302,6 +346,11 @@ class RobotController:
         self.current_path = []
         self.current_target = None
         self.path_step = 0
+        # 路径跟随期间的 D* Lite 增量重规划器, 以及当前路径对应的代价地图版本
+        self.path_replanner = None
+        self._path_costmap_version = None
+        # 返回起点/前往出口等长距离任务使用的分层规划器 (HPA*), 首次使用时构建
+        self.hierarchical_planner = None
         self.exploration_percentage = 0.0
 
         # --- 新增: 扫描无效率 ---
@@ -311,90 +360,85 @@ class RobotController:
         # --- 新增: 出口检测 ---
         self.exit_pose = None # 存储(x, y, theta)
         self.exit_confirmation_target = None # 存储世界坐标(x,y)
-        self.last_frontier_discovery = time.time()  # 记录最后发现前沿点的时间
-        self.last_movement_time = time.time()  # 记录最后移动时间
+        self.last_frontier_discovery = self.clock.now()  # 记录最后发现前沿点的时间
+        self.last_movement_time = self.clock.now()  # 记录最后移动时间
         
         # --- 新增: 避免重复访问机制 ---
         self.visited_positions = set()  # 记录已访问的网格位置
         self.visited_frontiers = set()  # 记录已访问的前沿点
         self.exploration_history = deque(maxlen=50)  # 探索历史记录（减少内存占用）
 
-    def _bresenham_line(self, x0, y0, x1, y1):
-        """Bresenham's line algorithm. 返回线段上的所有点。"""
-        dx = abs(x1 - x0)
-        dy = -abs(y1 - y0)
-        sx = 1 if x0 < x1 else -1
-        sy = 1 if y0 < y1 else -1
-        err = dx + dy
-        points = []
-        while True:
-            points.append((x0, y0))
-            if x0 == x1 and y0 == y1:
-                break
-            e2 = 2 * err
-            if e2 >= dy:
-                err += dy
-                x0 += sx
-            if e2 <= dx:
-                err += dx
-                y0 += sy
-        return points
+    @property
+    def trajectory_x(self):
+        return self.trajectory.x
+
+    @property
+    def trajectory_y(self):
+        return self.trajectory.y
 
     def update_occupancy_grid(self, pose, scan_distances):
         """根据当前位姿和原始激光扫描更新占据栅格地图"""
         robot_x, robot_y, robot_theta = pose
-        robot_x_grid = int(robot_x / self.map_resolution)
-        robot_y_grid = int(robot_y / self.map_resolution)
 
-        R = np.array([[math.cos(robot_theta), -math.sin(robot_theta)],
-                      [math.sin(robot_theta),  math.cos(robot_theta)]])
-        
-        angles = np.linspace(0, 2*np.pi, len(scan_distances), endpoint=False)
+        dists_mm = np.asarray(scan_distances, dtype=float)
+        angles = np.linspace(0, 2*np.pi, len(dists_mm), endpoint=False)
         max_dist_mm = 3990
 
-        for angle, dist_mm in zip(angles, scan_distances):
-            if dist_mm <= 10:
-                continue
+        valid = dists_mm > 10
+        dists_mm = dists_mm[valid]
+        angles = angles[valid]
+
+        # 一次性计算所有激光端点的世界坐标和栅格坐标
+        dist_m = dists_mm / 1000.0
+        world_angles = robot_theta + angles
+        px = robot_x + dist_m * np.cos(world_angles)
+        py = robot_y + dist_m * np.sin(world_angles)
+        px_grid = (px / self.map_resolution).astype(np.int64)
+        py_grid = (py / self.map_resolution).astype(np.int64)
+
+        # 批量求出所有射线经过的栅格 (剔除各自的端点栅格), 用 np.add.at 累加空闲更新
+        # 同一栅格被多条射线经过时会累加多次, 与逐条射线更新的结果一致
+        cells_x, cells_y = free_cells(robot_x, robot_y, world_angles, dist_m, self.map_resolution,
+                                      px_grid, py_grid)
+        flat_map = self.log_odds_map.reshape(-1)
+        in_map = (cells_x >= 0) & (cells_x < self.map_dim) & (cells_y >= 0) & (cells_y < self.map_dim)
+        free_idx = cells_y[in_map] * self.map_dim + cells_x[in_map]
+
+        # 端点: 命中墙壁则为占用, 达到最大量程则同样为空闲
+        in_map = (px_grid >= 0) & (px_grid < self.map_dim) & (py_grid >= 0) & (py_grid < self.map_dim)
+        end_idx = py_grid[in_map] * self.map_dim + px_grid[in_map]
+        end_updates = np.where(dists_mm < max_dist_mm, self.log_odds_occ, self.log_odds_free)[in_map]
+
+        # 只有被触及的栅格会改变, 记录它们更新前的值以便增量修正统计
+        touched = np.unique(np.concatenate([free_idx, end_idx]))
+        before = flat_map[touched]
+
+        np.add.at(flat_map, free_idx, self.log_odds_free)
+        np.add.at(flat_map, end_idx, end_updates)
+
+        # Clip values (仅限被触及的栅格)
+        after = np.clip(flat_map[touched], self.log_odds_min, self.log_odds_max)
+        flat_map[touched] = after
+        self.prob_map.reshape(-1)[touched] = 1 - 1 / (1 + np.exp(after))
+        self._update_map_stats(before, after)
+
+        # 只有障碍物/未知分类发生变化的栅格才会影响代价地图
+        layer = self.costmap_layer
+        changed = ((before > layer.occ_threshold) != (after > layer.occ_threshold)) | \
+                  ((np.abs(before) < layer.unknown_band) != (np.abs(after) < layer.unknown_band))
+        changed_rows, changed_cols = np.divmod(touched[changed], self.map_dim)
+        layer.mark_dirty(changed_cols, changed_rows)
+
+        # 空闲/未知分类发生变化的栅格交给前沿跟踪器, 下次查询时只重算这些区域
+        tracker = self.frontier_tracker
+        changed = ((before < tracker.free_threshold) != (after < tracker.free_threshold)) | \
+                  ((np.abs(before) < tracker.unknown_band) != (np.abs(after) < tracker.unknown_band))
+        changed_rows, changed_cols = np.divmod(touched[changed], self.map_dim)
+        tracker.mark_dirty(changed_cols, changed_rows)
 
-            dist_m = dist_mm / 1000.0
-            
-            # Laser endpoint in robot frame
-            laser_x_robot = dist_m * np.cos(angle)
-            laser_y_robot = dist_m * np.sin(angle)
-            
-            # Laser endpoint in world frame
-            world_point = (R @ np.array([laser_x_robot, laser_y_robot])) + np.array([robot_x, robot_y])
-            px, py = world_point
-            px_grid = int(px / self.map_resolution)
-            py_grid = int(py / self.map_resolution)
-
-            # Get cells along the ray
-            ray_cells = self._bresenham_line(robot_x_grid, robot_y_grid, px_grid, py_grid)
-
-            # Update free space along the ray (excluding the endpoint)
-            for cell_x, cell_y in ray_cells[:-1]:
-                if 0 <= cell_x < self.map_dim and 0 <= cell_y < self.map_dim:
-                    self.log_odds_map[cell_y, cell_x] += self.log_odds_free
-            
-            # Update endpoint: occupied if hit, free if max range
-            if 0 <= px_grid < self.map_dim and 0 <= py_grid < self.map_dim:
-                if dist_mm < max_dist_mm:
-                    # Hit a wall
-                    self.log_odds_map[py_grid, px_grid] += self.log_odds_occ
-                else:
-                    # Reached max range, this cell is also free
-                    self.log_odds_map[py_grid, px_grid] += self.log_odds_free
-
-        # Clip values
-        np.clip(self.log_odds_map, self.log_odds_min, self.log_odds_max, out=self.log_odds_map)
-        
         # 更新探索百分比 - 改进算法
         # 使用更合理的阈值来判断已知区域
-        # 占用区域：log_odds > 2.0 (对应概率 > 0.88)
-        # 空闲区域：log_odds < -2.0 (对应概率 < 0.12)
-        occupied_cells = np.sum(self.log_odds_map > 2.0)
-        free_cells = np.sum(self.log_odds_map < -2.0)
-        known_cells = occupied_cells + free_cells
+        known_cells = self.map_stats['occupied'] + self.map_stats['free']
         
         # 计算实际探索区域的比例
         # 方法1：基于整个地图网格（原始方法）
@@ -427,108 +471,42 @@ class RobotController:
         # 限制在合理范围内，避免异常值
         self.exploration_percentage = min(self.exploration_percentage, 1.0)
 
-    def _create_pathfinding_costmap(self):
-        """使用距离变换创建用于A*规划的成本地图"""
-        # 1. 创建二值障碍物图
-        occ_mask = self.log_odds_map > self.log_odds_occ * 0.8
-        
-        # 2. 计算到最近障碍物的距离
-        # distance_transform_edt计算的是到最近的0的距离, 所以先反转mask
-        dist_transform = distance_transform_edt(np.logical_not(occ_mask))
+    def _classify_cells(self, values):
+        """统计一组log-odds值中 (占用, 空闲, 未知) 栅格的数量"""
+        occupied = np.count_nonzero(values > self.stats_occ_threshold)
+        free = np.count_nonzero(values < self.stats_free_threshold)
+        unknown = np.count_nonzero(np.abs(values) < self.stats_unknown_band)
+        return occupied, free, unknown
+
+    def _update_map_stats(self, before, after):
+        """根据被触及栅格更新前后的log-odds值修正运行中的地图统计"""
+        old_counts = self._classify_cells(before)
+        new_counts = self._classify_cells(after)
+        for key, old, new in zip(('occupied', 'free', 'unknown'), old_counts, new_counts):
+            self.map_stats[key] += int(new - old)
+
+    def get_map_stats(self):
+        """O(1) 返回当前地图统计: 各类栅格数量及占比"""
+        total = self.map_dim * self.map_dim
+        stats = dict(self.map_stats)
+        stats['total'] = total
+        stats['known'] = stats['occupied'] + stats['free']
+        stats['unknown_ratio'] = stats['unknown'] / total
+        stats['known_ratio'] = stats['known'] / total
+        return stats
 
-        # 3. 将距离转换为成本
-        # 我们希望离障碍物越近, 成本越高
-        # 定义一个安全距离, 超过此距离则成本很低
-        safe_dist_cells = 0.5 / self.map_resolution # 50cm
-        
-        # 将距离归一化, 并裁剪
-        dist_transform = np.clip(dist_transform, 0, safe_dist_cells)
-        
-        # 成本与距离成反比, 并用平方增加惩罚力度
-        costmap = (safe_dist_cells - dist_transform)**2
-        
-        # 4. 对未知区域施加一个适中的成本，允许通过但不太鼓励
-        unknown_mask = np.abs(self.log_odds_map) < 0.1
-        costmap[unknown_mask] = 50  # 降低未知区域成本，从1000降到50
-        
-        # 5. 障碍物区域成本为无穷大
-        costmap[occ_mask] = float('inf')
-        
-        # --- 新增: 区域惩罚逻辑 ---
-        # 如果已找到出口并且仍在探索迷宫，则对外围区域施加高成本
-        if self.mission_phase == "EXPLORING_MAZE" and self.exit_pose is not None:
-            exit_x, exit_y, exit_theta = self.exit_pose
-            
-            # 创建坐标网格
-            x_coords = (np.arange(self.map_dim) + 0.5) * self.map_resolution
-            y_coords = (np.arange(self.map_dim) + 0.5) * self.map_resolution
-            grid_x, grid_y = np.meshgrid(x_coords, y_coords)
-            
-            # 计算出口方向的法向量
-            nx, ny = math.cos(exit_theta), math.sin(exit_theta)
-            
-            # 计算所有点在出口方向上的投影
-            # 点(px, py)在出口外侧的条件是: (px-ex, py-ey) 与 (nx, ny)的点积为正
-            projection = (grid_x - exit_x) * nx + (grid_y - exit_y) * ny
-            
-            # 定义一个缓冲区，避免把出口本身也惩罚了
-            outside_mask = projection > -0.5  # 0.5米缓冲区
-            
-            # 施加高昂的成本，但不覆盖已有障碍物
-            costmap[outside_mask & (costmap != float('inf'))] += 10000
-        
-        return costmap
+    def _create_pathfinding_costmap(self):
+        """
+        获取用于A*规划的成本地图 (基于距离变换).
+        由增量代价地图层维护, 只重算占据栅格更新过的区域; 返回值只读.
+        """
+        # 如果已找到出口并且仍在探索迷宫，则对出口外侧区域施加高成本
+        exit_pose = self.exit_pose if self.mission_phase == "EXPLORING_MAZE" else None
+        return self.costmap_layer.get(self.log_odds_map, exit_pose)
 
     def _find_frontier_clusters(self, min_cluster_size=5):
-        """寻找并聚类前沿点, 返回每个簇的质心和大小"""
-        map_free = self.log_odds_map < -0.5
-        map_unknown = np.abs(self.log_odds_map) < 0.1
-        
-        frontiers = set()
-        # 找出所有前沿点
-        free_indices_rows, free_indices_cols = np.where(map_free)
-        for r, c in zip(free_indices_rows, free_indices_cols):
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    if dr == 0 and dc == 0: continue
-                    nr, nc = r + dr, c + dc
-                    if 0 <= nr < self.map_dim and 0 <= nc < self.map_dim:
-                        if map_unknown[nr, nc]:
-                            frontiers.add((c, r)) # (x, y) grid coordinates
-                            break
-                else: continue
-                break
-        
-        # 聚类
-        clusters = []
-        visited = set()
-        for fx, fy in frontiers:
-            if (fx, fy) in visited:
-                continue
-            
-            new_cluster = []
-            q = [(fx, fy)]
-            visited.add((fx, fy))
-            
-            head = 0
-            while head < len(q):
-                cx, cy = q[head]
-                head += 1
-                new_cluster.append((cx, cy))
-                
-                for dx in [-1, 0, 1]:
-                    for dy in [-1, 0, 1]:
-                        if dx == 0 and dy == 0: continue
-                        nx, ny = cx + dx, cy + dy
-                        if (nx, ny) in frontiers and (nx, ny) not in visited:
-                            visited.add((nx, ny))
-                            q.append((nx, ny))
-            
-            if len(new_cluster) >= min_cluster_size:
-                centroid = np.mean(new_cluster, axis=0)
-                clusters.append({'centroid': tuple(np.int32(centroid)), 'points': new_cluster})
-
-        return clusters
+        """寻找并聚类前沿点, 返回每个簇的质心和大小 (由增量前沿跟踪器只重算最近变化的区域)"""
+        return self.frontier_tracker.get_clusters(self.log_odds_map, min_cluster_size)
 
     def _is_exploration_truly_complete(self):
         """智能判断探索是否真正完成 - 基于SLAM和雷达扫描结果"""
@@ -558,7 +536,7 @@ class RobotController:
         
         # 4. 检查是否在最近一段时间内没有发现新的前沿点
         if hasattr(self, 'last_frontier_discovery'):
-            time_since_last_frontier = time.time() - self.last_frontier_discovery
+            time_since_last_frontier = self.clock.now() - self.last_frontier_discovery
             if time_since_last_frontier < 30:  # 如果30秒内还在发现前沿点，继续探索
                 print(f"最近还在发现前沿点 ({time_since_last_frontier:.1f}秒前)，继续探索。")
                 return False
@@ -617,76 +595,27 @@ class RobotController:
                 self.y < margin or self.y > self.env.max_y - margin)
     
     def _calculate_unknown_ratio(self):
-        """计算地图中未知区域的比例"""
-        # 将log-odds转换为概率
-        prob_map = 1 - 1 / (1 + np.exp(self.log_odds_map))
-        # 未知区域：概率在0.3-0.7之间
-        unknown_mask = (prob_map > 0.3) & (prob_map < 0.7)
-        total_cells = prob_map.size
-        unknown_cells = np.sum(unknown_mask)
-        return unknown_cells / total_cells if total_cells > 0 else 0.0
+        """计算地图中未知区域的比例 (未知区域：概率在0.3-0.7之间), 直接读取增量统计"""
+        return self.get_map_stats()['unknown_ratio']
 
     def _a_star_pathfinding(self, start_grid, goal_grid, costmap):
-        """优化的A* 路径规划算法 (使用预计算的成本地图)"""
-        # 添加最大搜索步数限制，防止无限搜索
-        MAX_SEARCH_STEPS = 1000
-        search_steps = 0
-        
-        q = queue.PriorityQueue()
-        q.put((0, start_grid))
-        
-        came_from = {start_grid: None}
-        cost_so_far = {start_grid: 0}
-
-        while not q.empty() and search_steps < MAX_SEARCH_STEPS:
-            _, current = q.get()
-            search_steps += 1
-            
-            if current == goal_grid:
-                break
-            
-            # 探索邻居 (8个方向)
-            for dc, dr in [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]:
-                neighbor = (current[0] + dc, current[1] + dr)
-                
-                # 边界检查
-                if not (0 <= neighbor[0] < self.map_dim and 0 <= neighbor[1] < self.map_dim):
-                    continue
-
-                # 从成本地图中直接获取单元格成本
-                cell_cost = costmap[neighbor[1], neighbor[0]]
-
-                if cell_cost == float('inf'):
-                    continue
-
-                # 移动成本：直线为1, 对角线为sqrt(2)
-                move_cost = 1.0 if dc == 0 or dr == 0 else math.sqrt(2)
-                
-                # 新的总成本 = 已有成本 + 移动成本 + 目标单元格成本
-                new_cost = cost_so_far[current] + move_cost + cell_cost
-                
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    # 启发函数：使用曼哈顿距离，计算更快
-                    h = abs(goal_grid[0] - neighbor[0]) + abs(goal_grid[1] - neighbor[1])
-                    priority = new_cost + h
-                    q.put((priority, neighbor))
-                    came_from[neighbor] = current
-        else: # 如果循环正常结束 (没有break)，说明没找到路径
-            return None, float('inf')
-            
-        # 重建路径
-        path = []
-        current = goal_grid
-        while current is not None:
-            path.append(current)
-            current = came_from.get(current)
-        path.reverse()
-
-        path_cost = cost_so_far.get(goal_grid, float('inf'))
-        
-        # 确保路径有效
-        return (path, path_cost) if path[0] == start_grid else (None, float('inf'))
+        """A* 路径规划算法 (使用预计算的成本地图, 八分距离启发, 不限制搜索步数)"""
+        path, path_cost, _ = grid_astar(costmap, start_grid, goal_grid)
+        return (path, path_cost) if path else (None, float('inf'))
+
+    def _hierarchical_pathfinding(self, start_grid, goal_grid, costmap):
+        """
+        长距离路径规划 (HPA*): 在簇抽象图上搜索后只细化选中的路径.
+        代价地图变化时只重建被触及的簇; 抽象图上找不到路径时退回全分辨率A*.
+        """
+        if self.hierarchical_planner is None:
+            self.hierarchical_planner = HierarchicalPlanner(costmap)
+        else:
+            self.hierarchical_planner.update_costmap(costmap)
+        path, path_cost = self.hierarchical_planner.find_path(start_grid, goal_grid)
+        if path is None:
+            return self._a_star_pathfinding(start_grid, goal_grid, costmap)
+        return path, path_cost
 
     def explore_step(self, dt):
         """基于前沿探索的移动决策状态机 - 升级版"""
@@ -744,7 +673,7 @@ class RobotController:
         
         # 更新移动时间（如果有实际移动）
         if abs(forward_speed) > 0.1 or abs(turn_rate) > 0.1:
-            self.last_movement_time = time.time()
+            self.last_movement_time = self.clock.now()
 
     def _state_confirming_exit(self):
         """状态: 确认出口"""
@@ -790,7 +719,7 @@ class RobotController:
             return self._go_to_goal_controller(return_target_x, return_target_y)
 
     def _state_find_target(self):
-        """状态: 使用A*成本寻找最佳前沿点，避免重复访问"""
+        """状态: 使用路径成本 (单源多目标Dijkstra) 寻找最佳前沿点，避免重复访问"""
         print("寻找最佳前沿点 (基于A*路径成本，避免重复访问)...")
         frontier_clusters = self._find_frontier_clusters()
 
@@ -807,7 +736,7 @@ class RobotController:
             return
         
         # 更新前沿发现时间
-        self.last_frontier_discovery = time.time()
+        self.last_frontier_discovery = self.clock.now()
 
         pathfinding_costmap = self._create_pathfinding_costmap()
         robot_grid_pos = (int(self.x / self.map_resolution), int(self.y / self.map_resolution))
@@ -846,14 +775,23 @@ class RobotController:
                 self.exploration_state = "FIND_TARGET"
             return
 
+        # 一次Dijkstra搜索得到到所有候选前沿点的路径成本, 代替对每个前沿点单独运行A*
+        targets = [cluster['centroid'] for cluster in available_clusters]
+        g_score, parent, _ = grid_dijkstra(pathfinding_costmap, robot_grid_pos, targets)
+        best_idx = None
         for cluster in available_clusters:
             target_grid = cluster['centroid']
-            path, cost = self._a_star_pathfinding(robot_grid_pos, target_grid, pathfinding_costmap)
-            if path and cost < min_cost:
-                min_cost = cost
-                best_path = path
+            if not (0 <= target_grid[0] < self.map_dim and 0 <= target_grid[1] < self.map_dim):
+                continue
+            target_idx = int(target_grid[1]) * self.map_dim + int(target_grid[0])
+            cost = g_score[target_idx]
+            if cost < min_cost:
+                min_cost = float(cost)
+                best_idx = target_idx
                 best_cluster = cluster
                 self.current_target = target_grid
+        if best_idx is not None:
+            best_path = reconstruct_path(parent, self.map_dim, best_idx)
         
         # 如果A*无法找到路径，尝试使用简化的路径规划
         if not best_path and available_clusters:
@@ -881,9 +819,8 @@ class RobotController:
             print(f"新目标: {self.current_target}, A*成本: {min_cost:.1f}, 路径长度: {len(best_path)}")
             # 标记这个前沿点为已访问
             self.visited_frontiers.add(self.current_target)
-            self.current_path = best_path
+            self._set_current_path(best_path)
             self.exploration_state = "FOLLOW_PATH"
-            self.path_step = 1
         else:
             print("警告：找不到通往任何有效前沿点的路径。")
             # 更智能的探索完成判断
@@ -920,8 +857,8 @@ class RobotController:
             if self.mission_phase == "EXPLORING_MAZE":
                 # 添加短暂延迟，避免频繁重新规划
                 if not hasattr(self, '_path_completion_time'):
-                    self._path_completion_time = time.time()
-                elif time.time() - self._path_completion_time > 0.5:  # 0.5秒延迟
+                    self._path_completion_time = self.clock.now()
+                elif self.clock.now() - self._path_completion_time > 0.5:  # 0.5秒延迟
                     self.exploration_state = "FIND_TARGET"
                     delattr(self, '_path_completion_time')
             else:
@@ -929,6 +866,15 @@ class RobotController:
                 self.current_path = []
             return 0.0, 0.0
         
+        # 地图在关键帧更新后, 用 D* Lite 增量修复剩余路径, 而不是回到 FIND_TARGET 从头规划
+        if self._path_costmap_version != self.costmap_layer.version and not self._repair_current_path():
+            print("地图更新后当前目标已不可达，重新寻找目标...")
+            self.current_path = []
+            self.path_step = 0
+            if self.mission_phase == "EXPLORING_MAZE":
+                self.exploration_state = "FIND_TARGET"
+            return 0.0, 0.0
+
         # 检查前方是否有障碍物
         if self._is_path_blocked():
             print("检测到路径被障碍物阻挡，执行回退...")
@@ -947,6 +893,36 @@ class RobotController:
         
         return self._go_to_goal_controller(target_x, target_y)
 
+    def _set_current_path(self, path):
+        """采用一条新规划的路径; 目标改变时丢弃旧的增量规划器状态"""
+        if self.path_replanner is not None and self.path_replanner.goal_cell != tuple(path[-1]):
+            self.path_replanner = None
+        self.current_path = path
+        self.path_step = 1
+        self._path_costmap_version = self.costmap_layer.version
+
+    def _repair_current_path(self):
+        """代价地图变化后用 D* Lite 修复从当前位置到路径终点的路径, 返回是否仍然可达"""
+        costmap = self._create_pathfinding_costmap()
+        robot_grid_pos = (int(self.x / self.map_resolution), int(self.y / self.map_resolution))
+        goal_grid = tuple(self.current_path[-1])
+        self._path_costmap_version = self.costmap_layer.version
+
+        if self.path_replanner is None or self.path_replanner.goal_cell != goal_grid:
+            # 首次修复: 建立搜索状态, 之后的修复只处理变化的栅格
+            self.path_replanner = DStarLite(costmap, robot_grid_pos, goal_grid)
+        else:
+            self.path_replanner.update_costmap(costmap)
+            self.path_replanner.move_start(robot_grid_pos)
+
+        path, _ = self.path_replanner.plan()
+        if path is None:
+            self.path_replanner = None
+            return False
+        self.current_path = path
+        self.path_step = min(1, len(path) - 1)
+        return True
+
     def _is_path_blocked(self):
         """检查前方路径是否被障碍物阻挡"""
         if not self.recent_scans:
@@ -1074,11 +1050,10 @@ class RobotController:
             # 使用未惩罚的成本地图进行最终路径规划
             costmap = self._create_pathfinding_costmap()
             
-            path, cost = self._a_star_pathfinding(robot_grid_pos, goal_grid_pos, costmap)
+            path, cost = self._hierarchical_pathfinding(robot_grid_pos, goal_grid_pos, costmap)
             
             if path and len(path) > 1:
-                self.current_path = path
-                self.path_step = 1
+                self._set_current_path(path)
             else:
                 print(f"警告: 无法规划到目标 {goal_world_pos} 的路径！任务中止。")
                 self.mission_phase = "MISSION_COMPLETE" # 无法规划，任务失败
@@ -1130,11 +1105,11 @@ class RobotController:
         self.visited_positions.add(current_grid)
         self.exploration_history.append((self.x, self.y, self.theta))
         
-        self.trajectory_x.append(self.x)
-        self.trajectory_y.append(self.y)
+        self.trajectory.append((self.x, self.y))
 
 def create_visualization():
     """创建可视化界面 - 学术展示风格"""
+    plt = _get_pyplot()
     # 设置学术风格的matplotlib参数
     plt.style.use('seaborn-v0_8-whitegrid')  # 使用学术风格
     plt.rcParams['font.family'] = 'serif'
@@ -1174,6 +1149,7 @@ def create_visualization():
 
 def update_visualization(axes, env, robot, slam, step_count, final=False):
     """更新可视化显示 - 学术展示风格"""
+    plt = _get_pyplot()
     axes = axes.flatten()
     for ax in axes:
         ax.clear()
@@ -1184,7 +1160,8 @@ def update_visualization(axes, env, robot, slam, step_count, final=False):
     ax1 = axes[0]
     for seg in env.segments:
         ax1.plot([seg["start"][0], seg["end"][0]], [seg["start"][1], seg["end"][1]], 'k-', linewidth=2.5, label='Maze Boundary')
-    ax1.plot(robot.trajectory_x, robot.trajectory_y, 'b-', linewidth=2, alpha=0.8, label='Odometry Trajectory')
+    traj = robot.trajectory.downsample(FAST_PLOT_MAX_TRAJ_POINTS) if FAST_PLOT else robot.trajectory.points
+    ax1.plot(traj[:, 0], traj[:, 1], 'b-', linewidth=2, alpha=0.8, label='Odometry Trajectory')
     ax1.plot(robot.x, robot.y, 'ro', markersize=10, label='True Position', markeredgecolor='darkred', markeredgewidth=1)
     
     # 绘制出口
@@ -1234,9 +1211,8 @@ def update_visualization(axes, env, robot, slam, step_count, final=False):
     
     # --- 子图3: 机器人感知的地图 ---
     ax3 = axes[2]
-    # 将log-odds转换为概率值 (0-1) 以便显示
-    prob_map = 1 - 1 / (1 + np.exp(robot.log_odds_map))
-    im = ax3.imshow(prob_map, cmap='gray_r', origin='lower', 
+    # 概率地图 (0-1) 由机器人在更新栅格时增量维护
+    im = ax3.imshow(robot.prob_map, cmap='gray_r', origin='lower', 
                extent=[0, robot.map_size_m, 0, robot.map_size_m], alpha=0.8)
     
     # 在地图上绘制机器人当前位置
@@ -1267,8 +1243,9 @@ def update_visualization(axes, env, robot, slam, step_count, final=False):
     ax3.set_xlim(-1, env.max_x + 1)
     ax3.set_ylim(-1, env.max_y + 1)
     ax3.set_aspect('equal')
+    map_stats = robot.get_map_stats()
     ax3.grid(True, alpha=0.4, linestyle='--')
-    ax3.set_title(f"Mission: {robot.mission_phase} | State: {robot.exploration_state}\n(Exploration: {robot.exploration_percentage:.1%})", fontsize=12, fontweight='bold')
+    ax3.set_title(f"Mission: {robot.mission_phase} | State: {robot.exploration_state}\n(Exploration: {robot.exploration_percentage:.1%} | Unknown: {map_stats['unknown_ratio']:.1%})", fontsize=12, fontweight='bold')
     ax3.legend(loc='upper right', framealpha=0.9)
     ax3.set_xlabel('X (m)', fontsize=10)
     ax3.set_ylabel('Y (m)', fontsize=10)
@@ -1303,8 +1280,31 @@ def update_visualization(axes, env, robot, slam, step_count, final=False):
     plt.tight_layout(pad=2.0)  # 增加子图间距
     plt.pause(0.01)  # 增加暂停时间，减少CPU占用
 
-def main(map_file):
-    """主函数"""
+def jittered_start_pose(env, seed, radius=START_JITTER_RADIUS):
+    """
+    由种子确定的起始位姿扰动: 在起点周围 radius 米内均匀取一个不在 (膨胀后的) 障碍物中的位置,
+    朝向在 [-pi, pi) 内均匀取值. 仿真本身是确定性的, 种子只通过这里影响一次运行.
+    """
+    rng = np.random.default_rng(seed)
+    start_x, start_y = env.start_point
+    theta = float(rng.uniform(-np.pi, np.pi))
+    for _ in range(100):
+        r = radius * math.sqrt(rng.uniform())
+        a = rng.uniform(-np.pi, np.pi)
+        x, y = start_x + r * math.cos(a), start_y + r * math.sin(a)
+        if not env.is_occupied(x, y):
+            return float(x), float(y), theta
+    return float(start_x), float(start_y), theta
+
+def run_simulation(map_file, realtime=True, dt=0.02, max_steps=25000, visualize=True, seed=None):
+    """
+    运行一次完整的探索+SLAM仿真, 返回本次运行的统计信息
+    :param realtime: True则按墙钟节拍实时运行(演示), False则以固定步长尽可能快地运行
+    :param dt: 仿真控制周期 (秒)
+    :param max_steps: 最大仿真步数
+    :param visualize: False则完全不创建matplotlib图形 (无头模式)
+    :param seed: None则从地图起点、朝向0出发; 否则按种子扰动起始位姿 (见 jittered_start_pose)
+    """
     global simulation_running # 允许在函数内修改全局变量
     simulation_running = True # 重置标志，以防多次运行
 
@@ -1315,7 +1315,12 @@ def main(map_file):
     # 初始化环境和机器人
 
     env = MazeEnvironment(map_file)
-    robot = RobotController(env.start_point[0], env.start_point[1], env=env)
+    clock = SimulationClock(dt=dt, realtime=realtime)
+    if seed is None:
+        start_x, start_y, start_theta = env.start_point[0], env.start_point[1], 0.0
+    else:
+        start_x, start_y, start_theta = jittered_start_pose(env, seed)
+    robot = RobotController(start_x, start_y, start_theta, env=env, clock=clock)
     
     # 初始化SLAM
     slam = PoseGraphSLAM()
@@ -1332,15 +1337,16 @@ def main(map_file):
     robot.recent_scans.append(initial_scan) # 保存第一次扫描
     
     # 初始化可视化
-    fig, axes = create_visualization()
-    fig.canvas.mpl_connect('close_event', on_window_close) # 绑定关闭事件
+    fig, axes = None, None
+    if visualize:
+        fig, axes = create_visualization()
+        fig.canvas.mpl_connect('close_event', on_window_close) # 绑定关闭事件
     
     # 仿真参数 - 优化后的参数
     step_count = 0
-    last_time = time.time()
     last_odom_pose = np.array(initial_pose)
+    loop_closure_count = 0
     
-    max_steps = 25000
     KEYFRAME_INTERVAL_STEPS = 100 # 每100步创建一个关键帧（减少频率）
     LOOP_CLOSURE_SEARCH_RADIUS = 2.0 # 米
     ICP_MAX_ERROR = 0.5
@@ -1357,117 +1363,117 @@ def main(map_file):
     print("提示：如果程序无响应，请按 Ctrl+C 强制终止")
     
     # 性能监控变量
-    last_performance_check = time.time()
+    last_performance_check = clock.wall_elapsed()
     performance_counter = 0
-    last_activity_time = time.time()  # 记录最后活动时间
+    last_activity_time = clock.wall_elapsed()  # 记录最后活动时间
     max_idle_time = 300  # 最大空闲时间（5分钟）
     
+    loop_start_wall = clock.wall_elapsed()
     try:
         while step_count < max_steps and robot.mission_phase != "MISSION_COMPLETE" and simulation_running:
-            current_time = time.time()
-            dt = current_time - last_time
+            # 由仿真时钟推进: 固定步长模式下不等待, 实时模式下按墙钟节拍运行
+            dt = clock.tick()
+            current_time = clock.wall_elapsed()
+
+            # 机器人自主探索
+            robot.explore_step(dt)
             
-            if dt >= 0.02: # 提高决策频率，减少延迟
-                # 机器人自主探索
-                robot.explore_step(dt)
+            step_count += 1
+            performance_counter += 1
+            last_activity_time = current_time  # 更新活动时间
+
+            # 每1000步输出性能信息
+            if performance_counter % 1000 == 0:
+                elapsed = current_time - last_performance_check
+                fps = 1000 / elapsed if elapsed > 0 else 0
+                print(f"性能监控: 步数={step_count}, FPS={fps:.1f}, 探索度={robot.exploration_percentage:.1%}")
+                last_performance_check = current_time
                 
-                step_count += 1
-                last_time = current_time
-                performance_counter += 1
-                last_activity_time = current_time  # 更新活动时间
-
-                # 每1000步输出性能信息
-                if performance_counter % 1000 == 0:
-                    elapsed = current_time - last_performance_check
-                    fps = 1000 / elapsed if elapsed > 0 else 0
-                    print(f"性能监控: 步数={step_count}, FPS={fps:.1f}, 探索度={robot.exploration_percentage:.1%}")
-                    last_performance_check = current_time
+            # 检查是否长时间无活动
+            if current_time - last_activity_time > max_idle_time:
+                print(f"\n警告：程序已空闲超过{max_idle_time}秒，可能存在死锁。")
+                print("建议按 'q' 键或关闭窗口终止程序。")
+                last_activity_time = current_time  # 重置计时器
+
+            # 手动检查探索是否完成(作为备用方案)
+            if robot.mission_phase == "EXPLORING_MAZE" and robot.exploration_percentage > EXPLORATION_FINISH_THRESHOLD:
+                print(f"\n探索度达到 {robot.exploration_percentage:.1%}, 超过阈值 {EXPLORATION_FINISH_THRESHOLD:.1%}.")
+                print("强制进入下一阶段：返回起点。")
+                robot.mission_phase = "RETURNING_TO_START"
+            
+            # 优化：大幅减少扫描无效率计算频率
+            if step_count % 20 == 0:  # 每20步计算一次，大幅减少计算负载
+                try:
+                    scan_for_metric = env.simulate_lidar(robot.x, robot.y, robot.theta)
+                    inefficient_rays = np.sum(np.array(scan_for_metric) >= 3990)
+                    total_rays = len(scan_for_metric)
+                    robot.scan_inefficiency = inefficient_rays / total_rays if total_rays > 0 else 0
+                    robot.inefficiency_history.append(robot.scan_inefficiency)
+                    robot.recent_scans.append(scan_for_metric)
+                except Exception as e:
+                    print(f"扫描计算错误: {e}")
+            
+            if step_count % KEYFRAME_INTERVAL_STEPS == 0:
+                print(f"\n--- 步数: {step_count}, 添加关键帧 ---")
+                try:
+                    # 1. 添加新节点 (使用当前的真实位置作为里程计读数)
+                    current_pose = np.array([robot.x, robot.y, robot.theta])
+                    current_scan = env.simulate_lidar(robot.x, robot.y, robot.theta)
+                    current_points = scan_to_points(current_scan)
+                    current_node_id = slam.add_node(current_pose, current_points)
+
+                    # 更新机器人的占据栅格地图
+                    robot.update_occupancy_grid(current_pose, current_scan)
+                    robot.recent_scans.append(current_scan)
+
+                    # 2. 添加里程计约束
+                    dx = current_pose[0] - last_odom_pose[0]
+                    dy = current_pose[1] - last_odom_pose[1]
+                    dtheta = current_pose[2] - last_odom_pose[2]
+                    # 将dx, dy转换到上一个关键帧的坐标系下
+                    prev_theta = last_odom_pose[2]
+                    odom_dx_local = dx * math.cos(-prev_theta) - dy * math.sin(-prev_theta)
+                    odom_dy_local = dx * math.sin(-prev_theta) + dy * math.cos(-prev_theta)
                     
-                # 检查是否长时间无活动
-                if current_time - last_activity_time > max_idle_time:
-                    print(f"\n警告：程序已空闲超过{max_idle_time}秒，可能存在死锁。")
-                    print("建议按 'q' 键或关闭窗口终止程序。")
-                    last_activity_time = current_time  # 重置计时器
-
-                # 手动检查探索是否完成(作为备用方案)
-                if robot.mission_phase == "EXPLORING_MAZE" and robot.exploration_percentage > EXPLORATION_FINISH_THRESHOLD:
-                    print(f"\n探索度达到 {robot.exploration_percentage:.1%}, 超过阈值 {EXPLORATION_FINISH_THRESHOLD:.1%}.")
-                    print("强制进入下一阶段：返回起点。")
-                    robot.mission_phase = "RETURNING_TO_START"
-                
-                # 优化：大幅减少扫描无效率计算频率
-                if step_count % 20 == 0:  # 每20步计算一次，大幅减少计算负载
-                    try:
-                        scan_for_metric = env.simulate_lidar(robot.x, robot.y, robot.theta)
-                        inefficient_rays = np.sum(np.array(scan_for_metric) >= 3990)
-                        total_rays = len(scan_for_metric)
-                        robot.scan_inefficiency = inefficient_rays / total_rays if total_rays > 0 else 0
-                        robot.inefficiency_history.append(robot.scan_inefficiency)
-                        robot.recent_scans.append(scan_for_metric)
-                    except Exception as e:
-                        print(f"扫描计算错误: {e}")
-                
-                if step_count % KEYFRAME_INTERVAL_STEPS == 0:
-                    print(f"\n--- 步数: {step_count}, 添加关键帧 ---")
-                    try:
-                        # 1. 添加新节点 (使用当前的真实位置作为里程计读数)
-                        current_pose = np.array([robot.x, robot.y, robot.theta])
-                        current_scan = env.simulate_lidar(robot.x, robot.y, robot.theta)
-                        current_points = scan_to_points(current_scan)
-                        current_node_id = slam.add_node(current_pose, current_points)
-
-                        # 更新机器人的占据栅格地图
-                        robot.update_occupancy_grid(current_pose, current_scan)
-                        robot.recent_scans.append(current_scan)
-
-                        # 2. 添加里程计约束
-                        dx = current_pose[0] - last_odom_pose[0]
-                        dy = current_pose[1] - last_odom_pose[1]
-                        dtheta = current_pose[2] - last_odom_pose[2]
-                        # 将dx, dy转换到上一个关键帧的坐标系下
-                        prev_theta = last_odom_pose[2]
-                        odom_dx_local = dx * math.cos(-prev_theta) - dy * math.sin(-prev_theta)
-                        odom_dy_local = dx * math.sin(-prev_theta) + dy * math.cos(-prev_theta)
+                    odom_measurement = np.array([odom_dx_local, odom_dy_local, dtheta])
+                    slam.add_edge(current_node_id - 1, current_node_id, odom_measurement, odom_info)
+                    last_odom_pose = current_pose
+                    
+                    # 3. 优化的回环检测 - 大幅限制搜索范围
+                    max_loop_closure_nodes = min(10, len(slam.nodes) - 1)  # 最多检查10个最近的节点（减少一半）
+                    for old_node_id in range(max(0, len(slam.nodes) - max_loop_closure_nodes), len(slam.nodes) - 1):
+                        old_pose = slam.nodes[old_node_id]
                         
-                        odom_measurement = np.array([odom_dx_local, odom_dy_local, dtheta])
-                        slam.add_edge(current_node_id - 1, current_node_id, odom_measurement, odom_info)
-                        last_odom_pose = current_pose
+                        # 不与最近的几个节点进行匹配，避免错误的短期回环
+                        if abs(current_node_id - old_node_id) < 10:
+                            continue
                         
-                        # 3. 优化的回环检测 - 大幅限制搜索范围
-                        max_loop_closure_nodes = min(10, len(slam.nodes) - 1)  # 最多检查10个最近的节点（减少一半）
-                        for old_node_id in range(max(0, len(slam.nodes) - max_loop_closure_nodes), len(slam.nodes) - 1):
-                            old_pose = slam.nodes[old_node_id]
-                            
-                            # 不与最近的几个节点进行匹配，避免错误的短期回环
-                            if abs(current_node_id - old_node_id) < 10:
-                                continue
+                        dist = np.linalg.norm(current_pose[:2] - np.array(old_pose[:2]))
+                        
+                        if dist < LOOP_CLOSURE_SEARCH_RADIUS:
+                            print(f"发现邻近节点: {old_node_id} 和 {current_node_id}, 距离: {dist:.2f}m")
+                            old_points = slam.keyframes[old_node_id]
                             
-                            dist = np.linalg.norm(current_pose[:2] - np.array(old_pose[:2]))
+                            R, T, error = _icp_matching(old_points, current_points)
                             
-                            if dist < LOOP_CLOSURE_SEARCH_RADIUS:
-                                print(f"发现邻近节点: {old_node_id} 和 {current_node_id}, 距离: {dist:.2f}m")
-                                old_points = slam.keyframes[old_node_id]
-                                
-                                R, T, error = _icp_matching(old_points, current_points)
-                                
-                                print(f"  ICP匹配误差: {error:.4f}")
-                                if error < ICP_MAX_ERROR:
-                                    print(f"  >>> 回环检测成功！ {old_node_id} <--> {current_node_id} <<<")
-                                    loop_measurement = np.array([T[0], T[1], math.atan2(R[1, 0], R[0, 0])])
-                                    slam.add_edge(old_node_id, current_node_id, loop_measurement, loop_info)
-                    except Exception as e:
-                        print(f"关键帧处理错误: {e}")
-                    
-                if step_count % VISUALIZATION_INTERVAL == 0:
-                    try:
-                        update_visualization(axes, env, robot, slam, step_count)
-                    except Exception as e:
-                        print(f"可视化更新错误: {e}")
-            
-            time.sleep(0.005)  # 减少睡眠时间，提高响应速度
+                            print(f"  ICP匹配误差: {error:.4f}")
+                            if error < ICP_MAX_ERROR:
+                                print(f"  >>> 回环检测成功！ {old_node_id} <--> {current_node_id} <<<")
+                                loop_measurement = np.array([T[0], T[1], math.atan2(R[1, 0], R[0, 0])])
+                                slam.add_edge(old_node_id, current_node_id, loop_measurement, loop_info)
+                                loop_closure_count += 1
+                except Exception as e:
+                    print(f"关键帧处理错误: {e}")
+                
+            if visualize and step_count % VISUALIZATION_INTERVAL == 0:
+                try:
+                    update_visualization(axes, env, robot, slam, step_count)
+                except Exception as e:
+                    print(f"可视化更新错误: {e}")
             
     except KeyboardInterrupt:
         print("\n仿真被用户中断")
+    loop_wall_time = clock.wall_elapsed() - loop_start_wall
     
     # 最终检查，如果因为步数耗尽而停止，但有出口，也标记为完成
     if robot.exit_pose and robot.mission_phase != "MISSION_COMPLETE":
@@ -1476,11 +1482,33 @@ def main(map_file):
 
     print(f"\n任务完成！总步数: {step_count}")
     
+    stats = {
+        'map': os.path.basename(map_file),
+        'start_x': start_x,
+        'start_y': start_y,
+        'start_theta': start_theta,
+        'total_steps': step_count,
+        'sim_time': clock.now(),
+        'wall_time': loop_wall_time,
+        'steps_per_s': step_count / loop_wall_time if loop_wall_time > 0 else 0.0,
+        'coverage': robot.exploration_percentage,
+        'keyframes': len(slam.nodes),
+        'loop_closures': loop_closure_count,
+        'optimization_time': 0.0,
+        'mission_phase': robot.mission_phase,
+        'exit_found': robot.exit_pose is not None,
+    }
+
     if simulation_running: # 仅在仿真正常完成时执行优化和显示最终结果
         # 最后执行一次全局优化
         print("正在执行最终的全局优化...")
+        opt_start = clock.wall_elapsed()
         slam.optimize_graph()
+        stats['optimization_time'] = clock.wall_elapsed() - opt_start
         
+        if not visualize:
+            return stats
+
         # 显示最终结果
         print("仿真结束。您可以查看最终结果。关闭绘图窗口即可退出。")
         update_visualization(axes, env, robot, slam, step_count, final=True) 
@@ -1497,14 +1525,31 @@ def main(map_file):
         except Exception as e:
             print(f"保存结果图失败: {e}")
 
+        plt = _get_pyplot()
         plt.ioff()
         plt.show() # 阻塞，直到用户关闭窗口
     else:
         print("仿真被用户提前终止。")
+    return stats
+
+def run_headless(map_file, dt=0.02, max_steps=25000, seed=None):
+    """无头模式入口: 固定步长全速运行, 不创建任何图形, 返回统计信息"""
+    return run_simulation(map_file, realtime=False, dt=dt, max_steps=max_steps, visualize=False, seed=seed)
+
+def main(map_file, realtime=True, dt=0.02):
+    """主函数 (带可视化)"""
+    run_simulation(map_file, realtime=realtime, dt=dt, visualize=True)
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--map", type=str, default="map_information.json", help="地图文件路径")
+    parser.add_argument("--fast", action="store_true", help="固定步长模式, 不等待墙钟, 以最快速度仿真")
+    parser.add_argument("--dt", type=float, default=0.02, help="仿真控制周期 (秒)")
+    parser.add_argument("--headless", action="store_true", help="无头模式: 不创建图形, 结束后输出统计信息")
+    parser.add_argument("--seed", type=int, default=None, help="无头模式: 按种子扰动起始位姿 (默认不扰动)")
     args = parser.parse_args()
-    main(args.map)
+    if args.headless:
+        print(json.dumps(run_headless(args.map, dt=args.dt, seed=args.seed), ensure_ascii=False, indent=2))
+    else:
+        main(args.map, realtime=not args.fast, dt=args.dt)
@@ -120,10 +120,10 @@ class PoseGraphSLAM:
                 p1_indices = np.arange(3 * from_idx, 3 * from_idx + 3)
                 p2_indices = np.arange(3 * to_idx, 3 * to_idx + 3)
 
-                H[p1_indices, p1_indices] += J_i.T @ edge.information @ J_i
-                H[p1_indices, p2_indices] += J_i.T @ edge.information @ J_j
-                H[p2_indices, p1_indices] += J_j.T @ edge.information @ J_i
-                H[p2_indices, p2_indices] += J_j.T @ edge.information @ J_j
+                H[np.ix_(p1_indices, p1_indices)] += J_i.T @ edge.information @ J_i
+                H[np.ix_(p1_indices, p2_indices)] += J_i.T @ edge.information @ J_j
+                H[np.ix_(p2_indices, p1_indices)] += J_j.T @ edge.information @ J_i
+                H[np.ix_(p2_indices, p2_indices)] += J_j.T @ edge.information @ J_j
 
                 b[p1_indices] += (J_i.T @ edge.information @ error)
                 b[p2_indices] += (J_j.T @ edge.information @ error)
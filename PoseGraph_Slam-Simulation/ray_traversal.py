@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+射线栅格遍历 - 向量化地求一批射线从起点到端点穿过的所有栅格 (Amanatides-Woo)
+
+射线每穿过一条竖直栅格线 x = k, 就进入 x 方向的下一个栅格, 此时的 y 栅格由交点处的 y 坐标决定;
+水平栅格线同理. 因此 "起点栅格 + 每个栅格线交点进入的栅格" 恰好是射线经过的全部栅格,
+不需要对交点排序, 一批射线可以一次性用数组运算求出.
+
+端点所在栅格 (命中的障碍物或量程末端) 不算空闲, 会从结果中剔除. 仓库中基于栅格的建图
+(maze_slam_simulation 的占据栅格, examples/best 的全局地图) 都用这里的 free_cells, 端点规则只有一处.
+"""
+
+import numpy as np
+
+
+def _line_crossings(g0, span):
+    """
+    每条射线 (栅格单位的起点 g0, 跨度 span) 穿过的整数栅格线,
+    返回 (射线序号, 交点参数 t∈(0,1], 越过该栅格线后所在的栅格)
+    """
+    first = np.floor(g0)
+    count = np.abs(np.floor(g0 + span) - first).astype(np.int64)
+    ray = np.repeat(np.arange(len(span)), count)
+    j = np.arange(len(ray)) - np.repeat(np.cumsum(count) - count, count)
+    forward = span[ray] > 0
+    line = np.where(forward, first[ray] + j + 1, first[ray] - j)
+    entered = np.where(forward, line, line - 1).astype(np.int64)
+    return ray, (line - g0[ray]) / span[ray], entered
+
+
+def _cell_after(coord, span):
+    """坐标恰好落在栅格线上时, 取沿射线方向 (span 的符号) 越过该线之后的栅格"""
+    return np.where(span < 0, np.ceil(coord) - 1, np.floor(coord))
+
+
+def free_cells(origin_x, origin_y, angles, ranges, resolution, end_x=None, end_y=None):
+    """
+    返回从世界坐标 (origin_x, origin_y) 出发, 沿给定世界系角度 (弧度) 和长度 (米) 的所有射线
+    所经过的空闲栅格 (不含端点所在栅格), 栅格 (i, j) 覆盖 [i*resolution, (i+1)*resolution).
+    结果为两个扁平的整数数组 (cells_x, cells_y), 不做地图范围裁剪.
+
+    命中点可能因舍入与 起点+长度*方向 落在相邻栅格; 传入每条射线的端点栅格 end_x, end_y 时
+    会把它们也从该射线的空闲栅格中剔除 (取 -1 等地图外的值表示不额外剔除).
+    """
+    angles = np.asarray(angles, dtype=float)
+    ranges = np.asarray(ranges, dtype=float)
+    n = len(ranges)
+    gx0 = np.full(n, origin_x / resolution)
+    gy0 = np.full(n, origin_y / resolution)
+    span_x = ranges * np.cos(angles) / resolution
+    span_y = ranges * np.sin(angles) / resolution
+
+    # 越过竖直栅格线时 x 栅格由交点的编号确定, y 栅格取交点的 y 坐标; 水平栅格线反之;
+    # 恰好穿过栅格角点时两条线的交点重合, 按前进方向取整保证进入的是对角的那个栅格
+    ray_x, t_x, entered_x = _line_crossings(gx0, span_x)
+    ray_y, t_y, entered_y = _line_crossings(gy0, span_y)
+    rays = np.arange(n)
+    ray = np.concatenate((rays, ray_x, ray_y))
+    cross_x = _cell_after(gx0[ray_y] + t_y * span_x[ray_y], span_x[ray_y])
+    cross_y = _cell_after(gy0[ray_x] + t_x * span_y[ray_x], span_y[ray_x])
+    cells_x = np.concatenate((np.floor(gx0), entered_x, cross_x)).astype(np.int64)
+    cells_y = np.concatenate((np.floor(gy0), cross_y, entered_y)).astype(np.int64)
+
+    # 射线不会离开端点栅格后再回来, 剔除端点栅格即剔除了最后进入的那个栅格
+    last_x = np.floor(gx0 + span_x).astype(np.int64)
+    last_y = np.floor(gy0 + span_y).astype(np.int64)
+    keep = (cells_x != last_x[ray]) | (cells_y != last_y[ray])
+    if end_x is not None:
+        keep &= (cells_x != np.asarray(end_x)[ray]) | (cells_y != np.asarray(end_y)[ray])
+    return cells_x[keep], cells_y[keep]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+仿真时钟模块 - 为仿真主循环和机器人控制器提供统一的时间来源
+"""
+
+import time
+
+
+class SimulationClock:
+    """
+    仿真时钟.
+
+    - 固定步长模式 (realtime=False): 每次 tick() 仿真时间前进固定 dt, 不做任何等待,
+      仿真以CPU允许的最快速度运行, 且结果与墙钟时间无关(可复现).
+    - 实时模式 (realtime=True): tick() 会等待至少 dt 的墙钟时间, 并以实际经过的时间推进,
+      用于需要实时观看的演示.
+    """
+
+    def __init__(self, dt=0.02, realtime=False):
+        if dt <= 0:
+            raise ValueError("dt 必须为正数")
+        self.dt = dt
+        self.realtime = realtime
+        self.step_count = 0
+        self._sim_time = 0.0
+        self._wall_start = time.perf_counter()
+        self._last_tick_wall = self._wall_start
+
+    def now(self):
+        """当前仿真时间 (秒)"""
+        if self.realtime:
+            return time.perf_counter() - self._wall_start
+        return self._sim_time
+
+    def tick(self):
+        """推进一个控制周期, 返回本周期的 dt (秒)"""
+        if self.realtime:
+            remaining = self.dt - (time.perf_counter() - self._last_tick_wall)
+            if remaining > 0:
+                time.sleep(remaining)
+            current = time.perf_counter()
+            step_dt = current - self._last_tick_wall
+            self._last_tick_wall = current
+            self._sim_time = current - self._wall_start
+        else:
+            step_dt = self.dt
+            self._sim_time += step_dt
+        self.step_count += 1
+        return step_dt
+
+    def wall_elapsed(self):
+        """自时钟创建以来经过的墙钟时间 (秒), 用于性能统计"""
+        return time.perf_counter() - self._wall_start
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+射线栅格遍历测试: free_cells 要覆盖射线穿过的每个栅格, 不能包含射线自己的端点栅格,
+也不能越过真实命中点; 恰好穿过栅格角点的射线也不能漏格
+
+运行: python -m pytest test_ray_traversal.py  (或直接 python test_ray_traversal.py)
+"""
+
+import numpy as np
+
+from ray_traversal import free_cells
+
+RESOLUTION = 0.1
+MAX_RANGE = 4.0
+NUM_RAYS = 360
+
+
+def _random_scans(num_poses, seed=0):
+    """随机位姿 + 360线随机量程, 产出 (x, y, 世界系角度, 量程, 端点栅格x, 端点栅格y)"""
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, NUM_RAYS, endpoint=False)
+    for _ in range(num_poses):
+        x, y = rng.uniform(5.0, 15.0, size=2)
+        world_angles = rng.uniform(-np.pi, np.pi) + angles
+        ranges = rng.uniform(0.05, MAX_RANGE, size=NUM_RAYS)
+        end_x = np.floor((x + ranges * np.cos(world_angles)) / RESOLUTION).astype(np.int64)
+        end_y = np.floor((y + ranges * np.sin(world_angles)) / RESOLUTION).astype(np.int64)
+        yield x, y, world_angles, ranges, end_x, end_y
+
+
+def _dense_cells(x, y, angle, distance):
+    """密集采样得到射线经过的栅格 (不含端点栅格)"""
+    d = np.linspace(0.0, distance, 20000)
+    cells_x = np.floor((x + d * np.cos(angle)) / RESOLUTION).astype(np.int64)
+    cells_y = np.floor((y + d * np.sin(angle)) / RESOLUTION).astype(np.int64)
+    return set(zip(cells_x.tolist(), cells_y.tolist())) - {(cells_x[-1], cells_y[-1])}
+
+
+def test_rays_do_not_skip_cells():
+    for x, y, world_angles, ranges, _, _ in _random_scans(3):
+        cells_x, cells_y = free_cells(x, y, world_angles, ranges, RESOLUTION)
+        got = set(zip(cells_x.tolist(), cells_y.tolist()))
+        for i in range(0, NUM_RAYS, 4):
+            assert _dense_cells(x, y, world_angles[i], ranges[i]) <= got
+
+
+def test_no_ray_frees_its_own_endpoint():
+    for x, y, world_angles, ranges, end_x, end_y in _random_scans(50):
+        for i in range(NUM_RAYS):
+            cells_x, cells_y = free_cells(x, y, world_angles[i:i + 1], ranges[i:i + 1], RESOLUTION,
+                                          end_x[i:i + 1], end_y[i:i + 1])
+            assert not np.any((cells_x == end_x[i]) & (cells_y == end_y[i]))
+
+
+def test_free_cells_do_not_run_past_hit():
+    """每个空闲栅格离起点最近的点都不能比命中点更远"""
+    for x, y, world_angles, ranges, _, _ in _random_scans(20, seed=1):
+        for i in range(NUM_RAYS):
+            cells_x, cells_y = free_cells(x, y, world_angles[i:i + 1], ranges[i:i + 1], RESOLUTION)
+            near_x = np.clip(x, cells_x * RESOLUTION, (cells_x + 1) * RESOLUTION)
+            near_y = np.clip(y, cells_y * RESOLUTION, (cells_y + 1) * RESOLUTION)
+            nearest = np.hypot(near_x - x, near_y - y)
+            assert np.all(nearest <= ranges[i] + 1e-9), (x, y, world_angles[i], ranges[i])
+
+
+def test_diagonal_through_corners():
+    """从栅格角点出发的 ±45° 射线只经过对角线上的栅格, 每个都要取到"""
+    for sx in (1, -1):
+        for sy in (1, -1):
+            cells_x, cells_y = free_cells(1.0, 1.0, [np.arctan2(sy, sx)], [0.5 * np.sqrt(2)], 1.0)
+            got = set(zip(cells_x.tolist(), cells_y.tolist()))
+            expected = {(min(1 + sx * k, 1 + sx * (k + 1)), min(1 + sy * k, 1 + sy * (k + 1))) for k in range(2)}
+            # 0.5√2 落在第一个对角栅格内: 它是端点栅格, 不算空闲
+            assert not got & expected
+            cells_x, cells_y = free_cells(1.0, 1.0, [np.arctan2(sy, sx)], [2.5 * np.sqrt(2)], 1.0)
+            got = set(zip(cells_x.tolist(), cells_y.tolist()))
+            assert expected <= got
+
+
+if __name__ == "__main__":
+    test_rays_do_not_skip_cells()
+    test_no_ray_frees_its_own_endpoint()
+    test_free_cells_do_not_run_past_hit()
+    test_diagonal_through_corners()
+    print("ok")
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+起始位姿扰动测试: 同一种子结果相同, 不同种子结果不同, 扰动后的起点在半径内且不在障碍物中
+
+运行: python -m pytest test_start_jitter.py  (或直接 python test_start_jitter.py)
+"""
+
+import contextlib
+import io
+import math
+import os
+
+from maze_slam_simulation import START_JITTER_RADIUS, MazeEnvironment, jittered_start_pose
+
+MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "1.json")
+
+
+def test_start_pose_depends_on_seed():
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = MazeEnvironment(MAP_FILE)
+    poses = [jittered_start_pose(env, seed) for seed in range(10)]
+    assert jittered_start_pose(env, 3) == poses[3]
+    assert len(set(poses)) == len(poses)
+    start_x, start_y = env.start_point
+    for x, y, theta in poses:
+        assert math.hypot(x - start_x, y - start_y) <= START_JITTER_RADIUS + 1e-12
+        assert not env.is_occupied(x, y)
+        assert -math.pi <= theta < math.pi
+
+
+if __name__ == "__main__":
+    test_start_pose_depends_on_seed()
+    print("ok")
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+轨迹缓冲区测试: 抽稀时覆盖末尾临时点, 超出上限后成块丢弃旧点且全局序号不变,
+since()/sync() 增量读取与完整轨迹一致
+
+运行: python -m pytest test_trajectory_buffer.py  (或直接 python test_trajectory_buffer.py)
+"""
+
+import numpy as np
+
+from trajectory_buffer import TrajectoryBuffer
+
+
+def test_decimation_overwrites_pending_tail():
+    traj = TrajectoryBuffer(min_distance=0.1)
+    assert traj.append((0.0, 0.0))
+    assert traj.append((0.03, 0.0))          # 距上一个保留点不足 0.1: 成为临时点
+    assert not traj.append((0.06, 0.0))      # 覆盖临时点
+    assert len(traj) == 2 and traj[-1] == (0.06, 0.0)
+    assert not traj.append((0.15, 0.0))      # 离开抽稀半径: 临时点转为保留点
+    assert traj.append((0.17, 0.0))
+    assert [p[0] for p in traj] == [0.0, 0.15, 0.17]
+    assert traj.end == 3
+
+
+def test_cap_evicts_oldest_and_keeps_global_indices():
+    traj = TrajectoryBuffer(max_points=8, capacity=2)
+    for i in range(20):
+        traj.append((float(i), 0.0))
+    assert len(traj) <= 8 and traj.end == 20
+    assert traj.first == traj.end - len(traj)
+    # 保留的是最新的点, 序号 k 的点就是第 k 次追加的点
+    assert traj.x.tolist() == [float(k) for k in range(traj.first, 20)]
+    points, end = traj.since(0)              # 早于已丢弃部分的序号从最旧保留点开始
+    assert end == 20 and points[0, 0] == traj.first
+    points, end = traj.since(18)
+    assert points[:, 0].tolist() == [18.0, 19.0] and end == 20
+    assert len(traj.since(end)[0]) == 0
+
+
+def test_sync_replays_into_identical_copy():
+    """接收端按 sync() 的约定合并增量后, 与缓冲区内容逐点一致"""
+    rng = np.random.default_rng(0)
+    traj = TrajectoryBuffer(min_distance=0.05, max_points=50)
+    client, client_first = [], 0             # 接收端: 序号从 client_first 开始的点
+    cursor = None
+    position = np.zeros(2)
+    for step in range(400):
+        position = position + rng.normal(scale=0.03, size=2)
+        traj.append(position)
+        if step % 7 == 0:
+            first, start, points, cursor = traj.sync(cursor)
+            client = client[max(first - client_first, 0):start - client_first] if client else []
+            client_first = first
+            client.extend(points.tolist())
+            assert np.allclose(client, traj.points)
+    # cursor=None 时为完整轨迹
+    first, start, points, _ = traj.sync()
+    assert start == first == traj.first and np.array_equal(points, traj.points)
+
+
+if __name__ == "__main__":
+    test_decimation_overwrites_pending_tail()
+    test_cap_evicts_oldest_and_keeps_global_indices()
+    test_sync_replays_into_identical_copy()
+    print("ok")
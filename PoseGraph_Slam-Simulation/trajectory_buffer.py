@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+轨迹缓冲区 - 用预分配、可增长的 numpy 数组存放轨迹点, 取代逐步追加的 Python 列表
+
+- 容量不足时按2倍扩容, 追加为均摊 O(1), 读取整条轨迹是零拷贝视图.
+- 可选的按距离抽稀: 与上一个保留点距离小于 min_distance 的新点只覆盖末尾的"临时点",
+  因此末尾始终是最新位置, 原地打转/停车时轨迹不再增长.
+- 可选的长度上限 max_points: 超出后成块丢弃最旧的点, 内存有界.
+- 点带有全局序号(从0开始, 丢弃旧点后也不重排), since(k) 可廉价取出序号 >= k 的点,
+  供增量推送/增量绘制使用.
+"""
+
+import numpy as np
+
+
+class TrajectoryBuffer:
+    """
+    有界的数组轨迹缓冲区.
+
+    用法:
+        traj = TrajectoryBuffer(dims=2, min_distance=0.05, max_points=20000)
+        traj.append((x, y))
+        traj.points                      # (n, dims) 只读视图
+        traj.x, traj.y                   # 各列视图, 可直接传给 ax.plot
+        traj[-1]                         # 最新的点 (tuple)
+        new_points, k = traj.since(k)    # 上次读取之后新增/改动的点
+        first, start, pts, k = traj.sync(k)  # 带重同步信息的增量, 见 sync()
+    """
+
+    def __init__(self, dims=2, capacity=256, min_distance=0.0, max_points=None, dtype=float):
+        if max_points is not None and max_points < 2:
+            raise ValueError("max_points 至少为2")
+        self.dims = dims
+        self.min_distance = min_distance
+        self.max_points = max_points
+        self._data = np.empty((max(capacity, 2), dims), dtype=dtype)
+        self._size = 0
+        self._start = 0          # 第一个保留点的全局序号
+        self._tail_pending = False   # 末尾是否为可被覆盖的临时点(距上一个保留点不足 min_distance)
+
+    # ---- 写入 ----
+    def append(self, point):
+        """追加一个点; 返回 True 表示新增了一个点, False 表示只覆盖了末尾的临时点"""
+        point = np.asarray(point, dtype=self._data.dtype)
+        if self.min_distance > 0 and self._size:
+            anchor = self._data[self._size - 2] if self._tail_pending else self._data[self._size - 1]
+            close = np.hypot(*(point[:2] - anchor[:2])) < self.min_distance
+            if self._tail_pending:
+                # 覆盖临时点; 离开抽稀半径后它转为保留点
+                self._data[self._size - 1] = point
+                self._tail_pending = close
+                return False
+            if close:
+                self._push(point)
+                self._tail_pending = True
+                return True
+        self._push(point)
+        return True
+
+    def extend(self, points):
+        for point in points:
+            self.append(point)
+
+    def clear(self):
+        self._start += self._size
+        self._size = 0
+        self._tail_pending = False
+
+    def _push(self, point):
+        if self.max_points is not None and self._size >= self.max_points:
+            # 成块丢弃最旧的1/4, 摊薄移动数据的开销
+            drop = max(1, self.max_points // 4)
+            self._data[:self._size - drop] = self._data[drop:self._size]
+            self._size -= drop
+            self._start += drop
+        if self._size == len(self._data):
+            grown = len(self._data) * 2
+            if self.max_points is not None:
+                grown = min(grown, self.max_points)
+            data = np.empty((grown, self.dims), dtype=self._data.dtype)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size] = point
+        self._size += 1
+
+    # ---- 读取 ----
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __getitem__(self, index):
+        """整数下标返回 tuple (与原来的列表元素一致), 切片返回数组视图"""
+        if isinstance(index, slice):
+            return self.points[index]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("trajectory index out of range")
+        return tuple(self._data[index].tolist())
+
+    def __iter__(self):
+        return iter(map(tuple, self.points.tolist()))
+
+    @property
+    def points(self):
+        """(n, dims) 只读视图; 后续追加可能使其失效, 需要保留时请拷贝"""
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def x(self):
+        return self.points[:, 0]
+
+    @property
+    def y(self):
+        return self.points[:, 1]
+
+    @property
+    def end(self):
+        """下一个新增点的全局序号"""
+        return self._start + self._size
+
+    def since(self, index):
+        """
+        返回 (序号 >= index 的点, end). 把返回的 end 作为下次的 index 即可增量读取;
+        开启抽稀时末尾临时点可能被原地覆盖, 需要同步它的调用方应传入 end - 1.
+        早于已丢弃部分的 index 从最旧的保留点开始.
+        """
+        offset = min(max(index - self._start, 0), self._size)
+        return self.points[offset:], self.end
+
+    @property
+    def first(self):
+        """最旧保留点的全局序号"""
+        return self._start
+    
+    def sync(self, cursor=None):
+        """
+        增量同步, 返回 (first, start, points, end): 接收端丢弃序号 < first (已被丢弃) 和 >= start
+        的本地点, 再追加 points (序号从 start 开始) 即与本缓冲区一致; 下次把 end 作为 cursor 传入.
+        末尾临时点可能被原地覆盖, 所以从 cursor - 1 开始重发; cursor=None 时发送完整轨迹.
+        """
+        start = self._start if cursor is None else min(max(cursor - 1, self._start), self.end)
+        points, end = self.since(start)
+        return self._start, start, points, end
+    
+    def downsample(self, max_points):
+        """等间隔抽取不超过 max_points 个点(保留首尾), 用于绘图"""
+        if self._size <= max_points:
+            return self.points
+        picks = np.linspace(0, self._size - 1, max_points).astype(int)
+        return self._data[picks]
+
+    def tolist(self):
+        """可JSON序列化的 [[x, y, ...], ...]"""
+        return self.points.tolist()
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
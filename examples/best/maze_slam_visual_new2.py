@@ -1,13 +1,37 @@
 import math
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.colors as colors
 import time
 import random
 import json
+import contextlib
+import os
+import sys
 from collections import deque
+from functools import cached_property
 import heapq
 
+# 轨迹缓冲区与 PoseGraph_Slam-Simulation 共用
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'PoseGraph_Slam-Simulation'))
+from trajectory_buffer import TrajectoryBuffer
+from ray_traversal import free_cells
+
+# 机器人路径：相邻保留点的最小间距（米）与每个机器人最多保留的点数
+PATH_MIN_STEP = 0.05
+PATH_MAX_POINTS = 50000
+
+# matplotlib 只在创建可视化器时才加载, Web版和无界面运行不需要GUI栈
+plt = None
+colors = None
+
+def _load_matplotlib():
+    """首次调用时导入 matplotlib.pyplot / matplotlib.colors, 之后返回缓存的模块"""
+    global plt, colors
+    if plt is None:
+        import matplotlib.pyplot as pyplot
+        import matplotlib.colors as mcolors
+        plt, colors = pyplot, mcolors
+    return plt, colors
+
 class MazeEnvironment:
     """迷宫环境类（继承原版功能）"""
     
@@ -303,32 +327,109 @@ class MazeEnvironment:
 class GlobalSLAMMapper:
     """全局共享SLAM地图"""
     
-    def __init__(self, maze_size, display_size=18, resolution=0.1):
+    def __init__(self, maze_size, display_size=18, resolution=0.1, shared_memory=False):
         self.size = maze_size
         self.display_size = display_size
         self.resolution = resolution
         self.grid_size = int(display_size / resolution)
         
         # 全局SLAM地图：0=未知，1=自由，2=占用
-        self.global_map = np.zeros((self.grid_size, self.grid_size), dtype=int)
+        # shared_memory=True 时地图放在共享内存中（见 shared_map.py），其他进程可通过
+        # shared_map_descriptor() 附加并零拷贝读取；本进程是唯一写者，写入受 seqlock 保护
+        self.shared_map = None
+        if shared_memory:
+            from shared_map import SharedGridMap
+            self.shared_map = SharedGridMap.create((self.grid_size, self.grid_size), dtype=np.uint8)
+            self.global_map = self.shared_map.array
+        else:
+            self.global_map = np.zeros((self.grid_size, self.grid_size), dtype=np.uint8)
         
         # 改进的前沿点管理
         self.frontiers = set()
-        self.frontier_info = {}  # 存储每个frontier的详细信息
-        self.frontier_last_seen = {}  # 记录frontier最后被确认的时间
-        self.frontier_exploration_value = {}  # 记录frontier的探索价值
+        # 前沿点详细信息（诞生时间、发现次数、周围未知栅格数、最后确认时间、探索价值），
+        # 以栅格为索引的结构数组表
+        self.frontier_table = FrontierTable(self)
         self.update_counter = 0  # 更新计数器
         
-        # 探索信息
-        self.all_explored_cells = set()
-        self.robot_paths = {}  # 存储所有机器人的路径
+        # 探索信息：按位压缩的已探索掩码（每字节8个栅格），并维护计数，覆盖率计算为O(1)
+        self.explored_bits = np.zeros((self.grid_size, (self.grid_size + 7) // 8), dtype=np.uint8)
+        self.explored_count = 0
+        # 有序脏栅格缓冲：update_map 中取值发生变化的栅格（扁平索引），按变化顺序追加，
+        # 由 update_frontiers 消费，前沿点的增删和价值更新只在这些栅格附近进行
+        self.dirty_cells = []
+        self.robot_paths = {}  # 存储所有机器人的路径（robot_id -> TrajectoryBuffer）
         
         # 保存maze_env引用（稍后设置）
         self.maze_env = None
         
+        # 墙壁间隙场：网格格点 (grid_to_world 的取值) 到最近墙壁的距离，
+        # 以及格点周围8个探测点 (半径0.2) 中离墙最近的距离；在设置环境/墙壁变化时重建
+        self.wall_clearance = None
+        self.probe_clearance = None
+        self._clearance_key = None
+        
+        # 多机器人前沿点分配引擎
+        self.frontier_assigner = FrontierAssigner(self)
+        # 单机器人最优前沿点查询：按评分维护的索引堆
+        self.frontier_heap = FrontierScoreHeap(self)
+        
     def set_maze_env(self, maze_env):
         """设置迷宫环境引用"""
         self.maze_env = maze_env
+        self.refresh_wall_clearance()
+    
+    def _wall_segments(self):
+        """当前参与碰撞检测的墙段（实体墙 + 隐形墙）"""
+        return self.maze_env.walls + self.maze_env.invisible_walls
+    
+    def refresh_wall_clearance(self):
+        """根据 walls + invisible_walls 在网格格点上重建墙壁间隙场"""
+        walls = self._wall_segments()
+        self._clearance_key = (len(self.maze_env.walls), len(self.maze_env.invisible_walls))
+        
+        coords = np.arange(self.grid_size) * self.resolution - 2.0
+        px, py = np.meshgrid(coords, coords)   # [y, x] 索引
+        self.wall_clearance = self._distance_to_walls(px, py, walls)
+        
+        probe = np.full(px.shape, np.inf)
+        check_radius = 0.2
+        for angle in [0, 45, 90, 135, 180, 225, 270, 315]:
+            probe_x = px + check_radius * math.cos(math.radians(angle))
+            probe_y = py + check_radius * math.sin(math.radians(angle))
+            np.minimum(probe, self._distance_to_walls(probe_x, probe_y, walls), out=probe)
+        self.probe_clearance = probe
+    
+    @staticmethod
+    def _distance_to_walls(px, py, walls):
+        """点集到一组线段的最近距离（与 _point_to_line_distance 相同的投影公式）"""
+        dist = np.full(np.shape(px), np.inf)
+        for (x1, y1), (x2, y2) in walls:
+            dx, dy = x2 - x1, y2 - y1
+            len_sq = dx * dx + dy * dy
+            if len_sq == 0:
+                t = 0.0
+            else:
+                t = np.clip(((px - x1) * dx + (py - y1) * dy) / len_sq, 0, 1)
+            np.minimum(dist, np.hypot(px - (x1 + t * dx), py - (y1 + t * dy)), out=dist)
+        return dist
+    
+    def clearance_field(self):
+        """到墙距离场 wall_clearance（墙壁变化时先重建）"""
+        if (len(self.maze_env.walls), len(self.maze_env.invisible_walls)) != self._clearance_key:
+            self.refresh_wall_clearance()
+        return self.wall_clearance
+    
+    def _clearance_at(self, world_pos):
+        """返回 (到墙距离, 探测点到墙最小距离)；不在格点上的位置返回 None"""
+        if (len(self.maze_env.walls), len(self.maze_env.invisible_walls)) != self._clearance_key:
+            self.refresh_wall_clearance()
+        gx = int(round((world_pos[0] + 2.0) / self.resolution))
+        gy = int(round((world_pos[1] + 2.0) / self.resolution))
+        if not (0 <= gx < self.grid_size and 0 <= gy < self.grid_size):
+            return None
+        if abs(gx * self.resolution - 2.0 - world_pos[0]) > 1e-6 or abs(gy * self.resolution - 2.0 - world_pos[1]) > 1e-6:
+            return None
+        return self.wall_clearance[gy, gx], self.probe_clearance[gy, gx]
         
     def world_to_grid(self, world_pos):
         """世界坐标转网格坐标"""
@@ -349,120 +450,263 @@ class GlobalSLAMMapper:
         y = grid_y * self.resolution - offset
         return (x, y)
     
-    def update_map(self, robot_id, robot_pos, scan_points, obstacle_points):
-        """更新全局地图"""
+    def world_to_grid_array(self, points):
+        """批量世界坐标转网格坐标，返回 (grid_x, grid_y) 两个整数数组"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        offset = 2.0
+        # astype(int) 与 int() 一样向零截断，再裁剪到网格范围内
+        grid_x = np.clip(((points[:, 0] + offset) / self.resolution).astype(int), 0, self.grid_size - 1)
+        grid_y = np.clip(((points[:, 1] + offset) / self.resolution).astype(int), 0, self.grid_size - 1)
+        return grid_x, grid_y
+    
+    def update_map(self, robot_id, robot_pos, scan_points, obstacle_points, refresh_frontiers=True):
+        """
+        更新全局地图（批量坐标转换 + 花式索引写入）
+
+        refresh_frontiers=False 时只写地图并记录脏栅格，多机器人模式在一个tick内合并所有
+        机器人的扫描后再统一调用一次 update_frontiers。
+        """
+        free_x, free_y = self.world_to_grid_array(scan_points)
+        obs_x, obs_y = self.world_to_grid_array(obstacle_points)
+        self.update_map_cells(robot_id, robot_pos, free_x, free_y, obs_x, obs_y, refresh_frontiers)
+    
+    def update_map_cells(self, robot_id, robot_pos, free_x, free_y, obs_x, obs_y, refresh_frontiers=True):
+        """update_map 的栅格版本：自由/障碍物直接以栅格坐标数组给出"""
         # 记录机器人路径
         if robot_id not in self.robot_paths:
-            self.robot_paths[robot_id] = []
+            self.robot_paths[robot_id] = TrajectoryBuffer(min_distance=PATH_MIN_STEP, max_points=PATH_MAX_POINTS)
         self.robot_paths[robot_id].append(robot_pos)
         
-        # 标记机器人位置为自由空间
-        robot_grid = self.world_to_grid(robot_pos)
-        rx, ry = robot_grid
-        if 0 <= rx < self.grid_size and 0 <= ry < self.grid_size:
+        rx, ry = self.world_to_grid(robot_pos)
+        
+        with self._map_writing():
+            # 标记机器人位置为自由空间
+            robot_changed = self.global_map[ry, rx] != 1
             self.global_map[ry, rx] = 1
-            self.all_explored_cells.add((rx, ry))
-        
-        # 处理自由空间扫描点
-        for point in scan_points:
-            grid_pos = self.world_to_grid(point)
-            px, py = grid_pos
-            if 0 <= px < self.grid_size and 0 <= py < self.grid_size:
-                if self.global_map[py, px] == 0:  # 只更新未知区域
-                    self.global_map[py, px] = 1
-                    self.all_explored_cells.add((px, py))
-        
-        # 处理障碍物点（优先级更高）
-        for point in obstacle_points:
-            grid_pos = self.world_to_grid(point)
-            px, py = grid_pos
-            if 0 <= px < self.grid_size and 0 <= py < self.grid_size:
-                self.global_map[py, px] = 2
-                self.all_explored_cells.add((px, py))
+            
+            # 处理自由空间栅格：只更新未知区域
+            unknown = self.global_map[free_y, free_x] == 0
+            free_x, free_y = free_x[unknown], free_y[unknown]
+            self.global_map[free_y, free_x] = 1
+            
+            # 处理障碍物点（优先级更高，最后写入）
+            obs_changed = self.global_map[obs_y, obs_x] != 2
+            self.global_map[obs_y, obs_x] = 2
+        
+        # 记录新探索的栅格
+        cells_x = np.concatenate(([rx], free_x, obs_x))
+        cells_y = np.concatenate(([ry], free_y, obs_y))
+        self._mark_explored(cells_x, cells_y)
+        
+        # 记录取值发生变化的栅格（机器人、未知->自由、非占用->占用）
+        changed = np.concatenate(([robot_changed], np.ones(len(free_x), dtype=bool), obs_changed))
+        if changed.any():
+            self.dirty_cells.append(cells_y[changed] * self.grid_size + cells_x[changed])
         
         # 更新前沿点
-        self.update_frontiers()
+        if refresh_frontiers:
+            self.update_frontiers()
+    
+    def _map_writing(self):
+        """地图写入区间：共享内存模式下为 seqlock 写区间，否则什么都不做"""
+        if self.shared_map is not None:
+            return self.shared_map.writing()
+        return contextlib.nullcontext()
+    
+    def shared_map_descriptor(self):
+        """共享内存模式下返回可pickle的地图描述，供工作进程 SharedGridMap.attach 使用"""
+        return self.shared_map.descriptor() if self.shared_map is not None else None
+    
+    def close(self):
+        """释放共享内存地图（如果有）"""
+        if self.shared_map is not None:
+            self.global_map = self.global_map.copy()
+            self.shared_map.close()
+            self.shared_map = None
+    
+    def update_map_from_scan(self, robot_id, scan, refresh_frontiers=True):
+        """直接用 LaserScan 的射线更新全局地图：自由空间为每条射线穿过的全部栅格，不经过点元组列表"""
+        obs_x, obs_y = self.world_to_grid_array(scan.hit_points())
+        free_x, free_y = self.ray_free_cells(scan)
+        self.update_map_cells(robot_id, scan.origin, free_x, free_y, obs_x, obs_y, refresh_frontiers)
+    
+    def ray_free_cells(self, scan):
+        """
+        每条射线从起点到端点穿过的栅格（ray_traversal.free_cells，与 PoseGraph 仿真的占据栅格共用），
+        不含端点所在栅格；命中射线的障碍物栅格（按 hit_xy 计算）也不会被标成自由。返回 (grid_x, grid_y)。
+        """
+        n = len(scan)
+        if n == 0:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        # 网格原点在世界坐标 (-2, -2)
+        offset = 2.0
+        end_x = end_y = None
+        if scan.hits.any():
+            # 命中点与 起点+距离*方向 可能因舍入落在相邻栅格，逐射线排除障碍物栅格
+            hit_x, hit_y = self.world_to_grid_array(scan.hit_points())
+            end_x = np.full(n, -1)
+            end_y = np.full(n, -1)
+            end_x[scan.hits], end_y[scan.hits] = hit_x, hit_y
+        cells_x, cells_y = free_cells(scan.origin[0] + offset, scan.origin[1] + offset,
+                                      scan.angles, scan.ranges, self.resolution, end_x, end_y)
+        keep = (cells_x >= 0) & (cells_x < self.grid_size) & (cells_y >= 0) & (cells_y < self.grid_size)
+        return cells_x[keep], cells_y[keep]
+    
+    def _mark_explored(self, cells_x, cells_y):
+        """把一批栅格标记为已探索并更新计数"""
+        flat = np.unique(cells_y * self.grid_size + cells_x)
+        rows, cols = flat // self.grid_size, flat % self.grid_size
+        bits = (1 << (cols & 7)).astype(np.uint8)
+        new = (self.explored_bits[rows, cols >> 3] & bits) == 0
+        np.bitwise_or.at(self.explored_bits, (rows[new], cols[new] >> 3), bits[new])
+        self.explored_count += int(new.sum())
+    
+    @property
+    def explored_mask(self):
+        """已探索掩码（解压为布尔数组，只用于显示/分析）"""
+        unpacked = np.unpackbits(self.explored_bits, axis=1, bitorder='little')
+        return unpacked[:, :self.grid_size].astype(bool)
+    
+    def memory_usage(self):
+        """各部分地图状态占用的字节数"""
+        usage = {
+            'global_map': self.global_map.nbytes,
+            'explored_bits': self.explored_bits.nbytes,
+            'frontier_table': self.frontier_table.nbytes,
+            'wall_clearance': sum(field.nbytes for field in (self.wall_clearance, self.probe_clearance)
+                                  if field is not None),
+        }
+        usage['total'] = sum(usage.values())
+        return usage
+    
+    def pop_dirty_cells(self):
+        """取出并清空脏栅格缓冲，返回按首次变化顺序去重后的扁平索引数组"""
+        if not self.dirty_cells:
+            return np.empty(0, dtype=int)
+        flat = np.concatenate(self.dirty_cells)
+        self.dirty_cells = []
+        _, first = np.unique(flat, return_index=True)
+        return flat[np.sort(first)]
+    
+    def _neighbourhood(self, flat, radius):
+        """扁平索引栅格外扩 radius 格（方形邻域）后的栅格，按原顺序去重，越界的邻居被丢弃"""
+        offsets = np.arange(-radius, radius + 1)
+        xs = (flat % self.grid_size)[:, None, None] + offsets[None, None, :]
+        ys = (flat // self.grid_size)[:, None, None] + offsets[None, :, None]
+        xs, ys = np.broadcast_arrays(xs, ys)
+        xs, ys = xs.ravel(), ys.ravel()
+        inside = (xs >= 0) & (xs < self.grid_size) & (ys >= 0) & (ys < self.grid_size)
+        near = ys[inside] * self.grid_size + xs[inside]
+        _, first = np.unique(near, return_index=True)
+        return near[np.sort(first)]
+    
+    def get_coverage(self):
+        """探索覆盖率（百分比）"""
+        return self.explored_count / (self.grid_size * self.grid_size) * 100
     
     def update_frontiers(self):
-        """改进的前沿点更新（智能管理版）"""
+        """
+        改进的前沿点更新（变化驱动版）
+
+        只处理自上次调用以来 update_map 记录的脏栅格：
+        一对 (自由栅格, 未知邻居) 只有在其中一个发生变化时才可能成为新的前沿点，
+        所以只检查脏栅格外扩1格范围内的自由栅格；前沿点周围5x5的未知栅格数
+        只有在脏栅格外扩2格范围内才会变化，只对这些前沿点刷新价值。
+        """
         self.update_counter += 1
         current_valid_frontiers = set()
         
-        # 高速模式：只检查最近的探索点，减少计算量
-        recent_cells = list(self.all_explored_cells)[-200:] if len(self.all_explored_cells) > 200 else self.all_explored_cells
-        
-        # 检查最近的自由空间邻居，发现新的potential frontiers
-        for x, y in recent_cells:
-            if self.global_map[y, x] == 1:  # 自由空间
-                # 检查8邻域（包括对角线）
-                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]:
-                    nx, ny = x + dx, y + dy
-                    if (0 <= nx < self.grid_size and 
-                        0 <= ny < self.grid_size and
-                        self.global_map[ny, nx] == 0):  # 未知区域
-                        
-                        # 验证前沿点：确保不在墙上且可达
-                        world_pos = self.grid_to_world((nx, ny))
-                        if self._is_valid_frontier(world_pos, (x, y)):
-                            current_valid_frontiers.add(world_pos)
-                            
-                            # 更新frontier信息
-                            if world_pos not in self.frontier_info:
-                                # 新发现的frontier
-                                self.frontier_info[world_pos] = {
-                                    'birth_time': self.update_counter,
-                                    'discovery_count': 1,
-                                    'nearby_unknown_cells': self._count_nearby_unknown(world_pos)
-                                }
-                            else:
-                                # 已知frontier，更新信息
-                                self.frontier_info[world_pos]['discovery_count'] += 1
-                                self.frontier_info[world_pos]['nearby_unknown_cells'] = self._count_nearby_unknown(world_pos)
-                            
-                            # 更新最后确认时间
-                            self.frontier_last_seen[world_pos] = self.update_counter
-                            
-                            # 计算探索价值
-                            self._update_exploration_value(world_pos)
+        dirty = self.pop_dirty_cells()
+        if len(dirty):
+            # 脏栅格外扩1格范围内的自由栅格，及其8邻域中的未知栅格
+            near = self._neighbourhood(dirty, 1)
+            free = near[self.global_map.ravel()[near] == 1]
+            directions = np.array([(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)])
+            fx, fy = free % self.grid_size, free // self.grid_size
+            nbr_x = fx[:, None] + directions[None, :, 0]
+            nbr_y = fy[:, None] + directions[None, :, 1]
+            inside = (nbr_x >= 0) & (nbr_x < self.grid_size) & (nbr_y >= 0) & (nbr_y < self.grid_size)
+            unknown = np.zeros(inside.shape, dtype=bool)
+            unknown[inside] = self.global_map[nbr_y[inside], nbr_x[inside]] == 0
+            rows, cols = np.nonzero(unknown)
+            candidates = zip(fx[rows].tolist(), fy[rows].tolist(),
+                             nbr_x[rows, cols].tolist(), nbr_y[rows, cols].tolist())
+        else:
+            candidates = ()
+        
+        # 检查变化区域内 (自由栅格, 未知邻居) 对，发现新的potential frontiers
+        for x, y, nx, ny in candidates:
+            # 验证前沿点：确保不在墙上且可达
+            world_pos = self.grid_to_world((nx, ny))
+            if self._is_valid_frontier(world_pos, (x, y)):
+                current_valid_frontiers.add(world_pos)
+                
+                # 更新frontier信息
+                table = self.frontier_table
+                slot = table.slot(world_pos)
+                if slot < 0:
+                    # 新发现的frontier
+                    slot = table.add(world_pos, self.update_counter)
+                else:
+                    # 已知frontier，更新信息
+                    table.discovery_count[slot] = min(int(table.discovery_count[slot]) + 1, 65535)
+                table.nearby_unknown[slot] = self._count_nearby_unknown(world_pos)
+                
+                # 更新最后确认时间
+                table.last_seen[slot] = self.update_counter
+                
+                # 计算探索价值
+                self._update_exploration_value(world_pos)
+        
+        # 脏栅格外扩2格范围内的已有前沿点：周围未知栅格数可能变化，刷新其信息和价值
+        # 以下按槽位批量读取各列。同一轮中被移除又重新加入的前沿点没有记录（槽位 -1），
+        # 读取各列前先把它们排除，不能用 -1 去索引（那会读到最后一个槽位）
+        table = self.frontier_table
+        frontiers = list(self.frontiers)
+        slots = table.slots(table.cell_indices(frontiers))
+        recorded = slots >= 0
+        known = np.where(recorded, slots, 0)
+        if len(dirty) and frontiers:
+            touched = np.zeros(self.grid_size * self.grid_size, dtype=bool)
+            touched[self._neighbourhood(dirty, 2)] = True
+            # 沿用 world_to_grid 的截断取整判断是否在变化范围内（与原逐点判断一致）
+            grid_x, grid_y = self.world_to_grid_array(frontiers)
+            refresh = touched[grid_y * self.grid_size + grid_x] & recorded & (table.last_seen[known] != self.update_counter)
+            for i in np.flatnonzero(refresh).tolist():
+                table.nearby_unknown[slots[i]] = self._count_nearby_unknown(frontiers[i])
+                self._update_exploration_value(frontiers[i])
         
         # 智能移除策略：不是简单替换，而是基于多个条件
-        frontiers_to_remove = set()
+        # 条件1：frontier不再有效（被完全探索）。给予一定的宽容期，避免过早移除；
+        # 本轮确认过的 last_seen 等于当前计数，不会满足宽容期条件。
+        # 周围变化时已刷新，缓存的未知栅格数即为当前值；没有记录的按 最后确认时间 0、未知栅格数 0 处理
+        last_seen = np.where(recorded, table.last_seen[known], 0)
+        nearby_unknown = np.where(recorded, table.nearby_unknown[known], 0)
+        stale = ((self.update_counter - last_seen) > 5) & (nearby_unknown == 0)
+        # 条件2：frontier的探索价值太低且存在时间过长（没有记录即没有价值，不参与）
+        ages = self.update_counter - table.birth_time[known]
+        values = np.where(recorded, table.value[known], np.nan)
+        low_value = ~np.isnan(values) & (ages > 20) & (values < 0.3)
         
-        for frontier in self.frontiers:
-            should_remove = False
-            
-            # 条件1：如果frontier不再有效（被完全探索）
-            if frontier not in current_valid_frontiers:
-                # 给予一定的宽容期，避免过早移除
-                if (self.update_counter - self.frontier_last_seen.get(frontier, 0)) > 5:
-                    # 检查是否真的被完全探索
-                    nearby_unknown = self._count_nearby_unknown(frontier)
-                    if nearby_unknown == 0:
-                        should_remove = True
-            
-            # 条件2：如果frontier的探索价值太低且存在时间过长
-            if frontier in self.frontier_exploration_value:
-                age = self.update_counter - self.frontier_info.get(frontier, {}).get('birth_time', 0)
-                value = self.frontier_exploration_value[frontier]
-                
+        frontiers_to_remove = set()
+        for i in np.flatnonzero(stale | low_value).tolist():
+            frontier = frontiers[i]
+            if low_value[i]:
                 # 低价值且"老化"的frontier可以被移除
-                if age > 20 and value < 0.3:
-                    should_remove = True
-                    print(f"🗑️  Removing low-value old frontier at ({frontier[0]:.1f}, {frontier[1]:.1f}) - value: {value:.2f}, age: {age}")
-            
-            if should_remove:
-                frontiers_to_remove.add(frontier)
+                print(f"🗑️  Removing low-value old frontier at ({frontier[0]:.1f}, {frontier[1]:.1f}) - value: {values[i]:.2f}, age: {ages[i]}")
+            frontiers_to_remove.add(frontier)
         
         # 移除标记的frontiers
         for frontier in frontiers_to_remove:
             self.frontiers.discard(frontier)
-            self.frontier_info.pop(frontier, None)
-            self.frontier_last_seen.pop(frontier, None)
-            self.frontier_exploration_value.pop(frontier, None)
+            self.frontier_table.remove(frontier)
+            self.frontier_heap.discard(frontier)
         
         # 添加新的有效frontiers
         new_frontiers = current_valid_frontiers - self.frontiers
         self.frontiers.update(new_frontiers)
+        for frontier in new_frontiers:
+            self.frontier_heap.push(frontier, self.frontier_table.get_value(frontier, 0.5))
 
     
     def _count_nearby_unknown(self, world_pos):
@@ -482,19 +726,19 @@ class GlobalSLAMMapper:
     
     def _update_exploration_value(self, world_pos):
         """更新frontier的探索价值"""
-        if world_pos not in self.frontier_info:
+        table = self.frontier_table
+        slot = table.slot(world_pos)
+        if slot < 0:
             return
         
-        info = self.frontier_info[world_pos]
-        
         # 基础价值：基于周围未知区域数量
-        unknown_value = min(info['nearby_unknown_cells'] / 10.0, 1.0)
+        unknown_value = min(int(table.nearby_unknown[slot]) / 10.0, 1.0)
         
         # 持久性价值：经常被重新发现的frontier价值更高
-        persistence_value = min(info['discovery_count'] / 5.0, 1.0)
+        persistence_value = min(int(table.discovery_count[slot]) / 5.0, 1.0)
         
         # 年龄衰减：太老的frontier价值降低
-        age = self.update_counter - info['birth_time']
+        age = self.update_counter - int(table.birth_time[slot])
         age_factor = max(0.3, 1.0 - age / 50.0)
         
         # 位置价值：边界附近的frontier价值更高
@@ -506,7 +750,9 @@ class GlobalSLAMMapper:
                       boundary_value * 0.3 + 
                       age_factor * 0.1)
         
-        self.frontier_exploration_value[world_pos] = total_value
+        table.value[slot] = total_value
+        if world_pos in self.frontiers:
+            self.frontier_heap.push(world_pos, total_value)
     
     def _calculate_boundary_value(self, world_pos):
         """计算边界价值（边界附近的前沿点价值更高）"""
@@ -567,13 +813,19 @@ class GlobalSLAMMapper:
         
         # 3. 严格的墙壁检测 - 对所有区域都进行检查
         if self.maze_env:
-            # 检查前沿点是否与任何墙壁重叠或太近
+            # 检查前沿点是否与任何墙壁重叠或太近；格点上的前沿点直接查间隙场
             min_distance_to_wall = 0.3  # 增加最小距离到墙壁，防止穿墙
+            clearance = self._clearance_at(world_pos)
             
-            for wall in self.maze_env.walls + self.maze_env.invisible_walls:
-                distance = self._point_to_line_distance(world_pos, wall[0], wall[1])
-                if distance < min_distance_to_wall:
+            if clearance is not None:
+                # 5. 额外的墙壁穿透检查（周围8个探测点）也已预计算在间隙场中
+                if clearance[0] < min_distance_to_wall or clearance[1] < 0.1:
                     return False
+            else:
+                for wall in self._wall_segments():
+                    distance = self._point_to_line_distance(world_pos, wall[0], wall[1])
+                    if distance < min_distance_to_wall:
+                        return False
             
             # 4. 连通性检查 - 只对可访问区域进行
             is_in_accessible_area = (0 <= world_pos[0] <= self.maze_env.size and 
@@ -585,17 +837,18 @@ class GlobalSLAMMapper:
                 if not self.maze_env.can_move_to(from_world, world_pos):
                     return False
             
-            # 5. 额外的墙壁穿透检查 - 检查前沿点周围的小区域
-            check_radius = 0.2
-            for angle in [0, 45, 90, 135, 180, 225, 270, 315]:
-                check_x = world_pos[0] + check_radius * math.cos(math.radians(angle))
-                check_y = world_pos[1] + check_radius * math.sin(math.radians(angle))
-                check_pos = (check_x, check_y)
-                
-                for wall in self.maze_env.walls + self.maze_env.invisible_walls:
-                    distance = self._point_to_line_distance(check_pos, wall[0], wall[1])
-                    if distance < 0.1:  # 如果周围点太靠近墙壁，也拒绝
-                        return False
+            # 5. 额外的墙壁穿透检查 - 检查前沿点周围的小区域（不在格点上时逐墙计算）
+            if clearance is None:
+                check_radius = 0.2
+                for angle in [0, 45, 90, 135, 180, 225, 270, 315]:
+                    check_x = world_pos[0] + check_radius * math.cos(math.radians(angle))
+                    check_y = world_pos[1] + check_radius * math.sin(math.radians(angle))
+                    check_pos = (check_x, check_y)
+                    
+                    for wall in self._wall_segments():
+                        distance = self._point_to_line_distance(check_pos, wall[0], wall[1])
+                        if distance < 0.1:  # 如果周围点太靠近墙壁，也拒绝
+                            return False
         
         return True
     
@@ -612,9 +865,14 @@ class GlobalSLAMMapper:
         if self.maze_env:
             # 检查前沿点是否与墙壁太近
             safety_distance = 0.2
-            for wall in self.maze_env.walls + self.maze_env.invisible_walls:
-                if self._point_to_line_distance(frontier_world, wall[0], wall[1]) < safety_distance:
+            clearance = self._clearance_at(frontier_world)
+            if clearance is not None:
+                if clearance[0] < safety_distance:
                     return False
+            else:
+                for wall in self._wall_segments():
+                    if self._point_to_line_distance(frontier_world, wall[0], wall[1]) < safety_distance:
+                        return False
             
             # 检查从已知自由空间到前沿点的路径
             if not self.maze_env.can_move_to(from_world, frontier_world):
@@ -643,52 +901,28 @@ class GlobalSLAMMapper:
         # 距离
         return math.sqrt((x0 - proj_x)**2 + (y0 - proj_y)**2)
     
+    def frontier_score(self, robot_pos, frontier, exploration_value):
+        """前沿点综合评分：60%看价值，40%看距离（距离越近越好，归一化到0-1）"""
+        dist = math.sqrt((robot_pos[0] - frontier[0])**2 + 
+                       (robot_pos[1] - frontier[1])**2)
+        max_possible_dist = math.sqrt(self.display_size**2 + self.display_size**2)
+        distance_score = 1.0 - dist / max_possible_dist
+        return exploration_value * 0.6 + distance_score * 0.4
+    
+    def is_accessible(self, frontier):
+        """前沿点是否位于迷宫本体（0-size）内"""
+        return (0 <= frontier[0] <= self.maze_env.size and 
+                0 <= frontier[1] <= self.maze_env.size)
+    
     def get_nearest_frontier(self, robot_pos):
-        """获取最优前沿点（优先可访问区域，综合距离和价值）"""
+        """
+        获取最优前沿点（优先可访问区域，综合距离和价值），由索引堆在 O(log F) 内给出。
+        单机器人选目标（assign_frontiers_to_robots 只有一个机器人时）走这里。
+        """
         if not self.frontiers:
             return None
         
-        # 分离可访问区域和扩展区域的frontiers
-        accessible_frontiers = []
-        extended_frontiers = []
-        
-        for frontier in self.frontiers:
-            if (0 <= frontier[0] <= self.maze_env.size and 
-                0 <= frontier[1] <= self.maze_env.size):
-                accessible_frontiers.append(frontier)
-            else:
-                extended_frontiers.append(frontier)
-        
-        # 优先选择可访问区域的frontiers
-        target_frontiers = accessible_frontiers if accessible_frontiers else extended_frontiers
-        
-        if not target_frontiers:
-            return None
-        
-        best_score = float('-inf')
-        best_frontier = None
-        area_type = "accessible" if accessible_frontiers else "extended"
-        
-        for frontier in target_frontiers:
-            # 计算距离
-            dist = math.sqrt((robot_pos[0] - frontier[0])**2 + 
-                           (robot_pos[1] - frontier[1])**2)
-            
-            # 获取探索价值（如果没有则使用默认值）
-            exploration_value = self.frontier_exploration_value.get(frontier, 0.5)
-            
-            # 综合评分：距离越近越好，价值越高越好
-            # 归一化距离到0-1范围
-            max_possible_dist = math.sqrt(self.display_size**2 + self.display_size**2)
-            normalized_dist = dist / max_possible_dist
-            distance_score = 1.0 - normalized_dist
-            
-            # 综合评分：60%看价值，40%看距离
-            total_score = exploration_value * 0.6 + distance_score * 0.4
-            
-            if total_score > best_score:
-                best_score = total_score
-                best_frontier = frontier
+        best_frontier, area_type = self.frontier_heap.best(robot_pos)
         
         if best_frontier and area_type == "extended":
             print(f"🎯 Selecting frontier from extended area: ({best_frontier[0]:.1f}, {best_frontier[1]:.1f})")
@@ -696,100 +930,446 @@ class GlobalSLAMMapper:
         return best_frontier
     
     def assign_frontiers_to_robots(self, robot_positions):
-        """为多个机器人分配不同的前沿目标（优先可访问区域）"""
-        if not self.frontiers:
+        """
+        为多个机器人分配不同的前沿目标（优先可访问区域，全局最优分配）
+
+        只有一个机器人时不需要分配：直接用索引堆按评分取最优前沿点（get_nearest_frontier），
+        不再构建全图并做 Dijkstra + 匈牙利算法。
+        """
+        if not self.frontiers or not robot_positions:
             return {}
         
-        # 分离可访问区域和扩展区域的frontiers
-        accessible_frontiers = []
-        extended_frontiers = []
-        
-        for frontier in self.frontiers:
-            if (0 <= frontier[0] <= self.maze_env.size and 
-                0 <= frontier[1] <= self.maze_env.size):
-                accessible_frontiers.append(frontier)
-            else:
-                extended_frontiers.append(frontier)
-        
-        assignments = {}
-        
-        # 优先分配可访问区域的frontiers
-        available_accessible = accessible_frontiers.copy()
-        
-        for robot_id, pos in robot_positions.items():
-            if not available_accessible:
-                break
-            
-            best_score = float('-inf')
-            best_frontier = None
-            best_idx = -1
-            
-            for i, frontier in enumerate(available_accessible):
-                # 计算距离
-                dist = math.sqrt((pos[0] - frontier[0])**2 + (pos[1] - frontier[1])**2)
-                
-                # 获取探索价值
-                exploration_value = self.frontier_exploration_value.get(frontier, 0.5)
-                
-                # 综合评分
-                max_possible_dist = math.sqrt(self.display_size**2 + self.display_size**2)
-                normalized_dist = dist / max_possible_dist
-                distance_score = 1.0 - normalized_dist
-                total_score = exploration_value * 0.6 + distance_score * 0.4
-                
-                if total_score > best_score:
-                    best_score = total_score
-                    best_frontier = frontier
-                    best_idx = i
-            
-            if best_frontier:
-                assignments[robot_id] = best_frontier
-                available_accessible.pop(best_idx)
-        
-        # 如果还有机器人没有分配到可访问区域的frontier，再分配扩展区域的
-        unassigned_robots = [robot_id for robot_id in robot_positions.keys() if robot_id not in assignments]
-        available_extended = extended_frontiers.copy()
+        if len(robot_positions) == 1:
+            (robot_id, robot_pos), = robot_positions.items()
+            frontier = self.get_nearest_frontier(robot_pos)
+            return {robot_id: frontier} if frontier is not None else {}
         
-        for robot_id in unassigned_robots:
-            if not available_extended:
+        assignments = self.frontier_assigner.assign(robot_positions)
+        for robot_id, frontier in assignments.items():
+            if not (0 <= frontier[0] <= self.maze_env.size and 0 <= frontier[1] <= self.maze_env.size):
+                print(f"🎯 Robot {robot_id} assigned extended area frontier: ({frontier[0]:.1f}, {frontier[1]:.1f})")
+        return assignments
+
+class FrontierTable:
+    """
+    前沿点信息表（结构数组）
+
+    slot_of 是稀疏的 栅格扁平索引 -> 槽位 字典，大小只与前沿点数量有关（不随网格面积增长）；
+    各列为紧凑的定长数组：诞生时间、最后确认时间 (int32)、发现次数 (uint16, 饱和)、
+    周围5x5未知栅格数 (uint8)、探索价值 (float32, NaN 表示尚未计算)。
+    槽位在删除后回收复用，容量不足时按2倍扩容。
+    """
+    
+    def __init__(self, mapper, capacity=256):
+        self.mapper = mapper
+        self.slot_of = {}
+        self.cell = np.zeros(0, dtype=np.int32)
+        self.birth_time = np.zeros(0, dtype=np.int32)
+        self.last_seen = np.zeros(0, dtype=np.int32)
+        self.discovery_count = np.zeros(0, dtype=np.uint16)
+        self.nearby_unknown = np.zeros(0, dtype=np.uint8)
+        self.value = np.zeros(0, dtype=np.float32)
+        self._free_slots = []
+        self._grow(capacity)
+    
+    _COLUMNS = ('cell', 'birth_time', 'last_seen', 'discovery_count', 'nearby_unknown', 'value')
+    
+    def _grow(self, capacity):
+        old = len(self.cell)
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:old] = column
+            setattr(self, name, grown)
+        self._free_slots.extend(range(capacity - 1, old - 1, -1))
+    
+    def cell_index(self, frontier):
+        """前沿点（grid_to_world 的格点）对应的栅格扁平索引，四舍五入避免浮点误差"""
+        mapper = self.mapper
+        gx = round((frontier[0] + 2.0) / mapper.resolution)
+        gy = round((frontier[1] + 2.0) / mapper.resolution)
+        return gy * mapper.grid_size + gx
+    
+    def cell_indices(self, frontiers):
+        """cell_index 的批量版本"""
+        points = np.array(frontiers, dtype=float).reshape(-1, 2)
+        cells = np.rint((points + 2.0) / self.mapper.resolution).astype(np.intp)
+        return cells[:, 1] * self.mapper.grid_size + cells[:, 0]
+    
+    def slot(self, frontier):
+        """前沿点的槽位，不存在时返回 -1"""
+        return self.slot_of.get(self.cell_index(frontier), -1)
+    
+    def slots(self, cells):
+        """批量查询栅格扁平索引处的槽位（-1 表示没有前沿点）"""
+        get = self.slot_of.get
+        return np.fromiter((get(cell, -1) for cell in np.asarray(cells).tolist()), dtype=np.intp, count=len(cells))
+    
+    def add(self, frontier, birth_time):
+        """新增前沿点记录（发现次数为1，价值待计算），返回槽位"""
+        if not self._free_slots:
+            self._grow(2 * len(self.cell))
+        slot = self._free_slots.pop()
+        cell = self.cell_index(frontier)
+        self.slot_of[cell] = slot
+        self.cell[slot] = cell
+        self.birth_time[slot] = birth_time
+        self.last_seen[slot] = birth_time
+        self.discovery_count[slot] = 1
+        self.nearby_unknown[slot] = 0
+        self.value[slot] = np.nan
+        return slot
+    
+    def remove(self, frontier):
+        slot = self.slot_of.pop(self.cell_index(frontier), -1)
+        if slot >= 0:
+            self._free_slots.append(slot)
+    
+    def get_value(self, frontier, default=0.5):
+        """前沿点的探索价值，没有记录或尚未计算时返回 default"""
+        slot = self.slot(frontier)
+        if slot < 0 or np.isnan(self.value[slot]):
+            return default
+        return float(self.value[slot])
+    
+    def values_at(self, cells, default=0.5):
+        """批量查询 (N, 2) 栅格坐标 (x, y) 处前沿点的探索价值"""
+        slots = self.slots(cells[:, 1] * self.mapper.grid_size + cells[:, 0])
+        values = np.full(len(slots), default, dtype=float)
+        has = slots >= 0
+        stored = self.value[slots[has]].astype(float)
+        values[np.flatnonzero(has)[~np.isnan(stored)]] = stored[~np.isnan(stored)]
+        return values
+    
+    @property
+    def nbytes(self):
+        """各列数组 + 索引字典（字典按哈希表本身加每项两个 int 对象近似）"""
+        index = sys.getsizeof(self.slot_of) + 2 * 28 * len(self.slot_of)
+        return index + sum(getattr(self, name).nbytes for name in self._COLUMNS)
+
+class FrontierScoreHeap:
+    """
+    前沿点评分索引堆（惰性失效）
+
+    评分 = 0.6*价值 + 0.4*(1 - 距离/最大距离) 依赖机器人位置，堆按某个锚点位置的评分排序。
+    机器人偏离锚点 delta 时，任一前沿点的真实评分与锚点评分之差不超过 eps = 0.4*delta/最大距离，
+    所以在堆上做一次按锚点评分从高到低的最佳优先遍历，遇到 锚点评分 + eps < 当前最优真实评分
+    就可以停止，结果与逐个计算完全一致；只有偏离超过 rebuild_distance 时才按新锚点整堆重建。
+
+    价值变化或新增前沿点时只压入带新版本号的条目 (O(log F))；旧条目和已删除前沿点的条目
+    在查询时按版本号识别并跳过（惰性失效）。可访问区域 / 扩展区域各用一个堆，
+    前者非空时只在前者中选择。
+    """
+    
+    def __init__(self, mapper, rebuild_distance=0.5):
+        self.mapper = mapper
+        self.rebuild_distance = rebuild_distance
+        self.live = {}                  # 前沿点 -> (价值, 版本号, 是否可访问)
+        self.heaps = {True: [], False: []}
+        self.live_count = {True: 0, False: 0}
+        self.anchor = None
+        self._version = 0
+        # 统计
+        self.rebuilds = 0
+        self.last_examined = 0
+    
+    def _max_dist(self):
+        return math.sqrt(self.mapper.display_size**2 + self.mapper.display_size**2)
+    
+    def push(self, frontier, value):
+        """新增前沿点或更新其价值"""
+        accessible = self.mapper.is_accessible(frontier)
+        if frontier not in self.live:
+            self.live_count[accessible] += 1
+        self._version += 1
+        self.live[frontier] = (value, self._version, accessible)
+        if self.anchor is not None:
+            score = self.mapper.frontier_score(self.anchor, frontier, value)
+            heapq.heappush(self.heaps[accessible], (-score, self._version, frontier))
+    
+    def discard(self, frontier):
+        """删除前沿点（其堆条目惰性失效）"""
+        entry = self.live.pop(frontier, None)
+        if entry is not None:
+            self.live_count[entry[2]] -= 1
+    
+    def _rebuild(self, anchor):
+        """以新锚点整堆重建，同时清理失效条目"""
+        self.anchor = anchor
+        self.heaps = {True: [], False: []}
+        for frontier, (value, version, accessible) in self.live.items():
+            score = self.mapper.frontier_score(anchor, frontier, value)
+            self.heaps[accessible].append((-score, version, frontier))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+        self.rebuilds += 1
+    
+    def _is_live(self, entry):
+        current = self.live.get(entry[2])
+        return current is not None and current[1] == entry[1]
+    
+    def best(self, robot_pos):
+        """返回 (最优前沿点, "accessible"/"extended")；没有前沿点时返回 (None, None)"""
+        if self.live_count[True] > 0:
+            accessible, area_type = True, "accessible"
+        elif self.live_count[False] > 0:
+            accessible, area_type = False, "extended"
+        else:
+            return None, None
+        
+        if (self.anchor is None or
+                math.hypot(robot_pos[0] - self.anchor[0], robot_pos[1] - self.anchor[1]) > self.rebuild_distance):
+            self._rebuild(tuple(robot_pos))
+        heap = self.heaps[accessible]
+        
+        # 弹出堆顶的失效条目
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        
+        delta = math.hypot(robot_pos[0] - self.anchor[0], robot_pos[1] - self.anchor[1])
+        eps = 0.4 * delta / self._max_dist()
+        
+        best_frontier, best_score = None, float('-inf')
+        examined = 0
+        candidates = [(heap[0][0], 0)] if heap else []
+        while candidates:
+            neg_anchor_score, i = heapq.heappop(candidates)
+            if -neg_anchor_score + eps < best_score:
                 break
-            
-            pos = robot_positions[robot_id]
-            best_score = float('-inf')
-            best_frontier = None
-            best_idx = -1
-            
-            for i, frontier in enumerate(available_extended):
-                # 计算距离
-                dist = math.sqrt((pos[0] - frontier[0])**2 + (pos[1] - frontier[1])**2)
-                
-                # 获取探索价值
-                exploration_value = self.frontier_exploration_value.get(frontier, 0.5)
-                
-                # 综合评分
-                max_possible_dist = math.sqrt(self.display_size**2 + self.display_size**2)
-                normalized_dist = dist / max_possible_dist
-                distance_score = 1.0 - normalized_dist
-                total_score = exploration_value * 0.6 + distance_score * 0.4
-                
-                if total_score > best_score:
-                    best_score = total_score
-                    best_frontier = frontier
-                    best_idx = i
-            
-            if best_frontier:
-                assignments[robot_id] = best_frontier
-                available_extended.pop(best_idx)
-                print(f"🎯 Robot {robot_id} assigned extended area frontier: ({best_frontier[0]:.1f}, {best_frontier[1]:.1f})")
+            entry = heap[i]
+            if self._is_live(entry):
+                examined += 1
+                value = self.live[entry[2]][0]
+                score = self.mapper.frontier_score(robot_pos, entry[2], value)
+                if score > best_score:
+                    best_score, best_frontier = score, entry[2]
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(candidates, (heap[child][0], child))
+        self.last_examined = examined
+        return best_frontier, area_type
+
+class FrontierAssigner:
+    """
+    多机器人前沿点分配引擎
+
+    在全局地图上做一次多源最短路计算（所有机器人栅格作为源点，一次调用
+    scipy.sparse.csgraph.dijkstra 得到每个机器人的距离场），从中取出
+    机器人 x 前沿点 的路径距离构成代价矩阵，再用匈牙利算法
+    (scipy.optimize.linear_sum_assignment) 求总代价最小的一对一分配。
+
+    代价与原贪心评分一致：最小化 0.6*(1-探索价值) + 0.4*路径距离/最大距离；
+    扩展区域（迷宫外）的前沿点加上分层偏移，只有可访问区域的前沿点不够分时才会被选中；
+    被已知障碍物隔开的前沿点按欧氏距离计价并加上不可达惩罚。
+    """
+    
+    UNREACHABLE_PENALTY = 1.0   # 可达前沿点的代价不超过1，不可达的一定排在后面
+    EXTENDED_TIER = 10.0        # 扩展区域前沿点的分层偏移
+    
+    def __init__(self, mapper):
+        self.mapper = mapper
+    
+    def _frontier_arrays(self):
+        """前沿点列表及其栅格索引、探索价值、是否位于可访问区域"""
+        mapper = self.mapper
+        frontiers = list(mapper.frontiers)
+        points = np.array(frontiers, dtype=float).reshape(-1, 2)
+        # 前沿点来自 grid_to_world 的格点，四舍五入可避免浮点误差落到相邻栅格
+        cells = np.clip(np.rint((points + 2.0) / mapper.resolution).astype(int), 0, mapper.grid_size - 1)
+        values = mapper.frontier_table.values_at(cells, 0.5)
+        size = mapper.maze_env.size
+        accessible = np.all((points >= 0) & (points <= size), axis=1)
+        return frontiers, points, cells, values, accessible
+    
+    def _build_graph(self, passable):
+        """可通行栅格的无向8邻域图（CSR），对角移动要求两侧正交邻居都可通行"""
+        from scipy.sparse import csr_matrix
+        
+        n = self.mapper.grid_size
+        index = np.arange(n * n).reshape(n, n)
+        sources, targets, weights = [], [], []
+        # 无向图只需一半方向
+        for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+            y0, y1 = max(0, -dy), n - max(0, dy)
+            x0, x1 = 0, n - dx
+            ok = passable[y0:y1, x0:x1] & passable[y0 + dy:y1 + dy, x0 + dx:x1 + dx]
+            if dx and dy:
+                ok &= passable[y0 + dy:y1 + dy, x0:x1] & passable[y0:y1, x0 + dx:x1 + dx]
+            sources.append(index[y0:y1, x0:x1][ok])
+            targets.append(index[y0 + dy:y1 + dy, x0 + dx:x1 + dx][ok])
+            step = math.sqrt(2) if dx and dy else 1.0
+            weights.append(np.full(int(ok.sum()), step * self.mapper.resolution))
+        return csr_matrix((np.concatenate(weights), (np.concatenate(sources), np.concatenate(targets))),
+                          shape=(n * n, n * n))
+    
+    def cost_matrix(self, robot_points, frontier_points, frontier_cells, values, accessible):
+        """机器人 x 前沿点 代价矩阵（一次多源 Dijkstra）"""
+        from scipy.sparse.csgraph import dijkstra
+        
+        mapper = self.mapper
+        n = mapper.grid_size
+        robot_x, robot_y = mapper.world_to_grid_array(robot_points)
+        
+        # 已知自由栅格可通行；前沿点本身（未知栅格）作为终点也加入图中
+        passable = mapper.global_map == 1
+        passable[frontier_cells[:, 1], frontier_cells[:, 0]] = True
+        passable[robot_y, robot_x] = True
+        graph = self._build_graph(passable)
+        
+        robot_nodes = robot_y * n + robot_x
+        unique_nodes, inverse = np.unique(robot_nodes, return_inverse=True)
+        field = dijkstra(graph, directed=False, indices=unique_nodes)
+        path_dist = field[inverse][:, frontier_cells[:, 1] * n + frontier_cells[:, 0]]
+        
+        max_possible_dist = math.sqrt(mapper.display_size ** 2 + mapper.display_size ** 2)
+        unreachable = ~np.isfinite(path_dist)
+        if unreachable.any():
+            euclid = np.hypot(robot_points[:, None, 0] - frontier_points[None, :, 0],
+                              robot_points[:, None, 1] - frontier_points[None, :, 1])
+            path_dist[unreachable] = euclid[unreachable]
+        normalized_dist = np.minimum(path_dist / max_possible_dist, 1.0)
+        
+        cost = (1.0 - values)[None, :] * 0.6 + normalized_dist * 0.4
+        cost += unreachable * self.UNREACHABLE_PENALTY
+        cost += (~accessible)[None, :] * self.EXTENDED_TIER
+        return cost
+    
+    def assign(self, robot_positions):
+        """返回 {机器人ID: 前沿点}，每个前沿点最多分配给一个机器人"""
+        from scipy.optimize import linear_sum_assignment
+        
+        frontiers, points, cells, values, accessible = self._frontier_arrays()
+        if not frontiers:
+            return {}
+        robot_ids = list(robot_positions.keys())
+        robot_points = np.array([robot_positions[rid] for rid in robot_ids], dtype=float).reshape(-1, 2)
         
-        return assignments
+        cost = self.cost_matrix(robot_points, points, cells, values, accessible)
+        rows, cols = linear_sum_assignment(cost)
+        return {robot_ids[r]: frontiers[c] for r, c in zip(rows, cols)}
+
+class TraversabilityGrid:
+    """
+    预计算的可通行栅格与8方向边可通行位掩码
+
+    cell_ok[y, x]：格点位置通过规划器的位置安全检查；
+    edge_bits[y, x] 的第 d 位：从 (x, y) 沿 DIRECTIONS[d] 移动一格通过规划器的移动检查。
+    两者只取决于墙壁（walls + invisible_walls）和规划器的安全半径，按墙壁版本缓存；
+    global_map 中的障碍栅格每个tick都在变化，仍在扩展时直接查表。
+    判定公式与规划器中逐点的标量检查逐项相同，结果一致。
+    """
+    
+    DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+    
+    def __init__(self, mapper, maze_env, position_ok, movement_ok):
+        """
+        position_ok(px, py) -> 布尔数组：批量位置安全检查
+        movement_ok(fx, fy, tx, ty, is_diagonal) -> 布尔数组：批量单步移动检查（不含栅格障碍）
+        """
+        n = mapper.grid_size
+        self.key = self.wall_key(maze_env)
+        coords = np.arange(n) * mapper.resolution - 2.0
+        px, py = np.meshgrid(coords, coords)   # [y, x] 索引，与 grid_to_world 相同的格点坐标
+        self.cell_ok = position_ok(px, py)
+        self.edge_bits = np.zeros((n, n), dtype=np.uint8)
+        for d, (dx, dy) in enumerate(self.DIRECTIONS):
+            # 邻居仍在网格内的起点栅格
+            ys = slice(max(0, -dy), n - max(0, dy))
+            xs = slice(max(0, -dx), n - max(0, dx))
+            tys = slice(max(0, dy), n - max(0, -dy))
+            txs = slice(max(0, dx), n - max(0, -dx))
+            ok = movement_ok(px[ys, xs], py[ys, xs], px[tys, txs], py[tys, txs], dx != 0 and dy != 0)
+            self.edge_bits[ys, xs] |= ok.astype(np.uint8) << d
+    
+    def symmetrize(self):
+        """只保留两个方向都可通行的边：浮点采样使正反方向的检查结果可能不同"""
+        n = self.edge_bits.shape[0]
+        both = self.edge_bits.copy()
+        for d, (dx, dy) in enumerate(self.DIRECTIONS):
+            back = self.DIRECTIONS.index((-dx, -dy))
+            ys = slice(max(0, -dy), n - max(0, dy))
+            xs = slice(max(0, -dx), n - max(0, dx))
+            tys = slice(max(0, dy), n - max(0, -dy))
+            txs = slice(max(0, dx), n - max(0, -dx))
+            reverse_ok = (self.edge_bits[tys, txs] >> back) & 1
+            both[ys, xs] &= ~((reverse_ok ^ 1) << d).astype(np.uint8)
+        self.edge_bits = both
+        return self
+    
+    @staticmethod
+    def wall_key(maze_env):
+        return (len(maze_env.walls), len(maze_env.invisible_walls))
+    
+    @staticmethod
+    def wall_distance(px, py, walls):
+        """点集到墙段的最近距离（与规划器 _point_to_line_distance 相同的公式）"""
+        dist = np.full(np.shape(px), np.inf)
+        for (x1, y1), (x2, y2) in walls:
+            line_len = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+            if line_len == 0:
+                d = np.sqrt((px - x1)**2 + (py - y1)**2)
+            else:
+                t = np.clip(((px - x1) * (x2 - x1) + (py - y1) * (y2 - y1)) / (line_len**2), 0, 1)
+                d = np.sqrt((px - (x1 + t * (x2 - x1)))**2 + (py - (y1 + t * (y2 - y1)))**2)
+            np.minimum(dist, d, out=dist)
+        return dist
+    
+    @staticmethod
+    def can_move(maze_env, fx, fy, tx, ty):
+        """批量版 maze_env.can_move_to：扩展区域边界 + 与墙段不相交"""
+        margin = 2.0
+        ok = (tx >= -margin) & (tx <= maze_env.size + margin) & (ty >= -margin) & (ty <= maze_env.size + margin)
+        
+        def ccw(ax, ay, bx, by, cx, cy):
+            return (cy - ay) * (bx - ax) > (by - ay) * (cx - ax)
+        
+        for (x3, y3), (x4, y4) in maze_env.walls + maze_env.invisible_walls:
+            crosses = ((ccw(fx, fy, x3, y3, x4, y4) != ccw(tx, ty, x3, y3, x4, y4)) &
+                       (ccw(fx, fy, tx, ty, x3, y3) != ccw(fx, fy, tx, ty, x4, y4)))
+            ok &= ~crosses
+        return ok
+    
+    def neighbors(self, mapper, cell, directions):
+        """cell 的可通行邻居：边位掩码允许且邻居不是已知障碍；directions 为 (方向下标, 代价) 列表"""
+        x, y = cell
+        bits = int(self.edge_bits[y, x])
+        global_map = mapper.global_map
+        for d, cost in directions:
+            if bits >> d & 1:
+                dx, dy = self.DIRECTIONS[d]
+                if global_map[y + dy, x + dx] != 2:
+                    yield (x + dx, y + dy), cost
 
 class AStarPathPlanner:
     """A*路径规划器（防穿墙版本）"""
     
+    # 4方向移动，避免对角线穿墙（TraversabilityGrid.DIRECTIONS 的下标，代价）
+    MOVES = [(0, 1), (1, 1), (2, 1), (3, 1)]
+    
     def __init__(self, global_mapper, maze_env):
         self.mapper = global_mapper
         self.maze_env = maze_env
+        self._traversability = None
+    
+    def traversability(self):
+        """当前墙壁版本对应的可通行栅格（墙壁变化时重建）"""
+        grid = self._traversability
+        if grid is None or grid.key != TraversabilityGrid.wall_key(self.maze_env) \
+                or grid.cell_ok.shape[0] != self.mapper.grid_size:
+            grid = TraversabilityGrid(self.mapper, self.maze_env, self._positions_safe, self._movements_safe)
+            self._traversability = grid
+        return grid
+    
+    def _positions_safe(self, px, py):
+        """批量版 _is_position_safe"""
+        size = self.maze_env.size
+        inside = (px >= -1.9) & (px <= size + 1.9) & (py >= -1.9) & (py <= size + 1.9)
+        walls = self.maze_env.walls + self.maze_env.invisible_walls
+        return inside & ~(TraversabilityGrid.wall_distance(px, py, walls) < 0.15)
+    
+    def _movements_safe(self, fx, fy, tx, ty, is_diagonal):
+        """批量版 _is_movement_safe"""
+        return TraversabilityGrid.can_move(self.maze_env, fx, fy, tx, ty) & self._positions_safe(tx, ty)
     
     def plan_path(self, start_pos, goal_pos):
         """使用A*算法规划路径（严格防穿墙）"""
@@ -799,9 +1379,10 @@ class AStarPathPlanner:
         if start_grid == goal_grid:
             return [start_pos, goal_pos]
         
+        traversability = self.traversability()
+        
         # 验证目标点是否可达
-        goal_world = self.mapper.grid_to_world(goal_grid)
-        if not self._is_position_safe(goal_world):
+        if not traversability.cell_ok[goal_grid[1], goal_grid[0]]:
             # 寻找最近的安全目标点
             goal_grid = self._find_nearest_safe_position(goal_grid)
             if not goal_grid:
@@ -823,23 +1404,15 @@ class AStarPathPlanner:
                 path = self._reconstruct_path(came_from, current, start_pos)
                 return self._smooth_and_validate_path(path)
             
-            # 检查邻居（4方向，避免对角线穿墙）
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (current[0] + dx, current[1] + dy)
+            # 检查邻居（4方向，避免对角线穿墙）：移动是否安全（不穿墙）已预计算在边位掩码中
+            for neighbor, cost in traversability.neighbors(self.mapper, current, self.MOVES):
+                tentative_g = g_score[current] + cost
                 
-                if self._is_grid_position_valid(neighbor):
-                    # 验证移动是否安全（不穿墙）
-                    current_world = self.mapper.grid_to_world(current)
-                    neighbor_world = self.mapper.grid_to_world(neighbor)
-                    
-                    if self._is_movement_safe(current_world, neighbor_world):
-                        tentative_g = g_score[current] + 1
-                        
-                        if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                            came_from[neighbor] = current
-                            g_score[neighbor] = tentative_g
-                            f_score[neighbor] = tentative_g + self._heuristic(neighbor, goal_grid)
-                            heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    f_score[neighbor] = tentative_g + self._heuristic(neighbor, goal_grid)
+                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
         
         # 如果没找到路径，返回当前位置
         return [start_pos]
@@ -887,8 +1460,7 @@ class AStarPathPlanner:
                     if abs(dx) == radius or abs(dy) == radius:  # 只检查边界
                         candidate = (target_grid[0] + dx, target_grid[1] + dy)
                         if self._is_grid_position_valid(candidate):
-                            candidate_world = self.mapper.grid_to_world(candidate)
-                            if self._is_position_safe(candidate_world):
+                            if self.traversability().cell_ok[candidate[1], candidate[0]]:
                                 return candidate
         return None
     
@@ -966,6 +1538,52 @@ class OptimalPathPlanner:
             (1, -1, 1.414),  # 右下（对角线）
             (1, 1, 1.414)    # 右上（对角线）
         ]
+        # 同样的八个方向，以 TraversabilityGrid.DIRECTIONS 的下标表示
+        self.moves = [(TraversabilityGrid.DIRECTIONS.index((dx, dy)), cost) for dx, dy, cost in self.directions]
+        self._traversability = None
+        self.expanded_nodes = 0   # 最近一次规划扩展的节点数
+    
+    def traversability(self):
+        """当前墙壁版本对应的可通行栅格（墙壁变化时重建）"""
+        grid = self._traversability
+        if grid is None or grid.key != TraversabilityGrid.wall_key(self.maze_env) \
+                or grid.cell_ok.shape[0] != self.mapper.grid_size:
+            grid = TraversabilityGrid(self.mapper, self.maze_env, self._positions_accessible, self._movements_safe)
+            self._traversability = grid
+        return grid
+    
+    def _positions_accessible(self, px, py, safety_radius=0.35):
+        """批量版 _is_position_accessible"""
+        margin = 0.3
+        size = self.maze_env.size
+        inside = (px >= margin) & (px <= size - margin) & (py >= margin) & (py <= size - margin)
+        walls = self.maze_env.walls + self.maze_env.invisible_walls
+        return inside & ~(TraversabilityGrid.wall_distance(px, py, walls) < safety_radius)
+    
+    def _movements_safe(self, fx, fy, tx, ty, is_diagonal):
+        """批量版 _is_movement_safe（逐项对应标量版本的检查）"""
+        can_move = lambda ax, ay, bx, by: TraversabilityGrid.can_move(self.maze_env, ax, ay, bx, by)
+        ok = self._positions_accessible(tx, ty) & can_move(fx, fy, tx, ty)
+        if is_diagonal:
+            steps = 5
+            for i in range(1, steps):
+                t = i / steps
+                ok &= self._positions_accessible(fx + t * (tx - fx), fy + t * (ty - fy))
+            # 至少有一条直角路径可行（不切角）
+            corner1 = self._positions_accessible(fx, ty) & can_move(fx, fy, fx, ty) & can_move(fx, ty, tx, ty)
+            corner2 = self._positions_accessible(tx, fy) & can_move(fx, fy, tx, fy) & can_move(tx, fy, tx, ty)
+            ok &= corner1 | corner2
+            walls = self.maze_env.walls + self.maze_env.invisible_walls
+            for i in range(steps + 1):
+                t = i / steps
+                check_x, check_y = fx + t * (tx - fx), fy + t * (ty - fy)
+                ok &= ~(TraversabilityGrid.wall_distance(check_x, check_y, walls) < 0.4)
+        else:
+            steps = 3
+            for i in range(1, steps):
+                t = i / steps
+                ok &= self._positions_accessible(fx + t * (tx - fx), fy + t * (ty - fy))
+        return ok
     
     def plan_optimal_path(self, start_pos, goal_pos):
         """计算八方向最优路径"""
@@ -991,6 +1609,8 @@ class OptimalPathPlanner:
             goal_pos = self.mapper.grid_to_world(goal_grid)
             print(f"✅ Adjusted goal to: {goal_pos}")
         
+        traversability = self.traversability()
+        
         # A*算法实现（八方向版本）
         open_set = []
         heapq.heappush(open_set, (0, start_grid))
@@ -1006,28 +1626,22 @@ class OptimalPathPlanner:
             explored_nodes += 1
             
             if current == goal_grid:
+                self.expanded_nodes = explored_nodes
                 print(f"✅ Path found! Explored {explored_nodes} nodes")
                 path = self._reconstruct_optimal_path(came_from, current, start_pos, goal_pos)
                 return self._smooth_optimal_path(path)
             
-            # 检查八个方向的邻居
-            for dx, dy, cost in self.directions:
-                neighbor = (current[0] + dx, current[1] + dy)
+            # 检查八个方向的邻居：移动安全检查（包括对角线移动）已预计算在边位掩码中
+            for neighbor, cost in traversability.neighbors(self.mapper, current, self.moves):
+                tentative_g = g_score[current] + cost
                 
-                if self._is_grid_position_accessible(neighbor):
-                    # 检查移动是否安全（包括对角线移动）
-                    current_world = self.mapper.grid_to_world(current)
-                    neighbor_world = self.mapper.grid_to_world(neighbor)
-                    
-                    if self._is_movement_safe(current_world, neighbor_world, is_diagonal=(cost > 1.0)):
-                        tentative_g = g_score[current] + cost
-                        
-                        if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                            came_from[neighbor] = current
-                            g_score[neighbor] = tentative_g
-                            f_score[neighbor] = tentative_g + self._heuristic(neighbor, goal_grid)
-                            heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    f_score[neighbor] = tentative_g + self._heuristic(neighbor, goal_grid)
+                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
         
+        self.expanded_nodes = explored_nodes
         print(f"❌ No path found after exploring {explored_nodes} nodes")
         return [start_pos]
     
@@ -1269,6 +1883,276 @@ class OptimalPathPlanner:
         
         return diagonal_steps * 1.414 + straight_steps * 1.0
 
+class ThetaStarPlanner:
+    """
+    Lazy Theta* 任意角度路径规划器（用于最终最短路径计算）
+
+    在 mapper 网格上搜索，但节点的父节点可以是任意可视的祖先节点，直接得到任意角度的折线路径，
+    不需要再做平滑。视线检查基于预计算的墙壁间隙场 mapper.wall_clearance：
+    间隙场是1-Lipschitz的，线段采样点 p 到墙的距离不小于 max_g(C[g] - |p - g|)（g 取 p 所在
+    栅格的4个角点），再减去半个采样间距即得整段线段的距离下界，要求下界不小于 safety_radius。
+    Lazy 变体只在节点出队时检查一次到父节点的视线，检查次数与扩展节点数同阶。
+    """
+    
+    # 八方向移动（TraversabilityGrid.DIRECTIONS 的下标，以栅格为单位的代价）
+    MOVES = [(d, math.hypot(dx, dy)) for d, (dx, dy) in enumerate(TraversabilityGrid.DIRECTIONS)]
+    
+    def __init__(self, global_mapper, maze_env, safety_radius=0.35, margin=0.3, sample_step=0.02):
+        self.mapper = global_mapper
+        self.maze_env = maze_env
+        self.safety_radius = safety_radius   # 与 OptimalPathPlanner 的位置安全半径一致
+        self.margin = margin                 # 路径限制在迷宫内部 [margin, size - margin]
+        self.sample_step = sample_step       # 视线检查的采样间距（米）
+        self._traversability = None
+        self._padded = None       # 补边后的间隙场（随 mapper.wall_clearance 更新）
+        self._padded_key = None
+        # 最近一次规划的统计
+        self.expanded_nodes = 0
+        self.los_checks = 0
+    
+    def traversability(self):
+        """节点与单步边的可通行性（同样按墙壁版本缓存）"""
+        grid = self._traversability
+        if grid is None or grid.key != TraversabilityGrid.wall_key(self.maze_env) \
+                or grid.cell_ok.shape[0] != self.mapper.grid_size:
+            # 无向图：Lazy Theta* 沿反方向的边在已关闭邻居中找父节点
+            grid = TraversabilityGrid(self.mapper, self.maze_env, self._positions_clear, self._edges_clear).symmetrize()
+            self._traversability = grid
+        return grid
+    
+    def _clearance_lower_bound(self, px, py):
+        """采样点到墙距离的下界：p 所在栅格4个角点 g 上 C[g] - |p - g| 的最大值"""
+        clearance = self.mapper.clearance_field()
+        if self._padded_key is not clearance:
+            # 右、上各补一行 -inf，网格边界上的采样点取角点时无需裁剪
+            self._padded = np.pad(clearance, ((0, 1), (0, 1)), constant_values=-np.inf)
+            self._padded_key = clearance
+        res = self.mapper.resolution
+        fx = (px + 2.0) / res
+        fy = (py + 2.0) / res
+        gx = np.floor(fx)
+        gy = np.floor(fy)
+        ix = gx.astype(int)
+        iy = gy.astype(int)
+        ox = (fx - gx) * res    # 到左下角点的偏移（米）
+        oy = (fy - gy) * res
+        padded = self._padded
+        bound = padded[iy, ix] - np.hypot(ox, oy)
+        np.maximum(bound, padded[iy, ix + 1] - np.hypot(res - ox, oy), out=bound)
+        np.maximum(bound, padded[iy + 1, ix] - np.hypot(ox, res - oy), out=bound)
+        np.maximum(bound, padded[iy + 1, ix + 1] - np.hypot(res - ox, res - oy), out=bound)
+        return bound
+    
+    def _inside(self, px, py):
+        size = self.maze_env.size
+        return (px >= self.margin) & (px <= size - self.margin) & (py >= self.margin) & (py <= size - self.margin)
+    
+    def _positions_clear(self, px, py):
+        """批量节点检查：在迷宫内部且格点间隙不小于安全半径"""
+        return self._inside(px, py) & (self.mapper.clearance_field() >= self.safety_radius)[
+            np.clip(np.rint((py + 2.0) / self.mapper.resolution).astype(int), 0, self.mapper.grid_size - 1),
+            np.clip(np.rint((px + 2.0) / self.mapper.resolution).astype(int), 0, self.mapper.grid_size - 1)]
+    
+    def _segments_clear(self, fx, fy, tx, ty, samples):
+        """批量线段检查：每段取 samples+1 个等距采样点，距离下界减去半个采样间距不小于安全半径"""
+        fx, fy, tx, ty = (np.asarray(v, dtype=float) for v in (fx, fy, tx, ty))
+        ts = np.linspace(0.0, 1.0, samples + 1).reshape((-1,) + (1,) * fx.ndim)
+        bound = self._clearance_lower_bound(fx + ts * (tx - fx), fy + ts * (ty - fy)).min(axis=0)
+        half_gap = np.hypot(tx - fx, ty - fy) / samples / 2
+        # 迷宫内部区域是凸的，端点在内部即整段在内部
+        return (bound - half_gap >= self.safety_radius) & self._inside(fx, fy) & self._inside(tx, ty)
+    
+    def _edges_clear(self, fx, fy, tx, ty, is_diagonal):
+        """单步边（长度不超过 √2 格）"""
+        return self._segments_clear(fx, fy, tx, ty, 4)
+    
+    def _line_of_sight(self, a, b):
+        """两个栅格节点之间的视线检查"""
+        self.los_checks += 1
+        wa = self.mapper.grid_to_world(a)
+        wb = self.mapper.grid_to_world(b)
+        samples = max(1, int(math.ceil(math.hypot(wb[0] - wa[0], wb[1] - wa[1]) / self.sample_step)))
+        return bool(self._segments_clear(wa[0], wa[1], wb[0], wb[1], samples))
+    
+    def _nearest_grid(self, world_pos):
+        n = self.mapper.grid_size
+        gx = min(max(int(round((world_pos[0] + 2.0) / self.mapper.resolution)), 0), n - 1)
+        gy = min(max(int(round((world_pos[1] + 2.0) / self.mapper.resolution)), 0), n - 1)
+        return (gx, gy)
+    
+    def _is_node_free(self, cell):
+        n = self.mapper.grid_size
+        x, y = cell
+        return (0 <= x < n and 0 <= y < n and self._traversability.cell_ok[y, x]
+                and self.mapper.global_map[y, x] != 2)
+    
+    def _find_nearest_free_node(self, target_grid):
+        """按方环由近到远寻找可用节点"""
+        if self._is_node_free(target_grid):
+            return target_grid
+        for radius in range(1, 20):
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    if abs(dx) == radius or abs(dy) == radius:
+                        candidate = (target_grid[0] + dx, target_grid[1] + dy)
+                        if self._is_node_free(candidate):
+                            return candidate
+        return None
+    
+    @staticmethod
+    def _distance(a, b):
+        return math.hypot(a[0] - b[0], a[1] - b[1])
+    
+    def plan_path(self, start_pos, goal_pos):
+        """计算任意角度最短路径，返回世界坐标折线；找不到时返回 [start_pos]"""
+        self.expanded_nodes = 0
+        self.los_checks = 0
+        traversability = self.traversability()
+        
+        start = self._find_nearest_free_node(self._nearest_grid(start_pos))
+        goal = self._find_nearest_free_node(self._nearest_grid(goal_pos))
+        if start is None or goal is None:
+            return [start_pos]
+        
+        g_score = {start: 0.0}
+        parent = {start: start}
+        closed = set()
+        open_set = [(self._distance(start, goal), start)]
+        
+        while open_set:
+            _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            
+            # Lazy Theta*：出队时才确认到父节点的视线，不可视时改用最优的已关闭邻居作父节点
+            if parent[current] != current and not self._line_of_sight(parent[current], current):
+                best = min(((g_score[neighbor] + cost, neighbor)
+                            for neighbor, cost in traversability.neighbors(self.mapper, current, self.MOVES)
+                            if neighbor in closed), default=None)
+                if best is None:
+                    # 没有可作父节点的已关闭邻居（例如地图在规划中途变化），跳过该节点
+                    continue
+                g_score[current], parent[current] = best
+            
+            self.expanded_nodes += 1
+            if current == goal:
+                return self._reconstruct_path(parent, goal, start_pos, goal_pos)
+            closed.add(current)
+            
+            # 假定邻居与当前节点的父节点可视，直接连到父节点
+            origin = parent[current]
+            for neighbor, _ in traversability.neighbors(self.mapper, current, self.MOVES):
+                if neighbor in closed:
+                    continue
+                tentative_g = g_score[origin] + self._distance(origin, neighbor)
+                if tentative_g < g_score.get(neighbor, math.inf):
+                    g_score[neighbor] = tentative_g
+                    parent[neighbor] = origin
+                    heapq.heappush(open_set, (tentative_g + self._distance(neighbor, goal), neighbor))
+        
+        return [start_pos]
+    
+    def _reconstruct_path(self, parent, goal, start_pos, goal_pos):
+        """沿父节点回溯出折线顶点，首尾接上原始起点和终点"""
+        vertices = [goal]
+        while parent[vertices[-1]] != vertices[-1]:
+            vertices.append(parent[vertices[-1]])
+        vertices.reverse()
+        
+        # 绕过墙角时会留下共线的相邻单步顶点，去掉中间点不改变路径本身
+        merged = vertices[:1]
+        for v in vertices[1:]:
+            if len(merged) >= 2:
+                (ax, ay), (bx, by) = merged[-2], merged[-1]
+                if (bx - ax) * (v[1] - by) == (by - ay) * (v[0] - bx) and (bx - ax) * (v[0] - bx) + (by - ay) * (v[1] - by) > 0:
+                    merged[-1] = v
+                    continue
+            merged.append(v)
+        vertices = merged
+        
+        path = [start_pos]
+        for point in [self.mapper.grid_to_world(v) for v in vertices] + [goal_pos]:
+            if math.hypot(point[0] - path[-1][0], point[1] - path[-1][1]) > 1e-6:
+                path.append(point)
+        return path
+
+class LaserScan:
+    """
+    紧凑的激光扫描结果：起点 + 每条射线的角度、距离和命中标记
+
+    hits[i] 为 True 表示第 i 条射线打到了真实墙体或隐形墙（端点是障碍物），
+    False 表示射线在外框或最大量程处结束（端点不写入障碍物）。
+    hit_xy 保存求交得到的精确命中点：墙体恰好落在栅格边界上，
+    用 起点 + 距离 * 方向 重新计算会因舍入落到相邻栅格。
+    地图通过 GlobalSLAMMapper.ray_free_cells 把每条射线穿过的栅格直接标为自由空间；
+    free_points 的等间隔采样点只用于显示和旧的点列表接口（scan_points / obstacle_points
+    等兼容属性按需生成）。
+    """
+    
+    def __init__(self, origin, angles, ranges, hits, hit_xy=None, free_step=0.2):
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.angles = np.asarray(angles, dtype=float)    # 弧度
+        self.ranges = np.asarray(ranges, dtype=float)    # 米
+        self.hits = np.asarray(hits, dtype=bool)
+        self.hit_xy = None if hit_xy is None else np.asarray(hit_xy, dtype=float).reshape(-1, 2)
+        self.free_step = free_step                       # 射线上自由空间采样间隔（米）
+    
+    def __len__(self):
+        return len(self.ranges)
+    
+    def hit_points(self):
+        """命中障碍物的射线端点，形状 (N, 2)"""
+        if self.hit_xy is not None:
+            return self.hit_xy
+        ranges = self.ranges[self.hits]
+        angles = self.angles[self.hits]
+        return np.column_stack((self.origin[0] + ranges * np.cos(angles),
+                                self.origin[1] + ranges * np.sin(angles)))
+    
+    def free_points(self):
+        """
+        沿每条射线每隔 free_step 采样的自由空间点，形状 (M, 2)，按射线顺序排列。
+        每条射线的采样数与 np.arange(step, range, step) 的长度一致。
+        采样间隔大于栅格时会跳过栅格，建图请用 GlobalSLAMMapper.ray_free_cells。
+        """
+        step = self.free_step
+        counts = np.maximum(np.ceil((self.ranges - step) / step), 0).astype(int)
+        if len(counts) == 0 or counts.max() == 0:
+            return np.empty((0, 2))
+        distances = step + np.arange(counts.max()) * step
+        mask = np.arange(counts.max())[None, :] < counts[:, None]
+        d = np.broadcast_to(distances, mask.shape)[mask]
+        angles = np.repeat(self.angles, counts)
+        return np.column_stack((self.origin[0] + d * np.cos(angles),
+                                self.origin[1] + d * np.sin(angles)))
+    
+    @cached_property
+    def angles_deg(self):
+        """射线角度（整数度）数组"""
+        return np.rint(np.degrees(self.angles)).astype(int)
+    
+    # ---- 兼容旧接口的点列表（扫描结果不再变化，首次访问时生成并缓存） ----
+    @cached_property
+    def scan_points(self):
+        return [tuple(p) for p in self.free_points().tolist()]
+    
+    @cached_property
+    def obstacle_points(self):
+        return [tuple(p) for p in self.hit_points().tolist()]
+    
+    @cached_property
+    def scan_ranges(self):
+        return self.ranges.tolist()
+    
+    @cached_property
+    def scan_angles(self):
+        """射线角度（度）"""
+        return self.angles_deg.tolist()
+    
+    def to_point_lists(self):
+        """返回旧格式 (scan_points, obstacle_points, scan_ranges, scan_angles)"""
+        return self.scan_points, self.obstacle_points, self.scan_ranges, self.scan_angles
+
 class LaserSimulator:
     """激光雷达模拟器（优化版）"""
     
@@ -1276,13 +2160,17 @@ class LaserSimulator:
         self.maze_env = maze_env
         self.max_range = max_range
     
-    def scan(self, robot_pos):
-        """执行360度激光扫描"""
-        x, y = robot_pos
-        scan_points = []
-        obstacle_points = []
-        scan_ranges = []
-        scan_angles = []
+    def scan_rays(self, robot_pos, detect_exit=True):
+        """
+        执行360度激光扫描，返回 (LaserScan, exit_found)
+
+        出口检测会修改 maze_env 中的出口状态；并发扫描时传 detect_exit=False，
+        再由调用方串行调用 detect_exit_from_scan。
+        """
+        angles = []
+        ranges = []
+        hits = []
+        hit_xy = []
         
         # 高速模式：360度扫描，每4度一个射线（减少计算量）
         for angle_deg in range(0, 360, 4):
@@ -1316,33 +2204,30 @@ class LaserSimulator:
                 # 标记这是外框碰撞，不应写入障碍点
                 is_boundary_hit = True
             
+            angles.append(angle_rad)
             if closest_collision:
-                collision_x, collision_y, distance = closest_collision
-                
                 # 只有碰到真实墙体或隐形墙时才记录为障碍点，外框碰撞不记录
+                ranges.append(closest_collision[2])
+                hits.append(not is_boundary_hit)
                 if not is_boundary_hit:
-                    obstacle_points.append((collision_x, collision_y))
-                
-                scan_ranges.append(distance)
-                scan_angles.append(angle_deg)
-                
-                # 在射线路径上添加自由空间点
-                for d in np.arange(0.2, distance, 0.2):
-                    free_x = x + d * math.cos(angle_rad)
-                    free_y = y + d * math.sin(angle_rad)
-                    scan_points.append((free_x, free_y))
+                    hit_xy.append(closest_collision[:2])
             else:
-                scan_ranges.append(self.max_range)
-                scan_angles.append(angle_deg)
-                for d in np.arange(0.2, self.max_range, 0.2):
-                    free_x = x + d * math.cos(angle_rad)
-                    free_y = y + d * math.sin(angle_rad)
-                    scan_points.append((free_x, free_y))
+                ranges.append(self.max_range)
+                hits.append(False)
+        
+        scan = LaserScan(robot_pos, angles, ranges, hits, hit_xy)
         
         # 检查出口（180度连续开放区域）
-        exit_found = self.detect_exit_from_scan(robot_pos, scan_ranges, scan_angles)
+        exit_found = False
+        if detect_exit:
+            exit_found = self.detect_exit_from_scan(robot_pos, scan.ranges, scan.angles_deg)
         
-        return scan_points, obstacle_points, scan_ranges, scan_angles, exit_found
+        return scan, exit_found
+    
+    def scan(self, robot_pos):
+        """兼容接口：返回旧格式 (scan_points, obstacle_points, scan_ranges, scan_angles, exit_found)"""
+        scan, exit_found = self.scan_rays(robot_pos)
+        return scan.to_point_lists() + (exit_found,)
     
     def ray_wall_intersection(self, ray_start, ray_direction, wall_start, wall_end):
         """计算射线与墙壁的交点"""
@@ -1394,7 +2279,11 @@ class LaserSimulator:
         return closest_intersection
     
     def detect_exit_from_scan(self, robot_pos, scan_ranges, scan_angles):
-        """简化版出口检测：基于边界方向的大量激光射线未命中内壁而直接打到外框。"""
+        """
+        简化版出口检测：基于边界方向的大量激光射线未命中内壁而直接打到外框。
+
+        scan_ranges（米）/ scan_angles（度）可以是列表或数组，LaserScan 直接传 ranges 和 angles_deg。
+        """
 
         # 最少需要一定数量扫描数据
         if len(scan_ranges) < 45:
@@ -1432,11 +2321,10 @@ class LaserSimulator:
         }[side]
 
         # 收集 ±25° 内的射线
-        candidate = []
-        for rng, ang in zip(scan_ranges, scan_angles):
-            diff = abs((ang - side_angle + 180) % 360 - 180)
-            if diff <= 25:
-                candidate.append((rng, ang))
+        scan_ranges = np.asarray(scan_ranges, dtype=float)
+        scan_angles = np.asarray(scan_angles)
+        in_sector = np.abs((scan_angles - side_angle + 180) % 360 - 180) <= 25
+        candidate = list(zip(scan_ranges[in_sector].tolist(), scan_angles[in_sector].tolist()))
 
         if len(candidate) < 8:
             return False
@@ -1476,6 +2364,7 @@ class SmartMazeSLAMVisualizer:
         self.maze_env = maze_env
         self.global_mapper = global_mapper
         self.num_robots = num_robots
+        _load_matplotlib()
         
         # 创建4面板显示
         self.fig, self.axes = plt.subplots(2, 2, figsize=(20, 12))
@@ -1554,9 +2443,7 @@ class SmartMazeSLAMVisualizer:
             if robot_id in self.global_mapper.robot_paths:
                 path = self.global_mapper.robot_paths[robot_id]
                 if len(path) > 1:
-                    path_x = [p[0] for p in path]
-                    path_y = [p[1] for p in path]
-                    ax.plot(path_x, path_y, '--', color=color, alpha=0.5, linewidth=1)
+                    ax.plot(path.x, path.y, '--', color=color, alpha=0.5, linewidth=1)
             
             # 绘制目标点
             if robot_id in robot_targets and robot_targets[robot_id]:
@@ -1699,6 +2586,7 @@ class SingleRobotVisualizer:
         self.maze_env = maze_env
         self.global_mapper = global_mapper
         self.robot = robot
+        _load_matplotlib()
         
         # 创建1x3面板显示
         self.fig, self.axes = plt.subplots(1, 3, figsize=(18, 6))
@@ -1824,9 +2712,7 @@ class SingleRobotVisualizer:
         if self.robot.robot_id in self.global_mapper.robot_paths:
             path = self.global_mapper.robot_paths[self.robot.robot_id]
             if len(path) > 1:
-                path_x = [p[0] for p in path]
-                path_y = [p[1] for p in path]
-                ax.plot(path_x, path_y, 'b--', alpha=0.6, linewidth=2, label='Path')
+                ax.plot(path.x, path.y, 'b--', alpha=0.6, linewidth=2, label='Path')
         
         # 绘制最短路径（如果存在）
         if self.shortest_path and len(self.shortest_path) > 1:
@@ -1974,9 +2860,7 @@ class SingleRobotVisualizer:
     
     def _calculate_coverage(self):
         """计算探索覆盖率"""
-        total_cells = self.global_mapper.grid_size * self.global_mapper.grid_size
-        explored_cells = len(self.global_mapper.all_explored_cells)
-        return (explored_cells / total_cells) * 100
+        return self.global_mapper.get_coverage()
 
 class SmartMazeExplorer:
     """智能迷宫探索器 - 前沿探索算法"""
@@ -2011,37 +2895,61 @@ class SmartMazeExplorer:
         self.last_position = self.position  # 上一次位置
         
         # 存储最新的扫描数据（用于雷达可视化）
-        self.latest_scan_points = []
-        self.latest_obstacle_points = []
-        self.latest_scan_ranges = []
-        self.latest_scan_angles = []
+        self.latest_scan = None
+    
+    # 兼容旧接口：按需从最新的 LaserScan 生成点列表
+    @property
+    def latest_scan_points(self):
+        return self.latest_scan.scan_points if self.latest_scan is not None else []
+    
+    @property
+    def latest_obstacle_points(self):
+        return self.latest_scan.obstacle_points if self.latest_scan is not None else []
+    
+    @property
+    def latest_scan_ranges(self):
+        return self.latest_scan.scan_ranges if self.latest_scan is not None else []
+    
+    @property
+    def latest_scan_angles(self):
+        return self.latest_scan.scan_angles if self.latest_scan is not None else []
         
+    @property
+    def is_active(self):
+        return self.status not in ["Exit Found", "Max Steps", "Stopped", "Stuck"]
+    
     def update(self):
-        """更新机器人状态（优化版）"""
-        if self.status in ["Exit Found", "Max Steps", "Stopped", "Stuck"]:
+        """更新机器人状态（优化版）：感知 -> 建图 -> 决策与移动"""
+        if not self.is_active:
             return False
         
         # 不再因步数达到上限而终止
         
-        # 记录移动前位置
-        old_position = self.position
-        
         # 执行激光扫描
-        scan_points, obstacle_points, scan_ranges, scan_angles, exit_found = self.laser_sim.scan(self.position)
+        scan, exit_found = self.sense()
+        
+        # 更新全局地图
+        self.integrate_scan(scan)
         
+        return self.act(exit_found)
+    
+    def sense(self, detect_exit=True):
+        """执行激光扫描，返回 (LaserScan, exit_found)；不修改共享地图，可在线程池中并发调用"""
+        return self.laser_sim.scan_rays(self.position, detect_exit)
+    
+    def integrate_scan(self, scan, refresh_frontiers=True):
+        """把扫描写入全局地图；多机器人模式传 refresh_frontiers=False，由系统每个tick统一更新前沿点"""
         # 存储扫描数据用于可视化
-        self.latest_scan_points = scan_points
-        self.latest_obstacle_points = obstacle_points
-        self.latest_scan_ranges = scan_ranges
-        self.latest_scan_angles = scan_angles
+        self.latest_scan = scan
         
-        # 更新全局地图
-        self.global_mapper.update_map(self.robot_id, self.position, scan_points, obstacle_points)
+        self.global_mapper.update_map_from_scan(self.robot_id, scan, refresh_frontiers)
         
-        # 高速模式：每3步更新一次前沿点，提高速度
-        if self.steps % 3 == 0:
+        # 高速模式：每3步额外推进一次前沿点计数（脏栅格已在 update_map 中消费，这里只做老化/移除检查）
+        if refresh_frontiers and self.steps % 3 == 0:
             self.global_mapper.update_frontiers()
-        
+    
+    def act(self, exit_found):
+        """根据当前地图选择目标并移动一步；返回机器人是否仍然活跃"""
         # 检查是否找到出口
         if exit_found:
             self.status = "Exit Found"
@@ -2370,31 +3278,164 @@ class SmartMazeExplorer:
         print(f"❌ Cannot find any safe random move for {self.robot_id}")
         return False
 
-class GlobalMazeSLAMSystem:
-    """单机器人迷宫SLAM系统主控制器"""
+class SharedMapPlannerWorker:
+    """
+    规划进程中的状态：按地图文件重建同样的迷宫环境（墙壁），附加主进程的共享地图，
+    规划时在 SharedGridMap.read() 中把共享数组直接作为 global_map 使用（零拷贝，
+    读取期间发生写入则由 seqlock 重试）。
+    """
     
-    def __init__(self, map_file="BreezySLAM-master/examples/map1.json"):
+    def __init__(self, map_file, display_size, descriptor):
+        from shared_map import SharedGridMap
+        
+        self.maze_env = MazeEnvironment(map_file)
+        self.maze_env.display_size = display_size
+        self.mapper = GlobalSLAMMapper(self.maze_env.size, display_size)
+        self.mapper.set_maze_env(self.maze_env)
+        self.shared = SharedGridMap.attach(descriptor)
+        self.path_planner = AStarPathPlanner(self.mapper, self.maze_env)
+    
+    def plan(self, kind, start_pos, goal_pos):
+        """返回 (路径, 规划所用的地图版本号)"""
+        def run(grid):
+            self.mapper.global_map = grid
+            if kind == 'shortest':
+                return plan_shortest_path(self.mapper, self.maze_env, start_pos, goal_pos)
+            return self.path_planner.plan_path(start_pos, goal_pos)
+        return self.shared.read(run)
+
+_planner_worker = None  # 规划进程内的 SharedMapPlannerWorker
+
+def _init_planner_worker(map_file, display_size, descriptor):
+    global _planner_worker
+    _planner_worker = SharedMapPlannerWorker(map_file, display_size, descriptor)
+
+def _plan_in_worker(kind, start_pos, goal_pos):
+    return _planner_worker.plan(kind, start_pos, goal_pos)
+
+class SharedMapPlannerPool:
+    """
+    规划进程池：工作进程通过 shared_map_descriptor() 附加共享内存地图，路径规划在工作进程中完成，
+    地图不再随每个请求pickle。提供与 AStarPathPlanner 相同的 plan_path 接口，可直接作为
+    探索器的 path_planner 使用。mapper 必须以 shared_memory=True 创建。
+    
+    plan_path 是同步调用（提交后立即等待 .result()），而各机器人在主线程中依次决策，
+    所以同一时刻最多只有一个规划在进行：进程池的作用是把规划移出写地图的进程、验证跨进程
+    零拷贝读图，而不是并发规划。workers>1 只在多个调用方同时提交时才有意义。
+    """
+    
+    def __init__(self, mapper, map_file, workers=1):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        
+        # spawn：不继承主进程的线程（感知线程池）和matplotlib状态，各平台行为一致
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_planner_worker,
+                                        initargs=(map_file, mapper.display_size, mapper.shared_map_descriptor()))
+        self.last_version = None
+    
+    def _plan(self, kind, start_pos, goal_pos):
+        path, self.last_version = self.pool.submit(_plan_in_worker, kind, start_pos, goal_pos).result()
+        return path
+    
+    def plan_path(self, start_pos, goal_pos):
+        return self._plan('astar', start_pos, goal_pos)
+    
+    def plan_shortest_path(self, start_pos, goal_pos):
+        return self._plan('shortest', start_pos, goal_pos)
+    
+    def close(self):
+        self.pool.shutdown()
+
+class GlobalMazeSLAMSystem:
+    """
+    迷宫SLAM系统主控制器
+
+    num_robots=1 时为原来的单机器人模式；num_robots>1 时多个探索器共享同一张全局地图，
+    每个tick在线程池中并发执行各机器人的激光扫描（只读环境），再在主线程中按机器人顺序
+    合并地图更新、统一更新一次前沿点，最后依次做目标分配与移动。
+    线程池只并发感知这一步：建图、目标分配和路径规划都在主线程中串行执行（分配要看到
+    同一份前沿点状态，纯Python规划在线程中也会被GIL串行化）。
+    planner_processes>0 时全局地图放进共享内存，路径规划交给附加该地图的规划进程池。
+    """
+    
+    def __init__(self, map_file="BreezySLAM-master/examples/map1.json", num_robots=1, workers=None, headless=False,
+                 display_size=None, planner_processes=0):
 
-        # 初始化环境和组件
+        # 初始化环境和组件（display_size 可覆盖地图的显示范围，用于大地图测试）
         self.maze_env = MazeEnvironment(map_file)
-        self.global_mapper = GlobalSLAMMapper(self.maze_env.size, self.maze_env.display_size)
+        if display_size is not None:
+            self.maze_env.display_size = max(display_size, self.maze_env.display_size)
+        self.global_mapper = GlobalSLAMMapper(self.maze_env.size, self.maze_env.display_size,
+                                              shared_memory=planner_processes > 0)
         self.global_mapper.set_maze_env(self.maze_env)  # 设置迷宫环境引用
-        self.path_planner = AStarPathPlanner(self.global_mapper, self.maze_env)
-        
-        # 创建单个机器人
-        robot_id = "Robot-1"
-        laser_sim = LaserSimulator(self.maze_env)
-        
-        self.robot = SmartMazeExplorer(robot_id, self.maze_env, self.global_mapper, laser_sim, self.path_planner)
-        self.robot.position = self.maze_env.start_pos
-        self.robot.step_size = 0.15  # 高速模式：增大步长，提高移动速度
+        self.planner_pool = None
+        if planner_processes > 0:
+            self.planner_pool = SharedMapPlannerPool(self.global_mapper, map_file, planner_processes)
+            self.path_planner = self.planner_pool
+        else:
+            self.path_planner = AStarPathPlanner(self.global_mapper, self.maze_env)
+        
+        # 创建机器人（都从入口出发，由前沿分配把它们分散开）
+        self.robots = []
+        for i in range(num_robots):
+            laser_sim = LaserSimulator(self.maze_env)
+            robot = SmartMazeExplorer(f"Robot-{i + 1}", self.maze_env, self.global_mapper, laser_sim, self.path_planner)
+            robot.position = self.maze_env.start_pos
+            robot.step_size = 0.15  # 高速模式：增大步长，提高移动速度
+            self.robots.append(robot)
+        self.robot = self.robots[0]
+        
+        # 多机器人模式：感知线程池
+        self.sense_pool = None
+        if num_robots > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            self.sense_pool = ThreadPoolExecutor(max_workers=workers or num_robots)
         
         # 创建可视化器
-        self.visualizer = SingleRobotVisualizer(self.maze_env, self.global_mapper, self.robot)
+        if headless:
+            self.visualizer = None
+        elif num_robots > 1:
+            self.visualizer = SmartMazeSLAMVisualizer(self.maze_env, self.global_mapper, num_robots)
+        else:
+            self.visualizer = SingleRobotVisualizer(self.maze_env, self.global_mapper, self.robot)
         
         # 最短路径相关
         self.shortest_path = None
         self.exploration_completed = False
+    
+    def step_robots(self):
+        """推进一个tick，返回是否还有活跃的机器人"""
+        if len(self.robots) == 1:
+            return self.robot.update()
+        
+        active = [robot for robot in self.robots if robot.is_active]
+        if not active:
+            return False
+        
+        # 1. 并发感知：扫描只读取环境，不写共享状态
+        scans = list(self.sense_pool.map(lambda robot: robot.sense(detect_exit=False), active))
+        
+        # 2. 串行合并：写入地图并做出口检测，最后统一更新一次前沿点
+        exits = []
+        for robot, (scan, _) in zip(active, scans):
+            robot.integrate_scan(scan, refresh_frontiers=False)
+            exits.append(robot.laser_sim.detect_exit_from_scan(robot.position, scan.ranges, scan.angles_deg))
+        self.global_mapper.update_frontiers()
+        
+        # 3. 决策与移动（共享前沿分配与路径规划，在主线程中按机器人顺序执行）
+        still_active = [robot.act(exit_found) for robot, exit_found in zip(active, exits)]
+        return any(still_active)
+    
+    def close(self):
+        """释放感知线程池、规划进程池和共享内存地图"""
+        if self.sense_pool is not None:
+            self.sense_pool.shutdown()
+            self.sense_pool = None
+        if self.planner_pool is not None:
+            self.planner_pool.close()
+            self.planner_pool = None
+        self.global_mapper.close()
 
     def run_exploration(self):
         import time
@@ -2407,7 +3448,7 @@ class GlobalMazeSLAMSystem:
             iteration += 1
             
             # 更新机器人
-            robot_active = self.robot.update()
+            robot_active = self.step_robots()
             
             # 检查时间限制（5分钟）
             elapsed_time = time.time() - start_time
@@ -2440,17 +3481,19 @@ class GlobalMazeSLAMSystem:
         avg_speed = iteration / total_time if total_time > 0 else 0
 
         # 确保最短路径被传递给可视化器
-        if self.exploration_completed and self.shortest_path:
+        if self.exploration_completed and self.shortest_path and self.visualizer is not None:
             self.visualizer.set_shortest_path(self.shortest_path)
         
         # 刷新一次可视化，确保终点红圈和最短路径显示
         self._update_visualization()
         
         self._print_final_results()
+        self.close()
         
         # 保持显示
-        plt.ioff()
-        plt.show()
+        if self.visualizer is not None:
+            plt.ioff()
+            plt.show()
     
     def _check_termination_conditions(self, robot_active):
         """检查终止条件"""
@@ -2477,25 +3520,29 @@ class GlobalMazeSLAMSystem:
             return True
         
         # 若机器人物理位置已经越过主迷宫边界（含扩展区），同样视为成功逃出
-        robot_pos = self.robot.position
-        if robot_pos[0] < -1.9 or robot_pos[0] > self.maze_env.size + 1.9 or \
-           robot_pos[1] < -1.9 or robot_pos[1] > self.maze_env.size + 1.9:
-            # 在极端越界位置直接标记出口
-            self.maze_env.mark_exit_reached(robot_pos)
-            print("🎉 Robot physically left maze boundary — exit assumed.")
-            
-            # 计算最短路径
-            self._calculate_shortest_path()
-            self.exploration_completed = True
+        for robot in self.robots:
+            robot_pos = robot.position
+            if robot_pos[0] < -1.9 or robot_pos[0] > self.maze_env.size + 1.9 or \
+               robot_pos[1] < -1.9 or robot_pos[1] > self.maze_env.size + 1.9:
+                # 在极端越界位置直接标记出口
+                self.maze_env.mark_exit_reached(robot_pos)
+                print(f"🎉 {robot.robot_id} physically left maze boundary — exit assumed.")
+                
+                # 计算最短路径
+                self._calculate_shortest_path()
+                self.exploration_completed = True
+                return True
+        
+        # 多机器人模式：所有机器人都停止后结束
+        if len(self.robots) > 1 and not robot_active:
+            print("⏹️  No active robots left.")
             return True
         
         return False
     
     def _calculate_coverage(self):
         """计算探索覆盖率"""
-        total_cells = self.global_mapper.grid_size * self.global_mapper.grid_size
-        explored_cells = len(self.global_mapper.all_explored_cells)
-        return (explored_cells / total_cells) * 100
+        return self.global_mapper.get_coverage()
     
     def _calculate_shortest_path(self):
         """计算从起点到终点的最短路径（使用八方向A*算法）"""
@@ -2515,11 +3562,10 @@ class GlobalMazeSLAMSystem:
             print("❌ No exit found, cannot calculate shortest path")
             return
         
-        # 创建专用于最短路径计算的八方向A*规划器
-        optimal_planner = OptimalPathPlanner(self.global_mapper, self.maze_env)
-        
-        # 使用八方向A*算法计算最优路径
-        self.shortest_path = optimal_planner.plan_optimal_path(start_pos, end_pos)
+        if self.planner_pool is not None:
+            self.shortest_path = self.planner_pool.plan_shortest_path(start_pos, end_pos)
+        else:
+            self.shortest_path = plan_shortest_path(self.global_mapper, self.maze_env, start_pos, end_pos)
         
         if self.shortest_path and len(self.shortest_path) > 1:
             # 计算路径长度（精确计算，包括对角线距离）
@@ -2546,6 +3592,12 @@ class GlobalMazeSLAMSystem:
     
     def _update_visualization(self):
         """更新可视化"""
+        if self.visualizer is None:
+            return
+        if len(self.robots) > 1:
+            self._update_multi_robot_visualization()
+            return
+        
         # 更新扫描数据
         self.visualizer.update_scan_data(
             self.robot.latest_scan_points,
@@ -2561,6 +3613,22 @@ class GlobalMazeSLAMSystem:
         # 更新显示
         self.visualizer.update_display()
     
+    def _update_multi_robot_visualization(self):
+        """多机器人模式：更新4面板可视化"""
+        robot_positions = {robot.robot_id: robot.position for robot in self.robots}
+        robot_targets = {robot.robot_id: robot.current_target for robot in self.robots}
+        robots_info = {robot.robot_id: {'pos': robot.position, 'steps': robot.steps,
+                                        'status': robot.status, 'target': robot.current_target}
+                       for robot in self.robots}
+        exploration_stats = {'frontiers': len(self.global_mapper.frontiers),
+                             'coverage': self._calculate_coverage(),
+                             'active_robots': sum(robot.is_active for robot in self.robots)}
+        for robot in self.robots:
+            self.visualizer.update_scan_data(robot.robot_id, robot.position,
+                                             robot.latest_scan_points, robot.latest_obstacle_points,
+                                             robot.latest_scan_ranges, robot.latest_scan_angles)
+        self.visualizer.update_display(robot_positions, robot_targets, robots_info, exploration_stats)
+    
     def _print_final_results(self):
 
         # 显示到已发现出口的距离
@@ -2620,17 +3688,166 @@ class GlobalMazeSLAMSystem:
             
         print("="*60)
 
+def benchmark_multi_robot(map_file, robot_counts=(1, 2, 4, 8), max_ticks=400, workers=None,
+                          coverage_marks=(10, 20, 30)):
+    """
+    多机器人扩展性基准：对每个机器人数量无界面运行 max_ticks 个tick，
+    报告吞吐量（tick/s、机器人步/s）以及覆盖率随时间的变化（到达各覆盖率所需的时间和tick数）。
+    """
+    results = {}
+    for num_robots in robot_counts:
+        system = GlobalMazeSLAMSystem(map_file, num_robots=num_robots, workers=workers, headless=True)
+        coverage_curve = []   # (耗时秒, tick, 覆盖率%)
+        robot_steps = 0
+        start_time = time.time()
+        ticks = 0
+        for ticks in range(1, max_ticks + 1):
+            robot_steps += sum(robot.is_active for robot in system.robots)
+            active = system.step_robots()
+            coverage_curve.append((time.time() - start_time, ticks, system._calculate_coverage()))
+            if not active:
+                break
+        elapsed = time.time() - start_time
+        system.close()
+        
+        reached = {}
+        for mark in coverage_marks:
+            hit = next((point for point in coverage_curve if point[2] >= mark), None)
+            reached[mark] = hit[:2] if hit else None
+        results[num_robots] = {
+            'ticks': ticks,
+            'elapsed': elapsed,
+            'ticks_per_sec': ticks / elapsed if elapsed > 0 else 0.0,
+            'robot_steps_per_sec': robot_steps / elapsed if elapsed > 0 else 0.0,
+            'final_coverage': coverage_curve[-1][2] if coverage_curve else 0.0,
+            'time_to_coverage': reached,
+            'coverage_curve': coverage_curve,
+        }
+    
+    print("\n📊 Multi-robot scaling")
+    header = f"{'robots':>6} {'ticks':>6} {'time(s)':>8} {'tick/s':>7} {'step/s':>7} {'coverage':>9}"
+    for mark in coverage_marks:
+        header += f" {f't@{mark}%':>12}"
+    print(header)
+    for num_robots, r in results.items():
+        line = (f"{num_robots:>6} {r['ticks']:>6} {r['elapsed']:>8.1f} {r['ticks_per_sec']:>7.1f} "
+                f"{r['robot_steps_per_sec']:>7.1f} {r['final_coverage']:>8.1f}%")
+        for mark in coverage_marks:
+            hit = r['time_to_coverage'][mark]
+            line += f" {f'{hit[0]:.1f}s/{hit[1]}' if hit else '-':>12}"
+        print(line)
+    return results
+
+def plan_shortest_path(mapper, maze_env, start_pos, end_pos):
+    """最终最短路径：Lazy Theta* 直接给出任意角度路径；找不到时退回八方向A*"""
+    planner = ThetaStarPlanner(mapper, maze_env)
+    path = planner.plan_path(start_pos, end_pos)
+    print(f"🛤️  Theta*: expanded {planner.expanded_nodes} nodes, {planner.los_checks} line-of-sight checks")
+    if len(path) > 1:
+        return path
+    print("⚠️  Theta* found no path, falling back to 8-direction A*")
+    return OptimalPathPlanner(mapper, maze_env).plan_optimal_path(start_pos, end_pos)
+
+def compare_shortest_path_planners(mapper, maze_env, start_pos, end_pos):
+    """分别用八方向A*（含平滑）和 Lazy Theta* 规划同一条最短路径，报告扩展节点数、耗时和路径长度"""
+    def path_length(path):
+        return sum(math.dist(path[i], path[i + 1]) for i in range(len(path) - 1))
+    
+    results = {}
+    for name, planner, plan in [
+            ('8-dir A*', OptimalPathPlanner(mapper, maze_env), 'plan_optimal_path'),
+            ('Theta*', ThetaStarPlanner(mapper, maze_env), 'plan_path')]:
+        start_time = time.time()
+        path = getattr(planner, plan)(start_pos, end_pos)
+        results[name] = {
+            'nodes': planner.expanded_nodes,
+            'time': time.time() - start_time,
+            'length': path_length(path),
+            'waypoints': len(path),
+            'path': path,
+        }
+    
+    print("\n📊 Shortest-path planners")
+    print(f"{'planner':>9} {'nodes':>7} {'time(s)':>8} {'length':>8} {'waypoints':>10}")
+    for name, r in results.items():
+        print(f"{name:>9} {r['nodes']:>7} {r['time']:>8.2f} {r['length']:>8.3f} {r['waypoints']:>10}")
+    return results
+
+def benchmark_memory(map_file, display_size=120, max_ticks=400):
+    """
+    大地图内存基准：把显示范围放大到 display_size（栅格数为 (display_size/0.1)^2），
+    无界面运行 max_ticks 个tick，报告地图状态各部分的字节数以及运行期间的 Python 堆峰值。
+    """
+    import tracemalloc
+    
+    tracemalloc.start()
+    start_time = time.time()
+    system = GlobalMazeSLAMSystem(map_file, headless=True, display_size=display_size)
+    ticks = 0
+    for ticks in range(1, max_ticks + 1):
+        if not system.step_robots():
+            break
+    elapsed = time.time() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    mapper = system.global_mapper
+    usage = mapper.memory_usage()
+    print(f"\n📊 Memory ({mapper.grid_size}x{mapper.grid_size} grid, {ticks} ticks, {elapsed:.1f}s, "
+          f"{len(mapper.frontiers)} frontiers)")
+    for name, nbytes in usage.items():
+        print(f"   {name:>15}: {nbytes / 2**20:8.2f} MiB")
+    print(f"   {'traced peak':>15}: {peak / 2**20:8.2f} MiB")
+    system.close()
+    return usage, peak
+
 def main():
     """主程序"""
-    print("🔍 Single Robot Maze SLAM Explorer - High Speed Mode")
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Maze SLAM Explorer")
+    parser.add_argument("--map", default="BreezySLAM-master/examples/map1.json", help="迷宫地图文件")
+    parser.add_argument("--robots", type=int, default=1, help="机器人数量")
+    parser.add_argument("--workers", type=int, default=None, help="多机器人模式的激光扫描线程数（默认等于机器人数量；建图与规划仍在主线程串行）")
+    parser.add_argument("--headless", action="store_true", help="不显示matplotlib窗口")
+    parser.add_argument("--benchmark", type=int, nargs="*", metavar="N",
+                        help="运行多机器人扩展性基准，参数为机器人数量列表（默认 1 2 4 8）")
+    parser.add_argument("--ticks", type=int, default=400, help="基准测试的tick数")
+    parser.add_argument("--planner-processes", type=int, default=0,
+                        help="路径规划进程数：>0 时全局地图放进共享内存，由规划进程零拷贝读取（默认 0，本进程规划）")
+    parser.add_argument("--compare-planners", action="store_true",
+                        help="无界面探索 --ticks 个tick后，比较八方向A*与Theta*的最短路径规划")
+    parser.add_argument("--memory-benchmark", type=int, nargs="?", const=120, metavar="DISPLAY_SIZE",
+                        help="运行大地图内存基准，参数为放大后的显示范围（默认 120，即1200x1200栅格）")
+    args = parser.parse_args()
+    
+    if args.compare_planners:
+        system = GlobalMazeSLAMSystem(args.map, headless=True)
+        for _ in range(args.ticks):
+            if not system.step_robots():
+                break
+        env = system.maze_env
+        exits = env.reached_exit_positions or env.discovered_exits or env.exits
+        end_pos = exits[0] if exits else (env.size - 1.0, env.size - 1.0)
+        compare_shortest_path_planners(system.global_mapper, env, env.start_pos, end_pos)
+        system.close()
+        return
+    
+    if args.memory_benchmark is not None:
+        benchmark_memory(args.map, args.memory_benchmark, args.ticks)
+        return
+    
+    if args.benchmark is not None:
+        benchmark_multi_robot(args.map, tuple(args.benchmark) or (1, 2, 4, 8), args.ticks, args.workers)
+        return
+    
+    print("🔍 Maze SLAM Explorer - High Speed Mode")
     print("="*56)
     
-    # 可以更改地图文件
-    map_file = "BreezySLAM-master/examples/map1.json"
-    
     try:
-        # 创建并运行单机器人系统
-        system = GlobalMazeSLAMSystem(map_file)
+        # 创建并运行探索系统
+        system = GlobalMazeSLAMSystem(args.map, num_robots=args.robots, workers=args.workers,
+                                      headless=args.headless, planner_processes=args.planner_processes)
         system.run_exploration()
         
     except KeyboardInterrupt:
@@ -2641,4 +3858,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""
+共享内存栅格地图 - 让多个进程零拷贝读取同一张全局SLAM地图
+
+地图数据放在一块 multiprocessing.shared_memory 中, 块首部是一个64位的序列号,
+之后紧跟地图数组. 单写者 / 多读者, 采用 seqlock 协议:
+
+    写者: 序列号+1 (变为奇数) -> 写地图 -> 序列号+1 (变回偶数)
+    读者: 读序列号 s1 (奇数说明正在写, 重试) -> 读地图 -> 读序列号 s2, s1 == s2 则读到的是一致快照
+
+读者从不加锁, 也不会阻塞写者; 写者每个tick只写一次, 读者重试的概率很低.
+序列号/2 即地图版本号, 读者可据此判断地图是否更新过 (例如决定是否需要重新规划).
+"""
+
+import inspect
+import time
+
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+_HEADER_BYTES = 64   # 序列号占8字节, 其余留空使地图数据按缓存行对齐
+
+# Python 3.13+ 的 SharedMemory 支持 track=False, 附加时不向 resource_tracker 登记
+_HAS_TRACK = 'track' in inspect.signature(shared_memory.SharedMemory.__init__).parameters
+
+
+def _open_shared_memory(name):
+    """附加到已存在的共享内存块; 附加方不负责回收, 不在 resource_tracker 中保留登记"""
+    if _HAS_TRACK:
+        return shared_memory.SharedMemory(name=name, track=False)
+    # 旧版本构造时总会登记, 附加后立即注销, 避免附加进程退出时 tracker 把块删掉
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class SharedGridMap:
+    """
+    共享内存中的栅格地图.
+
+    用法:
+        shared = SharedGridMap.create((h, w), dtype)     # 写者进程创建
+        with shared.writing():                           # 写者修改地图
+            shared.array[rows, cols] = value
+        worker = SharedGridMap.attach(shared.descriptor())   # 其他进程附加
+        snapshot, version = worker.snapshot()            # 一致快照 (拷贝)
+        result, version = worker.read(fn)                # 零拷贝读取: fn 直接作用于共享数组
+    """
+
+    def __init__(self, shm, shape, dtype, owner):
+        self._shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self._seq = np.ndarray((1,), dtype=np.uint64, buffer=shm.buf, offset=0)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf, offset=_HEADER_BYTES)
+        if not owner:
+            # 读者拿到的是只读视图, 防止误写破坏协议
+            self.array.flags.writeable = False
+
+    @classmethod
+    def create(cls, shape, dtype=np.int64, name=None):
+        """创建新的共享地图 (初始全0), 调用方为所有者, 负责最终 unlink"""
+        nbytes = _HEADER_BYTES + int(np.prod(shape)) * np.dtype(dtype).itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True, size=nbytes)
+        shared = cls(shm, shape, dtype, owner=True)
+        shared._seq[0] = 0
+        shared.array.fill(0)
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        """按 descriptor() 返回的描述附加到已有共享地图"""
+        name, shape, dtype = descriptor
+        return cls(_open_shared_memory(name), shape, dtype, owner=False)
+
+    def descriptor(self):
+        """可pickle的描述 (名称, 形状, dtype), 传给工作进程用于 attach"""
+        return (self._shm.name, self.shape, self.dtype.str)
+
+    @property
+    def version(self):
+        """地图版本号 (已完成的写入次数)"""
+        return int(self._seq[0]) // 2
+
+    # ---- 写者 ----
+    def begin_write(self):
+        self._seq[0] += 1
+
+    def end_write(self):
+        self._seq[0] += 1
+
+    def writing(self):
+        """写入上下文: with shared.writing(): ..."""
+        return _WriteSection(self)
+
+    # ---- 读者 ----
+    def read(self, fn, max_retries=1000):
+        """
+        零拷贝读取: 在共享数组上调用 fn(array) 并返回 (结果, 版本号).
+        如果读取期间发生了写入则重试; fn 不应保留对数组的引用.
+        """
+        for _ in range(max_retries):
+            s1 = int(self._seq[0])
+            if s1 & 1:
+                time.sleep(0)
+                continue
+            result = fn(self.array)
+            if int(self._seq[0]) == s1:
+                return result, s1 // 2
+        raise RuntimeError("SharedGridMap.read: writer kept the map busy, no consistent snapshot")
+
+    def snapshot(self, out=None):
+        """拷贝出一致快照, 返回 (数组, 版本号); 传入 out 可复用缓冲区"""
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        _, version = self.read(lambda array: np.copyto(out, array))
+        return out, version
+
+    def close(self):
+        """释放本进程的映射; 所有者同时删除共享内存块"""
+        self._seq = None
+        self.array = None
+        self._shm.close()
+        if self.owner:
+            if not _HAS_TRACK:
+                # 子进程与所有者共用同一个 resource_tracker 时, 附加方的注销会连同所有者的登记
+                # 一起删掉; 先补登记 (重复登记无副作用), 使 unlink 中的注销总能配对
+                resource_tracker.register(self._shm._name, "shared_memory")
+            self._shm.unlink()
+
+
+class _WriteSection:
+    """seqlock 写区间"""
+
+    def __init__(self, shared):
+        self.shared = shared
+
+    def __enter__(self):
+        self.shared.begin_write()
+        return self.shared.array
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shared.end_write()
+        return False
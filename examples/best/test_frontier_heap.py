@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+前沿点索引堆测试: 单机器人选目标走 get_nearest_frontier, 堆查询结果与逐个打分取最大一致
+
+运行: python -m pytest test_frontier_heap.py  (或直接 python test_frontier_heap.py)
+"""
+
+import os
+import random
+
+from maze_slam_visual_new2 import AStarPathPlanner, GlobalSLAMMapper, LaserSimulator, MazeEnvironment, \
+    SmartMazeExplorer
+
+MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "json_data", "1.json")
+
+
+def _brute_force_best(mapper, robot_pos):
+    """原来的逐点实现：可访问区域优先，其中综合评分最高者"""
+    accessible = [f for f in mapper.frontiers if mapper.is_accessible(f)]
+    pool = accessible or list(mapper.frontiers)
+    return max(mapper.frontier_score(robot_pos, f, mapper.frontier_table.get_value(f, 0.5)) for f in pool)
+
+
+def test_heap_query_matches_brute_force_during_exploration():
+    random.seed(0)
+    maze_env = MazeEnvironment(MAP_FILE)
+    mapper = GlobalSLAMMapper(maze_env.size, maze_env.display_size)
+    mapper.set_maze_env(maze_env)
+    robot = SmartMazeExplorer("R", maze_env, mapper, LaserSimulator(maze_env), AStarPathPlanner(mapper, maze_env))
+    robot.position = maze_env.start_pos
+    robot.step_size = 0.15
+
+    # 单机器人的目标选择确实在用索引堆（此时测试本身还没有查询过）
+    for _ in range(100):
+        robot.update()
+    assert mapper.frontier_heap.rebuilds > 0
+
+    queries = 0
+    for _ in range(300):
+        robot.update()
+        if not mapper.frontiers:
+            continue
+        best = mapper.get_nearest_frontier(robot.position)
+        score = mapper.frontier_score(robot.position, best, mapper.frontier_table.get_value(best, 0.5))
+        assert abs(score - _brute_force_best(mapper, robot.position)) < 1e-12
+        queries += 1
+    assert queries > 0
+
+
+if __name__ == "__main__":
+    test_heap_query_matches_brute_force_during_exploration()
+    print("ok")
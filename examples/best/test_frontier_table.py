@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+前沿点信息表测试: 稀疏索引的增删/槽位复用, 以及 update_frontiers 对没有记录的前沿点的处理
+
+运行: python -m pytest test_frontier_table.py  (或直接 python test_frontier_table.py)
+"""
+
+import numpy as np
+
+from maze_slam_visual_new2 import FrontierTable, GlobalSLAMMapper
+
+
+def test_sparse_index_add_remove_reuse():
+    mapper = GlobalSLAMMapper(16, 120)
+    table = FrontierTable(mapper, capacity=2)
+    a, b, c = mapper.grid_to_world((10, 20)), mapper.grid_to_world((11, 20)), mapper.grid_to_world((500, 7))
+    slot_a, slot_b = table.add(a, 1), table.add(b, 2)
+    slot_c = table.add(c, 3)          # 触发扩容
+    assert len({slot_a, slot_b, slot_c}) == 3 and len(table.cell) >= 3
+    table.remove(b)
+    assert table.slot(b) == -1
+    assert list(table.slots(table.cell_indices([a, b, c]))) == [slot_a, -1, slot_c]
+    assert table.add(b, 4) == slot_b  # 槽位复用
+    # 索引大小只与前沿点数量有关，不随网格面积增长
+    assert table.nbytes < 64 * 1024
+
+
+def test_update_frontiers_ignores_missing_record():
+    mapper = GlobalSLAMMapper(16, 20)
+    mapper.frontier_table = FrontierTable(mapper, capacity=1)
+    table = mapper.frontier_table
+    mapper.update_counter = 29
+
+    # 有记录的前沿点占用最后一个槽位：刚确认过、周围仍有未知、价值高
+    kept = mapper.grid_to_world((50, 50))
+    slot = table.add(kept, 25)
+    table.last_seen[slot] = 29
+    table.nearby_unknown[slot] = 10
+    table.value[slot] = 0.9
+    # 同一轮被移除又重新加入的前沿点：在集合中但没有记录
+    orphan = mapper.grid_to_world((80, 80))
+    mapper.frontiers.update({kept, orphan})
+
+    mapper.update_frontiers()
+    # 没有记录按"很久未确认、周围无未知"处理而被移除，不能借用最后一个槽位的数据
+    assert orphan not in mapper.frontiers
+    assert kept in mapper.frontiers
+    assert np.isclose(table.value[slot], 0.9)
+
+
+if __name__ == "__main__":
+    test_sparse_index_add_remove_reuse()
+    test_update_frontiers_ignores_missing_record()
+    print("ok")
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+多机器人模式测试: 两个机器人无界面跑一小段, 都在移动、共享地图在增长、分到的前沿点互不相同
+
+运行: python -m pytest test_multi_robot.py  (或直接 python test_multi_robot.py)
+"""
+
+import os
+import random
+
+from maze_slam_visual_new2 import GlobalMazeSLAMSystem
+
+MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "json_data", "1.json")
+
+
+def test_two_robot_headless_episode():
+    random.seed(0)
+    system = GlobalMazeSLAMSystem(MAP_FILE, num_robots=2, headless=True)
+    try:
+        assert system.sense_pool is not None
+        start = system.maze_env.start_pos
+        coverage = []
+        for _ in range(80):
+            if not system.step_robots():
+                break
+            coverage.append(system._calculate_coverage())
+        assert len(coverage) >= 40
+        assert coverage[-1] > coverage[0]
+        # 两个机器人都写入了共享地图并离开了起点
+        mapper = system.global_mapper
+        assert set(mapper.robot_paths) == {robot.robot_id for robot in system.robots}
+        for robot in system.robots:
+            assert robot.position != start
+        # 同一时刻分配给两个机器人的前沿点互不相同
+        positions = {robot.robot_id: robot.position for robot in system.robots}
+        assignments = mapper.assign_frontiers_to_robots(positions)
+        assert len(set(assignments.values())) == len(assignments)
+    finally:
+        system.close()
+
+
+if __name__ == "__main__":
+    test_two_robot_headless_episode()
+    print("ok")
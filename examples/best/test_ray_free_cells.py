@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+射线建图测试: ray_free_cells 要覆盖射线穿过的每个栅格 (0.1m 栅格上不能跳格),
+且不能把端点所在栅格/命中的障碍物栅格标成自由
+
+运行: python -m pytest test_ray_free_cells.py  (或直接 python test_ray_free_cells.py)
+"""
+
+import numpy as np
+
+from maze_slam_visual_new2 import GlobalSLAMMapper, LaserScan
+
+NUM_RAYS = 360
+
+
+def _random_scans(num_poses, seed=0):
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, NUM_RAYS, endpoint=False)
+    for _ in range(num_poses):
+        origin = rng.uniform(0.0, 14.0, size=2)
+        world_angles = rng.uniform(-np.pi, np.pi) + angles
+        ranges = rng.uniform(0.05, 6.0, size=NUM_RAYS)
+        yield origin, world_angles, ranges
+
+
+def _dense_cells(mapper, origin, angle, distance):
+    """密集采样得到射线经过的栅格 (不含端点栅格, 只保留网格内的)"""
+    d = np.linspace(0.0, distance, 20000)
+    cells_x = np.floor((origin[0] + 2.0 + d * np.cos(angle)) / mapper.resolution).astype(int)
+    cells_y = np.floor((origin[1] + 2.0 + d * np.sin(angle)) / mapper.resolution).astype(int)
+    cells = set(zip(cells_x.tolist(), cells_y.tolist())) - {(cells_x[-1], cells_y[-1])}
+    return {(x, y) for x, y in cells if 0 <= x < mapper.grid_size and 0 <= y < mapper.grid_size}
+
+
+def test_rays_do_not_skip_cells():
+    mapper = GlobalSLAMMapper(16, 20)
+    for origin, world_angles, ranges in _random_scans(3):
+        for i in range(0, NUM_RAYS, 4):
+            scan = LaserScan(origin, world_angles[i:i + 1], ranges[i:i + 1], [False])
+            cells_x, cells_y = mapper.ray_free_cells(scan)
+            got = set(zip(cells_x.tolist(), cells_y.tolist()))
+            assert _dense_cells(mapper, origin, world_angles[i], ranges[i]) <= got
+
+
+def test_no_ray_frees_its_hit_cell():
+    mapper = GlobalSLAMMapper(16, 20)
+    for origin, world_angles, ranges in _random_scans(5, seed=1):
+        # 命中点略微偏离 起点+距离*方向, 模拟求交舍入
+        hit_xy = np.column_stack((origin[0] + ranges * np.cos(world_angles),
+                                  origin[1] + ranges * np.sin(world_angles))) + 1e-9
+        for i in range(NUM_RAYS):
+            scan = LaserScan(origin, world_angles[i:i + 1], ranges[i:i + 1], [True], hit_xy[i:i + 1])
+            cells_x, cells_y = mapper.ray_free_cells(scan)
+            hit_x, hit_y = mapper.world_to_grid_array(hit_xy[i:i + 1])
+            assert not np.any((cells_x == hit_x[0]) & (cells_y == hit_y[0]))
+
+
+if __name__ == "__main__":
+    test_rays_do_not_skip_cells()
+    test_no_ray_frees_its_hit_cell()
+    print("ok")
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+共享内存地图测试: 其他进程通过 descriptor() 附加后能读到一致的地图和版本号,
+规划进程池的结果与本进程规划一致, 关闭后共享内存被释放
+
+运行: python -m pytest test_shared_map.py  (或直接 python test_shared_map.py)
+"""
+
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from shared_map import SharedGridMap
+
+MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "json_data", "1.json")
+
+
+def _read_in_child(descriptor):
+    shared = SharedGridMap.attach(descriptor)
+    try:
+        (total, corner), version = shared.read(lambda grid: (int(grid.sum()), int(grid[0, 0])))
+        return total, corner, version
+    finally:
+        shared.close()
+
+
+def test_other_process_reads_snapshot():
+    shared = SharedGridMap.create((50, 50), dtype=np.uint8)
+    try:
+        with shared.writing():
+            shared.array[:10] = 2
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            total, corner, version = pool.submit(_read_in_child, shared.descriptor()).result()
+            assert (total, corner, version) == (2 * 10 * 50, 2, shared.version)
+            # 子进程附加/关闭后, 主进程继续写入, 再次读取能看到新版本
+            with shared.writing():
+                shared.array[:] = 1
+            total, corner, version = pool.submit(_read_in_child, shared.descriptor()).result()
+            assert (total, corner, version) == (50 * 50, 1, shared.version)
+    finally:
+        shared.close()
+
+
+def test_planner_pool_matches_local_planner():
+    from maze_slam_visual_new2 import AStarPathPlanner, GlobalMazeSLAMSystem, plan_shortest_path
+
+    with warnings.catch_warnings():
+        # resource_tracker 的泄漏/KeyError 警告视为失败
+        warnings.simplefilter("error")
+        system = GlobalMazeSLAMSystem(MAP_FILE, headless=True, planner_processes=1)
+        try:
+            for _ in range(150):
+                system.step_robots()
+            mapper, maze_env = system.global_mapper, system.maze_env
+            local = AStarPathPlanner(mapper, maze_env)
+            start = system.robot.position
+            assert mapper.frontiers
+            # frontiers 中已是世界坐标
+            for goal in list(mapper.frontiers)[:5]:
+                assert system.planner_pool.plan_path(start, goal) == local.plan_path(start, goal)
+                assert system.planner_pool.last_version == mapper.shared_map.version
+            assert system.planner_pool.plan_shortest_path(maze_env.start_pos, start) == \
+                plan_shortest_path(mapper, maze_env, maze_env.start_pos, start)
+        finally:
+            system.close()
+        assert system.global_mapper.shared_map is None
+
+
+if __name__ == "__main__":
+    test_other_process_reads_snapshot()
+    test_planner_pool_matches_local_planner()
+    print("ok")
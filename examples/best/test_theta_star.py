@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Theta* 测试: 规划用的边位掩码是对称的 (反向查找已关闭邻居时不会落空),
+规划结果首尾正确且每段都不穿墙
+
+运行: python -m pytest test_theta_star.py  (或直接 python test_theta_star.py)
+"""
+
+import os
+
+import numpy as np
+
+from maze_slam_visual_new2 import GlobalSLAMMapper, MazeEnvironment, ThetaStarPlanner, TraversabilityGrid
+
+MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "json_data", "1.json")
+
+
+def _planner():
+    maze_env = MazeEnvironment(MAP_FILE)
+    mapper = GlobalSLAMMapper(maze_env.size, maze_env.display_size)
+    mapper.set_maze_env(maze_env)
+    return ThetaStarPlanner(mapper, maze_env)
+
+
+def test_symmetrize_drops_one_way_edges():
+    planner = _planner()
+    grid = TraversabilityGrid(planner.mapper, planner.maze_env, planner._positions_clear, planner._edges_clear)
+    ys, xs = np.nonzero(grid.edge_bits & 1)          # 方向0: (-1, 0)
+    y, x = int(ys[len(ys) // 2]), int(xs[len(xs) // 2])
+    assert grid.edge_bits[y, x - 1] >> 1 & 1         # 反方向1: (1, 0)
+    grid.edge_bits[y, x - 1] &= ~np.uint8(1 << 1)    # 模拟反方向检查因浮点误差失败
+    grid.symmetrize()
+    assert not grid.edge_bits[y, x] & 1
+    for d, (dx, dy) in enumerate(TraversabilityGrid.DIRECTIONS):
+        back = TraversabilityGrid.DIRECTIONS.index((-dx, -dy))
+        n = grid.edge_bits.shape[0]
+        forward = grid.edge_bits[max(0, -dy):n - max(0, dy), max(0, -dx):n - max(0, dx)] >> d & 1
+        reverse = grid.edge_bits[max(0, dy):n - max(0, -dy), max(0, dx):n - max(0, -dx)] >> back & 1
+        assert np.array_equal(forward, reverse)
+
+
+def test_plan_path_stays_clear_of_walls():
+    planner = _planner()
+    maze_env = planner.maze_env
+    goal = (maze_env.size - 1.0, maze_env.size - 1.0)
+    path = planner.plan_path(maze_env.start_pos, goal)
+    assert path[0] == maze_env.start_pos and path[-1] == goal
+    for a, b in zip(path[1:], path[2:-1]):
+        assert maze_env.can_move_to(a, b)
+
+
+if __name__ == "__main__":
+    test_symmetrize_drops_one_way_edges()
+    test_plan_path_stays_clear_of_walls()
+    print("ok")
@@ -15,6 +15,26 @@ import base64
 import io
 from maze_slam_visual_new2 import *
 
+
+def _scan_point_lists(robot):
+    """把机器人最新的 LaserScan 直接转成可JSON序列化的 [[x, y], ...] 列表"""
+    scan = robot.latest_scan
+    if scan is None:
+        return [], []
+    return scan.free_points().tolist(), scan.hit_points().tolist()
+
+def _path_delta(global_mapper, robot_id, cursor=None):
+    """
+    机器人轨迹的增量数据 (TrajectoryBuffer.sync), 返回 (payload, 新游标).
+    payload = {'first': 最旧保留点序号, 'start': points[0] 的序号, 'points': [[x, y], ...]}:
+    前端丢弃序号 < first 或 >= start 的本地点后追加 points; cursor=None 时发送完整轨迹.
+    """
+    path = global_mapper.robot_paths.get(robot_id)
+    if path is None:
+        return {'first': 0, 'start': 0, 'points': []}, None
+    first, start, points, end = path.sync(cursor)
+    return {'first': first, 'start': start, 'points': points.tolist()}, end
+
 class WebMazeSLAMVisualizer:
     """Web版迷宫SLAM可视化器"""
     
@@ -220,7 +240,7 @@ class WebMazeSLAMVisualizer:
         data = {
             'walls': [],
             'robot_pos': [robot.position[0], robot.position[1]],
-            'robot_path': [],
+            'robot_path_delta': None,
             'start_pos': list(maze_env.start_pos),
             'discovered_exits': [],
             'reached_exits': [],
@@ -236,10 +256,8 @@ class WebMazeSLAMVisualizer:
                 'x2': wall[1][0], 'y2': wall[1][1]
             })
         
-        # 机器人路径
-        if robot.robot_id in global_mapper.robot_paths:
-            path = global_mapper.robot_paths[robot.robot_id]
-            data['robot_path'] = [[p[0], p[1]] for p in path]
+        # 机器人路径：客户端主动请求时发送完整轨迹（新连接需要全量重同步）
+        data['robot_path_delta'], _ = _path_delta(global_mapper, robot.robot_id)
         
         # 发现的出口
         data['discovered_exits'] = [[e[0], e[1]] for e in maze_env.discovered_exits]
@@ -288,11 +306,12 @@ class WebMazeSLAMVisualizer:
     
     def _get_radar_data(self, robot, maze_env):
         """获取雷达数据"""
+        scan_points, obstacle_points = _scan_point_lists(robot)
         data = {
             'robot_pos': [robot.position[0], robot.position[1]],
             'walls': [],
-            'scan_points': [[p[0], p[1]] for p in robot.latest_scan_points],
-            'obstacle_points': [[p[0], p[1]] for p in robot.latest_obstacle_points],
+            'scan_points': scan_points,
+            'obstacle_points': obstacle_points,
             'scan_ranges': robot.latest_scan_ranges,
             'scan_angles': robot.latest_scan_angles,
             'maze_size': maze_env.size
@@ -310,9 +329,7 @@ class WebMazeSLAMVisualizer:
     def _get_status_info(self, robot, global_mapper, maze_env):
         """获取状态信息"""
         # 计算覆盖率
-        total_cells = global_mapper.grid_size * global_mapper.grid_size
-        explored_cells = len(global_mapper.all_explored_cells)
-        coverage = (explored_cells / total_cells) * 100
+        coverage = global_mapper.get_coverage()
         
         data = {
             'robot_id': robot.robot_id,
@@ -413,6 +430,9 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
         self.robot = SmartMazeExplorer(robot_id, self.maze_env, self.global_mapper, laser_sim, self.path_planner)
         self.robot.position = self.maze_env.start_pos
         self.robot.step_size = 0.15
+        self.robots = [self.robot]
+        self.sense_pool = None
+        self.visualizer = None
         
         # 设置True SLAM模式：机器人通过探索发现出口
         self.maze_env.exits = []  # 清空预设出口
@@ -424,6 +444,7 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
         
         # Web相关
         self.update_callback = update_callback
+        self._path_cursor = None  # 已发送的轨迹游标，周期更新只发送其后的增量
         self.shortest_path = None
         self.exploration_completed = False
         
@@ -490,6 +511,7 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
         # 发送最终更新
         if self.update_callback:
             try:
+                self._path_cursor = None  # 最终更新发送完整轨迹
                 final_data = self._prepare_web_data()
                 final_data['simulation_completed'] = True
                 self.update_callback(final_data)
@@ -509,9 +531,7 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
     
     def _calculate_coverage(self):
         """计算探索覆盖率"""
-        total_cells = self.global_mapper.grid_size * self.global_mapper.grid_size
-        explored_cells = len(self.global_mapper.all_explored_cells)
-        return (explored_cells / total_cells) * 100
+        return self.global_mapper.get_coverage()
     
     def _check_termination_conditions(self, robot_active):
         """检查终止条件 - 重写父类方法以支持Web回调"""
@@ -563,12 +583,8 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
             print("❌ No exit found, cannot calculate shortest path")
             return
         
-        # 创建专用于最短路径计算的八方向A*规划器
-        from maze_slam_visual_new2 import OptimalPathPlanner
-        optimal_planner = OptimalPathPlanner(self.global_mapper, self.maze_env)
-        
-        # 使用八方向A*算法计算最优路径
-        self.shortest_path = optimal_planner.plan_optimal_path(start_pos, end_pos)
+        # Lazy Theta* 任意角度最短路径（找不到时退回八方向A*）
+        self.shortest_path = plan_shortest_path(self.global_mapper, self.maze_env, start_pos, end_pos)
         
         if self.shortest_path and len(self.shortest_path) > 1:
             # 计算路径长度（精确计算，包括对角线距离）
@@ -591,7 +607,7 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
                     straight_segments += 1
             
             print(f"✅ Optimal shortest path calculated!")
-            print(f"   🎯 Algorithm: 8-direction A* with diagonal movement")
+            print(f"   🎯 Algorithm: Lazy Theta* (any-angle)")
             print(f"   📍 Start: ({start_pos[0]:.2f}, {start_pos[1]:.2f})")
             print(f"   🎯 End: ({end_pos[0]:.2f}, {end_pos[1]:.2f})")
             print(f"   📏 Path length: {path_length:.3f} units")
@@ -609,7 +625,7 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
             true_maze_data = {
                 'walls': [],
                 'robot_pos': [self.robot.position[0], self.robot.position[1]],
-                'robot_path': [],
+                'robot_path_delta': None,
                 'start_pos': list(self.maze_env.start_pos),
                 'discovered_exits': [[e[0], e[1]] for e in self.maze_env.discovered_exits],
                 'reached_exits': [[e[0], e[1]] for e in self.maze_env.reached_exit_positions],
@@ -625,10 +641,9 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
                     'x2': wall[1][0], 'y2': wall[1][1]
                 })
             
-            # 机器人路径
-            if self.robot.robot_id in self.global_mapper.robot_paths:
-                path = self.global_mapper.robot_paths[self.robot.robot_id]
-                true_maze_data['robot_path'] = [[p[0], p[1]] for p in path]
+            # 机器人路径：只发送上次更新之后新增/改动的点
+            true_maze_data['robot_path_delta'], self._path_cursor = _path_delta(
+                self.global_mapper, self.robot.robot_id, self._path_cursor)
             
             # SLAM地图数据
             slam_map_data = {
@@ -647,18 +662,17 @@ class WebGlobalMazeSLAMSystem(GlobalMazeSLAMSystem):
             }
             
             # 雷达数据
+            scan_points, obstacle_points = _scan_point_lists(self.robot)
             radar_data = {
                 'robot_pos': [self.robot.position[0], self.robot.position[1]],
                 'walls': true_maze_data['walls'],
-                'scan_points': [[p[0], p[1]] for p in self.robot.latest_scan_points],
-                'obstacle_points': [[p[0], p[1]] for p in self.robot.latest_obstacle_points],
+                'scan_points': scan_points,
+                'obstacle_points': obstacle_points,
                 'maze_size': self.maze_env.size
             }
             
             # 状态信息
-            total_cells = self.global_mapper.grid_size * self.global_mapper.grid_size
-            explored_cells = len(self.global_mapper.all_explored_cells)
-            coverage = (explored_cells / total_cells) * 100
+            coverage = self.global_mapper.get_coverage()
             
             status_info = {
                 'robot_id': self.robot.robot_id,